@@ -10,101 +10,3912 @@ import os
 import re
 import time
 import random
+import argparse
+import heapq
+import sys
 import threading
-from urllib.parse import urljoin
-from queue import Queue, Empty
+import asyncio
+import ctypes
+import fnmatch
+import sqlite3
+import http.client
+import json
+import base64
+import hashlib
+import multiprocessing
+import shutil
+import logging
+import logging.handlers
+from abc import ABC, abstractmethod
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from contextlib import contextmanager, asynccontextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin, urlparse, parse_qsl
+from queue import Queue, Empty, Full
 
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-from tkinter.scrolledtext import ScrolledText
+try:
+    import fcntl  # reflink (FICLONE) só existe em POSIX
+except ImportError:
+    fcntl = None
+
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import async_playwright, TimeoutError as AsyncPlaywrightTimeoutError
+
+# -------------------------
+# Funções utilitárias (mesma lógica do script original)
+# -------------------------
+
+# Padrões da limpeza de nomes, compilados uma vez (mesmas regras do script original)
+_UNSAFE_CHARS_RE = re.compile(r'[\\/*?:"<>|]')
+_NON_WORD_RE = re.compile(r'[^\w\s\-\.]', flags=re.UNICODE)
+_FILE_PREFIXES = ("picture_as_pdf", "Resolva_", "arquivo_", "download_", "video_")
+_NOISE_WORDS_RE = re.compile(
+    r'\b(?:picture|pdf|arquivo|baixar|download|documento|file|imagem|video|mp4)\b', flags=re.IGNORECASE
+)
+_SPACES_RE = re.compile(r'\s+')
+_KNOWN_EXT_RE = re.compile(r'\.(pdf|mp4|jpg|png|docx|xlsx|zip|rar)$', flags=re.IGNORECASE)
+_FOLDER_PREFIXES = ("folder", "pasta", "dir", "subfolder")
+
+@lru_cache(maxsize=8192)
+def sanitize_filename(name: str) -> str:
+    return _UNSAFE_CHARS_RE.sub("_", name).strip()
+
+@lru_cache(maxsize=8192)
+def clean_file_name(text: str) -> str:
+    text = _NON_WORD_RE.sub('', text)
+    for prefix in _FILE_PREFIXES:
+        if text.startswith(prefix):
+            text = text[len(prefix):]
+    text = _NOISE_WORDS_RE.sub('', text)
+    text = _SPACES_RE.sub(' ', text).strip()
+    text = _KNOWN_EXT_RE.sub('', text)
+    return text
+
+@lru_cache(maxsize=8192)
+def clean_folder_name(name: str) -> str:
+    name = _NON_WORD_RE.sub('', name)
+    for prefix in _FOLDER_PREFIXES:
+        if name.lower().startswith(prefix):
+            name = name[len(prefix):]
+    name = _SPACES_RE.sub(' ', name).strip()
+    return name
+
+@lru_cache(maxsize=8192)
+def target_name(visible_name: str, suggested: str = None) -> str:
+    # Nome final a partir do nome visível + extensão sugerida pelo download
+    ext = os.path.splitext(suggested)[1] if suggested else ""
+    if visible_name.lower().endswith(".mp4"):
+        return sanitize_filename(visible_name)
+    return sanitize_filename(clean_file_name(visible_name).rstrip(".") + ext)
+
+class NameResolver:
+    # Nomes finais sem colisão, decididos sob um lock: workers simultâneos nunca recebem o mesmo caminho.
+    # Por pasta, um índice em memória dos nomes tomados (um listdir na primeira vez + reservas feitas
+    # aqui) e, por nome pedido, o próximo sufixo " (n)" a testar: nomes já conhecidos são pulados sem
+    # tocar o disco, e só o candidato ainda livre no índice leva um stat. O índice vale para uma raiz
+    # e é descartado no fim dela (forget).
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._taken = {}
+        self._next = {}
+        self._origin = {}
+
+    def _names_in(self, local_path):
+        taken = self._taken.get(local_path)
+        if taken is None:
+            try:
+                taken = set(os.listdir(local_path))
+            except OSError:
+                taken = set()
+            self._taken[local_path] = taken
+        return taken
+
+    def reserve(self, local_path: str, final_name: str) -> str:
+        with self._lock:
+            taken = self._names_in(local_path)
+            base, ext = os.path.splitext(final_name)
+            counter = self._next.get((local_path, final_name), 0)
+            while True:
+                name = f"{base} ({counter}){ext}" if counter else final_name
+                # o stat do candidato cobre arquivos criados por fora (outro processo, usuário)
+                if name not in taken and not os.path.exists(os.path.join(local_path, name)):
+                    break
+                taken.add(name)
+                counter += 1
+            taken.add(name)
+            self._next[(local_path, final_name)] = counter + 1
+            self._origin[(local_path, name)] = (final_name, counter)
+            return os.path.join(local_path, name)
+
+    def release(self, save_path: str):
+        # Download que falhou devolve o nome: a próxima tentativa cai no mesmo caminho (e retoma o .part)
+        local_path, name = os.path.split(save_path)
+        with self._lock:
+            self._taken.get(local_path, set()).discard(name)
+            origin = self._origin.pop((local_path, name), None)
+            if origin:
+                key = (local_path, origin[0])
+                self._next[key] = min(self._next.get(key, 0), origin[1])
+
+    def forget(self, root: str):
+        # Fim de uma raiz: descarta o índice das pastas dela (o disco volta a ser a referência)
+        prefix = os.path.join(root, "")
+
+        def inside(path):
+            return path == root or path.startswith(prefix)
+
+        with self._lock:
+            for path in [p for p in self._taken if inside(p)]:
+                del self._taken[path]
+            for mapping in (self._next, self._origin):
+                for key in [k for k in mapping if inside(k[0])]:
+                    del mapping[key]
+
+_names = NameResolver()
+
+def unique_save_path(local_path: str, final_name: str) -> str:
+    return _names.reserve(local_path, final_name)
+
+def release_save_path(save_path: str):
+    # Só libera nomes que não chegaram ao disco
+    if save_path and not os.path.exists(save_path):
+        _names.release(save_path)
+
+def forget_save_paths(root: str):
+    _names.forget(root)
+
+def root_slug(url: str) -> str:
+    # Id da pasta na URL (/pasta/<id>), usado como nome de job/subpasta
+    return sanitize_filename(urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]) or "raiz"
+
+SITE_ROOT = "https://drivedepobre.com"
+
+def normalize(url: str, base: str = SITE_ROOT) -> str:
+    if url.startswith("http://") or url.startswith("https://"):
+        return url
+    return urljoin(base, url)
+
+def _page_base(page) -> str:
+    # Links relativos resolvem contra o site da própria página (servidor local de benchmark, espelho...);
+    # página sem URL http (set_content) cai no site original
+    url = page.url or ""
+    return url if url.startswith(("http://", "https://")) else SITE_ROOT
+
+def parse_list(text) -> list:
+    # "pdf, mp4;zip" -> ["pdf", "mp4", "zip"]; listas/tuplas passam direto
+    if not text:
+        return []
+    if isinstance(text, (list, tuple, set)):
+        return [str(t).strip() for t in text if str(t).strip()]
+    return [t.strip() for t in re.split(r'[,;\n]', text) if t.strip()]
+
+# -------------------------
+# Filtro de arquivos (aplicado antes de abrir qualquer página)
+# -------------------------
+
+class FileFilter:
+    # Padrões com prefixo "re:" são regex; os demais são glob (fnmatch). Ambos valem para nome e URL.
+    def __init__(self, include_exts=(".pdf", ".mp4"), exclude_exts=(), include_patterns=(), exclude_patterns=()):
+        self.include_exts = tuple(self._ext(e) for e in include_exts)
+        self.exclude_exts = tuple(self._ext(e) for e in exclude_exts)
+        self.include_patterns = [self._compile(p) for p in include_patterns]
+        self.exclude_patterns = [self._compile(p) for p in exclude_patterns]
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            include_exts=parse_list(settings.get("include_exts", (".pdf", ".mp4"))),
+            exclude_exts=parse_list(settings.get("exclude_exts", ())),
+            include_patterns=parse_list(settings.get("include_patterns", ())),
+            exclude_patterns=parse_list(settings.get("exclude_patterns", ())),
+        )
+
+    @staticmethod
+    def _ext(ext: str) -> str:
+        ext = ext.strip().lower()
+        return ext if ext.startswith(".") else "." + ext
+
+    @staticmethod
+    def _compile(pattern: str):
+        if pattern.startswith("re:"):
+            return re.compile(pattern[3:], re.IGNORECASE)
+        return re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+
+    @staticmethod
+    def _matches(patterns, *values) -> bool:
+        return any(p.search(v) for p in patterns for v in values if v)
+
+    def accepts(self, file_url: str, visible_name: str) -> bool:
+        name = (visible_name or "").strip().lower()
+        url_path = urlparse(file_url).path.lower()
+        if self.include_exts and not (name.endswith(self.include_exts) or url_path.endswith(self.include_exts)):
+            return False
+        if self.exclude_exts and (name.endswith(self.exclude_exts) or url_path.endswith(self.exclude_exts)):
+            return False
+        if self.include_patterns and not self._matches(self.include_patterns, visible_name, file_url):
+            return False
+        if self._matches(self.exclude_patterns, visible_name, file_url):
+            return False
+        return True
+
+# -------------------------
+# Manifesto persistente (retomada e arquivos já baixados)
+# -------------------------
+
+MANIFEST_NAME = ".drivedepobre_manifest.sqlite3"
+
+class Manifest:
+    # Guarda no out_dir as pastas visitadas/pendentes e os arquivos descobertos/baixados.
+    # Arquivos são indexados por (url, pasta): a mesma URL listada em duas pastas são duas cópias.
+    # Uma conexão compartilhada entre threads, protegida por lock.
+    def __init__(self, out_dir: str):
+        os.makedirs(out_dir, exist_ok=True)
+        self.path = os.path.join(out_dir, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS folders ("
+                " url TEXT PRIMARY KEY, name TEXT, local_path TEXT,"
+                " status TEXT NOT NULL DEFAULT 'pending', updated_at REAL)"
+            )
+            self._migrate_files()
+            self._conn.execute(self.FILES_TABLE.format(name="files"))
+            rows = self._conn.execute("SELECT url, local_path FROM files WHERE status = 'done'").fetchall()
+        self._done = {tuple(r) for r in rows}
+
+    FILES_TABLE = (
+        "CREATE TABLE IF NOT EXISTS {name} ("
+        " url TEXT NOT NULL, visible_name TEXT, local_path TEXT NOT NULL, save_path TEXT,"
+        " size INTEGER, status TEXT NOT NULL DEFAULT 'pending', updated_at REAL,"
+        " PRIMARY KEY (url, local_path))"
+    )
+
+    def _migrate_files(self):
+        # Manifesto de versões anteriores: tabela de arquivos com a URL sozinha como chave
+        key = [r[1] for r in self._conn.execute("PRAGMA table_info(files)") if r[5]]
+        if key != ["url"]:
+            return
+        self._conn.execute(self.FILES_TABLE.format(name="files_new"))
+        self._conn.execute(
+            "INSERT INTO files_new SELECT url, visible_name, COALESCE(local_path, ''), save_path, size, status,"
+            " updated_at FROM files ORDER BY rowid"
+        )
+        self._conn.execute("DROP TABLE files")
+        self._conn.execute("ALTER TABLE files_new RENAME TO files")
+
+    def is_done(self, file_url: str, local_path: str) -> bool:
+        return (file_url, local_path) in self._done
+
+    def done_count(self) -> int:
+        return len(self._done)
+
+    def pending_folders(self) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, name, local_path FROM folders WHERE status = 'pending' ORDER BY rowid"
+            ).fetchall()
+        return [tuple(r) for r in rows]
+
+    def visited_folders(self) -> set:
+        with self._lock:
+            rows = self._conn.execute("SELECT url FROM folders WHERE status = 'done'").fetchall()
+        return {r[0] for r in rows}
+
+    def interrupted(self) -> bool:
+        # Execução anterior parou no meio: sobrou pasta ou arquivo ainda não processado
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT EXISTS(SELECT 1 FROM folders WHERE status = 'pending')"
+                " OR EXISTS(SELECT 1 FROM files WHERE status = 'pending')"
+            ).fetchone()
+        return bool(row[0])
+
+    def pending_files(self) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, visible_name, local_path FROM files WHERE status != 'done' ORDER BY rowid"
+            ).fetchall()
+        return [tuple(r) for r in rows]
+
+    def add_folders(self, folders):
+        # folders: [(url, name, local_path)] -> (re)marca como pendentes
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO folders (url, name, local_path, status, updated_at) VALUES (?, ?, ?, 'pending', ?)"
+                " ON CONFLICT(url) DO UPDATE SET status = 'pending', updated_at = excluded.updated_at",
+                [(u, n, lp, now) for u, n, lp in folders]
+            )
+
+    def add_files(self, files):
+        # files: [(url, visible_name, local_path)] recém-descobertos
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO files (url, visible_name, local_path, status, updated_at) VALUES (?, ?, ?, 'pending', ?)"
+                " ON CONFLICT(url, local_path) DO NOTHING",
+                [(u, n, lp, now) for u, n, lp in files]
+            )
+
+    def folder_done(self, folder_url: str):
+        # Subpastas e arquivos já foram registrados conforme apareceram no scroll
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE folders SET status = 'done', updated_at = ? WHERE url = ?", (time.time(), folder_url)
+            )
+
+    def saved_path(self, file_url: str, local_path: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT save_path FROM files WHERE url = ? AND local_path = ?", (file_url, local_path)
+            ).fetchone()
+        return row[0] if row else None
+
+    def file_finished(self, file_url: str, local_path: str, save_path: str = None, status: str = "done"):
+        size = None
+        if save_path:
+            try:
+                size = os.path.getsize(save_path)
+            except OSError:
+                pass
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE files SET save_path = COALESCE(?, save_path), size = COALESCE(?, size),"
+                " status = ?, updated_at = ? WHERE url = ? AND local_path = ?",
+                (save_path, size, status, time.time(), file_url, local_path)
+            )
+            if status == "done":
+                self._done.add((file_url, local_path))
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+
+LISTING_CACHE_NAME = ".drivedepobre_listings.sqlite3"
+
+class ListingCache:
+    # Resultado de process_folder por URL de pasta (subpastas, arquivos, impressão digital), para
+    # sincronizações incrementais: pastas dentro do TTL são reaproveitadas sem abrir página; as
+    # vencidas são varridas de novo. Acima de max_entries, sai quem foi usado há mais tempo (LRU).
+    def __init__(self, out_dir: str, ttl: float = 24 * 3600, max_entries: int = 100000):
+        os.makedirs(out_dir, exist_ok=True)
+        self.path = os.path.join(out_dir, LISTING_CACHE_NAME)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS listings ("
+                " url TEXT PRIMARY KEY, subfolders TEXT NOT NULL, files TEXT NOT NULL,"
+                " fingerprint TEXT NOT NULL, fetched_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS listings_last_used ON listings (last_used)")
+
+    @classmethod
+    def from_settings(cls, out_dir, settings):
+        if not settings.get("listing_cache", False):
+            return None
+        return cls(out_dir, ttl=float(settings.get("listing_ttl_hours", 24)) * 3600,
+                   max_entries=int(settings.get("listing_cache_max", 100000)))
+
+    @staticmethod
+    def fingerprint(subfolders, files) -> str:
+        payload = json.dumps([sorted(subfolders), sorted(files)], ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get(self, folder_url: str):
+        # (subfolders, files) se a listagem ainda está no prazo; None se não existe ou venceu
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT subfolders, files, fetched_at FROM listings WHERE url = ?", (folder_url,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl:
+                return None
+            self._conn.execute("UPDATE listings SET last_used = ? WHERE url = ?", (now, folder_url))
+        return [tuple(x) for x in json.loads(row[0])], [tuple(x) for x in json.loads(row[1])]
+
+    def put(self, folder_url: str, subfolders, files) -> bool:
+        # Grava a listagem; True se o conteúdo mudou desde a última varredura
+        fp = self.fingerprint(subfolders, files)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT fingerprint FROM listings WHERE url = ?", (folder_url,)).fetchone()
+            self._conn.execute(
+                "INSERT INTO listings (url, subfolders, files, fingerprint, fetched_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(url) DO UPDATE SET subfolders = excluded.subfolders,"
+                " files = excluded.files, fingerprint = excluded.fingerprint,"
+                " fetched_at = excluded.fetched_at, last_used = excluded.last_used",
+                (folder_url, json.dumps(subfolders, ensure_ascii=False), json.dumps(files, ensure_ascii=False),
+                 fp, now, now)
+            )
+            self._conn.execute(
+                "DELETE FROM listings WHERE url IN (SELECT url FROM listings ORDER BY last_used DESC"
+                " LIMIT -1 OFFSET ?)", (self.max_entries,)
+            )
+        return row is None or row[0] != fp
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+
+DEDUP_NAME = ".drivedepobre_dedup.sqlite3"
+FICLONE = 0x40049409
+
+_FILE_ID_RE = re.compile(r"/(?:arquivo|pdf)/([^/?#]+)")
+
+def file_key(file_url: str) -> str:
+    # /arquivo/731055 e /pdf/731055 são o mesmo arquivo no site
+    m = _FILE_ID_RE.search(urlparse(file_url).path)
+    if m:
+        return f"id:{m.group(1)}"
+    parsed = urlparse(file_url)
+    return f"url:{parsed.netloc}{parsed.path}"
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def link_or_copy(src: str, dst: str) -> str:
+    # Reflink (cópia copy-on-write) > hardlink > cópia comum; devolve o método usado
+    if fcntl is not None:
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return "reflink"
+        except OSError:
+            try:
+                os.remove(dst)
+            except OSError:
+                pass
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        shutil.copyfile(src, dst)
+        return "copy"
+
+class DedupStore:
+    # Um blob por arquivo: a primeira ocorrência de cada ID é baixada; as outras pastas recebem
+    # reflink/hardlink do mesmo blob, inclusive em execuções futuras. Ocorrências que aparecem com o
+    # download ainda em andamento esperam na fila do ID e são ligadas quando ele termina.
+    # Com by_content, blobs de IDs diferentes mas mesmo tamanho + sha256 também viram links.
+    def __init__(self, out_dir: str, by_content: bool = False, name: str = DEDUP_NAME, journal_mode: str = "WAL"):
+        os.makedirs(out_dir, exist_ok=True)
+        self.path = os.path.join(out_dir, name)
+        self.by_content = by_content
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.stats = Counter()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(f"PRAGMA journal_mode={journal_mode}")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " key TEXT PRIMARY KEY, path TEXT NOT NULL, size INTEGER, sha256 TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS blobs_content ON blobs (size, sha256)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS placements ("
+                " key TEXT NOT NULL, local_path TEXT NOT NULL, path TEXT, PRIMARY KEY (key, local_path))"
+            )
+
+    @classmethod
+    def from_settings(cls, out_dir, settings, **kwargs):
+        mode = settings.get("dedup", "off")
+        if mode not in ("id", "content"):
+            return None
+        return cls(out_dir, by_content=mode == "content", **kwargs)
+
+    def _blob(self, key):
+        row = self._conn.execute("SELECT path, size FROM blobs WHERE key = ?", (key,)).fetchone()
+        if row and os.path.exists(row[0]):
+            return row
+        return None
+
+    def claim(self, file_url, visible_name, local_path) -> str:
+        # "download": esta ocorrência baixa; "wait": outra já está baixando o mesmo ID;
+        # "placed": o blob já existia e foi ligado aqui; "skip": esta pasta já tem o arquivo
+        key = file_key(file_url)
+        with self._lock:
+            placed = self._conn.execute(
+                "SELECT 1 FROM placements WHERE key = ? AND local_path = ?", (key, local_path)
+            ).fetchone()
+            if placed:
+                return "skip"
+            waiters = self._inflight.get(key)
+            if waiters is not None:
+                if all(w[2] != local_path for w in waiters) and local_path != waiters.owner:
+                    waiters.append((file_url, visible_name, local_path))
+                return "wait"
+            blob = self._blob(key)
+            if blob is None:
+                self._inflight[key] = _Waiters(local_path)
+                return "download"
+        self._place(key, blob[0], blob[1], visible_name, local_path)
+        return "placed"
+
+    def _place(self, key, blob_path, size, visible_name, local_path):
+        os.makedirs(local_path, exist_ok=True)
+        dst = unique_save_path(local_path, target_name(visible_name, blob_path))
+        try:
+            method = link_or_copy(blob_path, dst)
+        except OSError:
+            release_save_path(dst)
+            raise
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO placements (key, local_path, path) VALUES (?, ?, ?)", (key, local_path, dst)
+            )
+            self.stats["placed"] += 1
+            self.stats[method] += 1
+            self.stats["transfer_saved"] += size or 0
+            if method != "copy":
+                self.stats["disk_saved"] += size or 0
+        return dst
+
+    def finished(self, file_url, save_path):
+        # Fim do download do dono do ID. Sucesso: registra o blob e devolve [(url, nome, pasta, caminho)]
+        # das ocorrências ligadas. Falha: devolve as ocorrências em espera para a próxima tentativa.
+        key = file_key(file_url)
+        local_path = os.path.dirname(save_path) if save_path else None
+        with self._lock:
+            waiters = self._inflight.pop(key, None) or []
+        if not save_path:
+            return [], list(waiters)
+        size = os.path.getsize(save_path)
+        digest = sha256_file(save_path) if self.by_content else None
+        blob_path = save_path
+        if digest:
+            blob_path = self._merge_content(save_path, size, digest)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs (key, path, size, sha256) VALUES (?, ?, ?, ?)",
+                (key, blob_path, size, digest)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO placements (key, local_path, path) VALUES (?, ?, ?)",
+                (key, local_path, save_path)
+            )
+        placed = []
+        for w_url, w_name, w_path in waiters:
+            placed.append((w_url, w_name, w_path, self._place(key, blob_path, size, w_name, w_path)))
+        return placed, []
+
+    def _merge_content(self, save_path, size, digest) -> str:
+        # Mesmo conteúdo já guardado sob outro ID: troca o arquivo recém-baixado por um link
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path FROM blobs WHERE size = ? AND sha256 = ? AND path != ?", (size, digest, save_path)
+            ).fetchone()
+        if not row or not os.path.exists(row[0]):
+            return save_path
+        tmp = save_path + ".dedup"
+        method = link_or_copy(row[0], tmp)
+        os.replace(tmp, save_path)
+        with self._lock:
+            self.stats["content_merged"] += 1
+            self.stats[method] += 1
+            if method != "copy":
+                self.stats["disk_saved"] += size
+        return row[0]
+
+    def summary(self) -> str:
+        st = self.stats
+        return (f"{st['placed']} cópia(s) sem novo download ({st['transfer_saved'] / 1e6:.1f} MB de transferência "
+                f"poupados), {st['content_merged']} por conteúdo, {st['disk_saved'] / 1e6:.1f} MB de disco poupados "
+                f"(reflink {st['reflink']}, hardlink {st['hardlink']}, cópia {st['copy']})")
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+
+class _Waiters(list):
+    # Ocorrências à espera de um download em andamento; owner = pasta de quem está baixando
+    def __init__(self, owner):
+        super().__init__()
+        self.owner = owner
+
+# -------------------------
+# GUI-aware logging (thread-safe)
+# -------------------------
+def status_category(status: str) -> str:
+    # "baixando (2)" -> "baixando": agrupa o status por item nos contadores
+    return status.split(" (", 1)[0]
+
+class GuiLogger:
+    # Workers só escrevem na fila (log e status); os widgets são tocados apenas em poll(), na thread
+    # do Tk, em lote: um insert por tick no log, no máximo max_lines linhas visíveis e max_rows linhas
+    # na tabela. O histórico completo vai para um arquivo rotativo; os contadores por status
+    # continuam exatos mesmo depois que a linha sai da tabela.
+    def __init__(self, text_widget: "ScrolledText", list_widget: "ttk.Treeview", max_lines: int = 5000,
+                 max_rows: int = 2000, max_events_per_poll: int = 5000):
+        self.text_widget = text_widget
+        self.list_widget = list_widget
+        self.queue = Queue()
+        self.max_lines = max_lines
+        self.max_rows = max_rows
+        self.max_events_per_poll = max_events_per_poll
+        self.counts = Counter()
+        self._item_status = {}
+        self._rows = deque()
+        self._visible_lines = 0
+        self._spill = None
+
+    def set_spill_file(self, path: str, max_bytes: int = 5 * 1024 * 1024, backup_count: int = 3):
+        # Histórico completo (o widget só mostra as últimas max_lines linhas)
+        if self._spill:
+            for handler in self._spill.handlers[:]:
+                handler.close()
+                self._spill.removeHandler(handler)
+        spill = logging.getLogger(f"drivedepobre.gui.{id(self)}")
+        spill.propagate = False
+        spill.setLevel(logging.INFO)
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                       encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        spill.addHandler(handler)
+        self._spill = spill
+
+    def log(self, message: str):
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        line = f"[{timestamp}] {message}"
+        if self._spill:
+            self._spill.info(line)
+        self.queue.put(("log", line))
+
+    def set_item_status(self, item_id: str, status: str):
+        # Chamado de qualquer thread: a tabela só é atualizada no próximo poll()
+        self.queue.put(("status", item_id, status))
+
+    def poll(self):
+        lines = []
+        statuses = {}
+        try:
+            for _ in range(self.max_events_per_poll):
+                event = self.queue.get_nowait()
+                if event[0] == "log":
+                    lines.append(event[1])
+                else:
+                    _, item_id, status = event
+                    statuses.pop(item_id, None)
+                    statuses[item_id] = status
+                    self._count(item_id, status)
+        except Empty:
+            pass
+        if lines:
+            self._append_lines(lines)
+        if statuses:
+            self._apply_statuses(statuses)
+        # schedule next poll by caller
+
+    def _count(self, item_id, status):
+        category = status_category(status)
+        previous = self._item_status.get(item_id)
+        if previous == category:
+            return
+        if previous is not None:
+            self.counts[previous] -= 1
+        self.counts[category] += 1
+        self._item_status[item_id] = category
+
+    def _append_lines(self, lines):
+        lines = lines[-self.max_lines:]
+        text = "\n".join(lines) + "\n"
+        try:
+            self.text_widget.configure(state="normal")
+            self.text_widget.insert("end", text)
+            # conta linhas do widget, não mensagens: erros do Playwright ocupam várias linhas
+            self._visible_lines += text.count("\n")
+            excess = self._visible_lines - self.max_lines
+            if excess > 0:
+                self.text_widget.delete("1.0", f"{excess + 1}.0")
+                self._visible_lines -= excess
+            self.text_widget.see("end")
+            self.text_widget.configure(state="disabled")
+        except Exception:
+            pass
+
+    def _apply_statuses(self, statuses):
+        # (id, filename, status); item_id é o caminho, único por arquivo
+        try:
+            for item_id, status in statuses.items():
+                if self.list_widget.exists(item_id):
+                    self.list_widget.set(item_id, "status", status)
+                else:
+                    self.list_widget.insert("", "end", iid=item_id, values=(os.path.basename(item_id), status))
+                    self._rows.append(item_id)
+            while len(self._rows) > self.max_rows:
+                oldest = self._rows.popleft()
+                if self.list_widget.exists(oldest):
+                    self.list_widget.delete(oldest)
+        except Exception:
+            pass
+
+    def summary(self) -> str:
+        parts = [f"{n} {category}" for category, n in sorted(self.counts.items()) if n > 0]
+        return ", ".join(parts)
+
+    def clear_text(self):
+        self._visible_lines = 0
+        self.text_widget.configure(state="normal")
+        self.text_widget.delete("1.0", "end")
+        self.text_widget.configure(state="disabled")
+
+    def reset(self):
+        # Nova execução: esvazia fila, tabela, log e contadores
+        try:
+            while True:
+                self.queue.get_nowait()
+        except Empty:
+            pass
+        for iid in self.list_widget.get_children():
+            self.list_widget.delete(iid)
+        self._rows.clear()
+        self._item_status.clear()
+        self.counts.clear()
+        self.clear_text()
+
+class ConsoleLogger:
+    # Mesma interface do GuiLogger para o modo CLI: texto simples ou uma linha JSON por evento
+    def __init__(self, json_lines: bool = False, stream=None):
+        self.json_lines = json_lines
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def _write(self, line: str):
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def log(self, message: str):
+        if self.json_lines:
+            self._write(json.dumps({"ts": time.time(), "event": "log", "message": message}, ensure_ascii=False))
+        else:
+            self._write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}")
+
+    def set_item_status(self, item_id: str, status: str):
+        # no modo texto o log já descreve cada etapa; só o JSON carrega o status por item
+        if self.json_lines:
+            self._write(json.dumps({"ts": time.time(), "event": "status", "item": item_id, "status": status},
+                                   ensure_ascii=False))
+
+# -------------------------
+# Métricas: tempo por fase, bytes, tentativas e motivos de falha
+# -------------------------
+
+# Fases medidas, na ordem em que aparecem no resumo
+METRIC_PHASES = (
+    "folder_navigate", "folder_scroll", "folder_extract",
+    "file_navigate", "button_wait", "click_to_download", "transfer", "file_total",
+)
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+class Metrics:
+    # Coletor thread-safe compartilhado por crawl e downloads. Cada fase guarda as últimas `window`
+    # durações (p50/p95) e os totais; eventos opcionais em JSONL e dump no formato texto do Prometheus.
+    def __init__(self, events_path: str = None, prometheus_path: str = None, window: int = 5000):
+        self.started = time.monotonic()
+        self.prometheus_path = prometheus_path
+        self.window = window
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._phase_sum = Counter()
+        self._phase_count = Counter()
+        self.counters = Counter()
+        self.failures = Counter()
+        self._events = open(events_path, "a", encoding="utf-8") if events_path else None
+        self._server = None
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.get("metrics_jsonl") or None, settings.get("metrics_prometheus") or None)
+
+    @contextmanager
+    def phase(self, name: str, **fields):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, time.monotonic() - start, **fields)
+
+    def record(self, name: str, seconds: float, **fields):
+        with self._lock:
+            durations = self._durations.get(name)
+            if durations is None:
+                durations = self._durations[name] = deque(maxlen=self.window)
+            durations.append(seconds)
+            self._phase_sum[name] += seconds
+            self._phase_count[name] += 1
+        self.event("phase", phase=name, seconds=round(seconds, 4), **fields)
+
+    def incr(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def failure(self, reason: str, **fields):
+        with self._lock:
+            self.failures[reason] += 1
+        self.event("failure", reason=reason, **fields)
+
+    def event(self, kind: str, **fields):
+        if self._events is None:
+            return
+        line = json.dumps({"ts": time.time(), "event": kind, **fields}, ensure_ascii=False)
+        with self._lock:
+            self._events.write(line + "\n")
+            self._events.flush()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = max(1e-6, time.monotonic() - self.started)
+            phases = {
+                name: {"count": self._phase_count[name], "sum": self._phase_sum[name],
+                       "p50": _percentile(list(d), 0.5), "p95": _percentile(list(d), 0.95)}
+                for name, d in self._durations.items()
+            }
+            return {"elapsed": elapsed, "counters": dict(self.counters), "failures": dict(self.failures),
+                    "phases": phases}
+
+    def summary(self) -> str:
+        snap = self.snapshot()
+        c = snap["counters"]
+        minutes = snap["elapsed"] / 60
+        parts = [
+            f"{c.get('files_done', 0) / minutes:.1f} arq/min",
+            f"{c.get('bytes', 0) / snap['elapsed'] / 1e6:.2f} MB/s",
+            f"{c.get('retries', 0)} nova(s) tentativa(s)",
+        ]
+        order = {name: i for i, name in enumerate(METRIC_PHASES)}
+        for name, ph in sorted(snap["phases"].items(), key=lambda kv: order.get(kv[0], len(order))):
+            parts.append(f"{name} p50 {ph['p50']:.2f}s/p95 {ph['p95']:.2f}s")
+        if snap["failures"]:
+            parts.append("falhas: " + ", ".join(f"{k}={v}" for k, v in sorted(snap["failures"].items())))
+        return " | ".join(parts)
+
+    def prometheus_text(self) -> str:
+        snap = self.snapshot()
+        lines = [
+            "# TYPE drivedepobre_elapsed_seconds gauge",
+            f"drivedepobre_elapsed_seconds {snap['elapsed']:.3f}",
+        ]
+        for name, value in sorted(snap["counters"].items()):
+            lines.append(f"# TYPE drivedepobre_{name}_total counter")
+            lines.append(f"drivedepobre_{name}_total {value}")
+        lines.append("# TYPE drivedepobre_failures_total counter")
+        for reason, value in sorted(snap["failures"].items()):
+            lines.append(f'drivedepobre_failures_total{{reason="{reason}"}} {value}')
+        lines.append("# TYPE drivedepobre_phase_seconds summary")
+        for name, ph in sorted(snap["phases"].items()):
+            lines.append(f'drivedepobre_phase_seconds{{phase="{name}",quantile="0.5"}} {ph["p50"]:.4f}')
+            lines.append(f'drivedepobre_phase_seconds{{phase="{name}",quantile="0.95"}} {ph["p95"]:.4f}')
+            lines.append(f'drivedepobre_phase_seconds_sum{{phase="{name}"}} {ph["sum"]:.4f}')
+            lines.append(f'drivedepobre_phase_seconds_count{{phase="{name}"}} {ph["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def dump_prometheus(self, path: str = None):
+        # Escrita atômica: o node_exporter (textfile collector) nunca lê arquivo pela metade
+        path = path or self.prometheus_path
+        if not path:
+            return
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        # Endpoint local /metrics no formato texto do Prometheus
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="metrics-http").start()
+        return self._server
+
+    def close(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._events:
+            with self._lock:
+                self._events.close()
+                self._events = None
+
+def _phase(metrics, name, **fields):
+    return metrics.phase(name, **fields) if metrics else nullcontext()
+
+class MetricsReporter(threading.Thread):
+    # Resumo ao vivo no log (e dump do arquivo Prometheus) a cada `interval` segundos
+    def __init__(self, metrics: Metrics, logger, interval: float = 30, settings=None):
+        super().__init__(daemon=True, name="metrics-reporter")
+        self.metrics = metrics
+        self.logger = logger
+        self.interval = interval
+        self.port = int((settings or {}).get("metrics_port") or 0)
+        self._done = threading.Event()
+
+    def run(self):
+        if self.port:
+            try:
+                self.metrics.serve(self.port)
+                self.logger.log(f"📈 Métricas em http://127.0.0.1:{self.port}/metrics")
+            except OSError as e:
+                self.logger.log(f"⚠️ Não foi possível abrir a porta de métricas {self.port}: {e}")
+        while not self._done.wait(self.interval):
+            self._report()
+
+    def _report(self, final=False):
+        self.logger.log(f"📈 {'Métricas finais' if final else 'Métricas'}: {self.metrics.summary()}")
+        try:
+            self.metrics.dump_prometheus()
+        except OSError as e:
+            self.logger.log(f"⚠️ Falha ao gravar métricas: {e}")
+
+    def stop(self):
+        self._done.set()
+        if self.is_alive():
+            self.join()
+        self._report(final=True)
+        self.metrics.close()
+
+# -------------------------
+# Lógica de download e crawling (preservada)
+# -------------------------
+
+def scroll_to_bottom(page, max_wait=5, step_delay=0.8, max_scrolls=1000, logger: GuiLogger=None, on_step=None):
+    if logger: logger.log("🌀 Iniciando scroll completo da página...")
+    last_height = page.evaluate("() => document.body.scrollHeight")
+    stable_time = 0
+    scroll_count = 0
+    while scroll_count < max_scrolls:
+        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        time.sleep(step_delay)
+        if on_step: on_step()
+        new_height = page.evaluate("() => document.body.scrollHeight")
+        if new_height == last_height:
+            stable_time += step_delay
+            if stable_time >= max_wait:
+                if logger: logger.log(f"✅ Scroll finalizado após {scroll_count} roladas.")
+                break
+        else:
+            stable_time = 0
+            last_height = new_height
+        scroll_count += 1
+    time.sleep(1)
+
+# Seletores originais
+SUBFOLDER_SELECTOR = "a.text-dark.fw-medium[href^='/pasta/']"
+FILE_SELECTOR = "a[href^='/arquivo/'], a[href^='/pdf/'], a[href$='.html']"
+ITEM_SELECTOR = f"{SUBFOLDER_SELECTOR}, {FILE_SELECTOR}"
+
+# Parâmetros de query que indicam a paginação da listagem (XHR do scroll infinito). Sozinhos não
+# bastam: o XHR também precisa ir ao caminho da própria pasta ou responder com links de itens.
+LISTING_PAGE_PARAMS = ("page", "pagina", "p", "pg")
+_LISTING_ITEM_RE = re.compile(r"""href=\\?["'](?:/pasta/|/arquivo/|/pdf/)""")
+
+_SCROLL_OBSERVER_JS = """(sel) => {
+    if (window.__ddpScroll) return window.__ddpScroll.count;
+    const st = window.__ddpScroll = {
+        count: document.querySelectorAll(sel).length, last: performance.now(), scrolledAt: 0
+    };
+    new MutationObserver((records) => {
+        let added = 0;
+        for (const r of records) for (const n of r.addedNodes) {
+            if (n.nodeType !== 1) continue;
+            added += (n.matches(sel) ? 1 : 0) + n.querySelectorAll(sel).length;
+        }
+        if (added) { st.count += added; st.last = performance.now(); }
+    }).observe(document.body, {childList: true, subtree: true});
+    return st.count;
+}"""
+
+_SCROLL_STEP_JS = """() => {
+    window.__ddpScroll.scrolledAt = performance.now();
+    window.scrollTo(0, document.body.scrollHeight);
+}"""
+
+_SCROLL_SETTLED_JS = """([n, quiet]) => {
+    const st = window.__ddpScroll;
+    return st.count > n || performance.now() - Math.max(st.last, st.scrolledAt) >= quiet;
+}"""
+
+# Busca direto as próximas páginas da listagem e anexa os fragmentos num container oculto,
+# como o próprio scroll infinito faria. Para quando uma página não traz itens novos.
+_FETCH_LISTING_JS = """async ({url, param, start, sel, maxPages}) => {
+    let box = document.getElementById('__ddp_extra');
+    if (!box) {
+        box = document.createElement('div');
+        box.id = '__ddp_extra';
+        box.hidden = true;
+        document.body.appendChild(box);
+    }
+    const seen = new Set([...document.querySelectorAll(sel)].map(a => a.getAttribute('href')));
+    let pages = 0;
+    for (let n = start; pages < maxPages; n++, pages++) {
+        const u = new URL(url, location.href);
+        u.searchParams.set(param, String(n));
+        const resp = await fetch(u, {credentials: 'same-origin', headers: {'X-Requested-With': 'XMLHttpRequest'}});
+        if (!resp.ok) break;
+        let html = await resp.text();
+        if ((resp.headers.get('content-type') || '').includes('json')) {
+            const parts = [];
+            const walk = (v) => {
+                if (typeof v === 'string') { if (v.includes('<a')) parts.push(v); }
+                else if (v && typeof v === 'object') Object.values(v).forEach(walk);
+            };
+            try { walk(JSON.parse(html)); } catch (e) { break; }
+            html = parts.join('');
+        }
+        const tpl = document.createElement('template');
+        tpl.innerHTML = html;
+        const fresh = [...tpl.content.querySelectorAll(sel)].filter(a => !seen.has(a.getAttribute('href')));
+        if (!fresh.length) break;
+        fresh.forEach(a => seen.add(a.getAttribute('href')));
+        box.appendChild(tpl.content);
+    }
+    return pages;
+}"""
+
+def _listing_page_param(url, folder_url):
+    # ("page", 3, mesmo_caminho) se a URL, na mesma origem da pasta, traz um número de página; senão None
+    parts, folder = urlparse(url), urlparse(folder_url)
+    if parts.netloc != folder.netloc:
+        return None
+    for key, value in parse_qsl(parts.query):
+        if key.lower() in LISTING_PAGE_PARAMS and value.isdigit():
+            return key, int(value), parts.path.rstrip("/") == folder.path.rstrip("/")
+    return None
+
+def _looks_like_listing(body: str) -> bool:
+    # Formato de uma página da listagem: fragmento HTML (ou JSON com HTML) com links de pasta/arquivo
+    return bool(body) and _LISTING_ITEM_RE.search(body.replace("\\/", "/")) is not None
+
+def _listing_request_hook(folder_url, inflight, endpoint, pending):
+    # XHR com número de página no caminho da pasta vira o endpoint na hora; nos demais caminhos fica
+    # pendente até a resposta ser conferida (o "p" de um XHR qualquer não basta)
+    def on_request(req):
+        if req.resource_type in ("xhr", "fetch"):
+            inflight.add(req)
+            hit = None if endpoint else _listing_page_param(req.url, folder_url)
+            if hit and hit[2]:
+                endpoint.append((req.url, hit[0], hit[1]))
+            elif hit:
+                pending.append((req, hit[0], hit[1]))
+    return on_request
+
+def _confirm_listing_endpoint(pending, endpoint):
+    while pending and not endpoint:
+        req, param, number = pending.pop(0)
+        try:
+            resp = req.response()
+            if resp and resp.ok and _looks_like_listing(resp.text()):
+                endpoint.append((req.url, param, number))
+        except Exception:
+            continue
+
+def scroll_until_idle(page, quiet_ms=1000, max_wait=5, max_scrolls=1000, use_listing_endpoint=True,
+                      max_listing_pages=500, logger: GuiLogger=None, on_step=None):
+    # Modo por eventos: MutationObserver conta itens novos e os XHR em voo são acompanhados;
+    # para assim que uma rolada não traz item novo e a página fica quieta por quiet_ms.
+    if logger: logger.log("🌀 Iniciando scroll por eventos...")
+    inflight = set()
+    endpoint = []
+    pending = []
+    on_request = _listing_request_hook(page.url, inflight, endpoint, pending)
+
+    def on_done(req):
+        inflight.discard(req)
+
+    page.on("request", on_request)
+    page.on("requestfinished", on_done)
+    page.on("requestfailed", on_done)
+    try:
+        items = page.evaluate(_SCROLL_OBSERVER_JS, ITEM_SELECTOR)
+        scroll_count = 0
+        while scroll_count < max_scrolls:
+            page.evaluate(_SCROLL_STEP_JS)
+            scroll_count += 1
+            deadline = time.monotonic() + max_wait
+            while True:
+                try:
+                    page.wait_for_function(_SCROLL_SETTLED_JS, arg=[items, quiet_ms], polling=100,
+                                           timeout=max(1, (deadline - time.monotonic()) * 1000))
+                except Exception:
+                    break
+                if not inflight or time.monotonic() >= deadline:
+                    break
+                page.wait_for_timeout(100)
+            new_items = page.evaluate("() => window.__ddpScroll.count")
+            if on_step and new_items > items: on_step()
+
+            if use_listing_endpoint:
+                _confirm_listing_endpoint(pending, endpoint)
+            if endpoint and use_listing_endpoint:
+                url, param, number = endpoint[0]
+                pages = page.evaluate(_FETCH_LISTING_JS, {
+                    "url": url, "param": param, "start": number + 1,
+                    "sel": ITEM_SELECTOR, "maxPages": max_listing_pages
+                })
+                if logger: logger.log(f"⚡ Listagem paginada lida direto do endpoint ({pages} página(s) extra).")
+                break
+            if new_items <= items and not inflight:
+                if logger: logger.log(f"✅ Scroll finalizado após {scroll_count} roladas.")
+                break
+            items = new_items
+    finally:
+        page.remove_listener("request", on_request)
+        page.remove_listener("requestfinished", on_done)
+        page.remove_listener("requestfailed", on_done)
+
+# Uma única ida ao navegador: (href, nome visível) de todas as subpastas e arquivos.
+# Com onlyNew, devolve só as âncoras ainda não vistas e as marca (extração incremental durante o scroll).
+_EXTRACT_LINKS_JS = """([subSel, fileSel, onlyNew]) => {
+    const grab = (sel) => [...document.querySelectorAll(sel)].filter((a) => {
+        if (!onlyNew) return true;
+        if (a.dataset.ddpSeen) return false;
+        a.dataset.ddpSeen = '1';
+        return true;
+    }).map((a) => {
+        const last = a.childNodes[a.childNodes.length - 1];
+        return [a.getAttribute('href'), last ? last.textContent.trim() : null];
+    }).filter(([href]) => href);
+    return [grab(subSel), grab(fileSel)];
+}"""
+
+def extract_links(page, only_new: bool = False):
+    subs, files = page.evaluate(_EXTRACT_LINKS_JS, [SUBFOLDER_SELECTOR, FILE_SELECTOR, only_new])
+    return _links_from_raw(subs, files, _page_base(page))
+
+def _links_from_raw(subs, files, base: str = SITE_ROOT):
+    subfolders = [(normalize(href, base), name if name is not None else "subfolder") for href, name in subs]
+    file_links = [(normalize(href, base), name if name is not None else "file") for href, name in files]
+    return subfolders, file_links
+
+def _extract_links_locators(page):
+    # Caminho antigo (2 round trips por link); mantido para o benchmark de extração
+    base = _page_base(page)
+    subfolders = []
+    for a in page.locator(SUBFOLDER_SELECTOR).all():
+        href = a.get_attribute("href")
+        if not href:
+            continue
+        try:
+            visible_name = a.evaluate("el => el.childNodes[el.childNodes.length-1].textContent.trim()")
+        except Exception:
+            visible_name = "subfolder"
+        subfolders.append((normalize(href, base), visible_name))
+    file_links = []
+    for a in page.locator(FILE_SELECTOR).all():
+        href = a.get_attribute("href")
+        if not href:
+            continue
+        try:
+            visible_name = a.evaluate("el => el.childNodes[el.childNodes.length-1].textContent.trim()")
+        except Exception:
+            visible_name = "file"
+        file_links.append((normalize(href, base), visible_name))
+    return subfolders, file_links
+
+def scroll_options(settings) -> dict:
+    # Argumentos do scroll do modo escolhido (scroll_until_idle ou scroll_to_bottom) derivados das
+    # configurações; o que não foi configurado fica no padrão da função
+    max_wait = settings.get("scroll_max_wait")
+    if settings.get("scroll_mode", "poll") == "events":
+        options = {"max_wait": max_wait, "quiet_ms": settings.get("scroll_quiet_ms"),
+                   "use_listing_endpoint": settings.get("listing_endpoint"),
+                   "max_listing_pages": settings.get("max_listing_pages")}
+    else:
+        options = {"max_wait": max_wait, "step_delay": settings.get("step_delay")}
+    return {key: value for key, value in options.items() if value is not None}
+
+def process_folder(page, folder_url, logger: GuiLogger=None, scroll_mode: str = "poll", on_links=None,
+                   metrics: Metrics = None, scroll_args: dict = None):
+    # on_links(subpastas, arquivos) recebe os links à medida que o scroll os revela;
+    # scroll_args vem de scroll_options(settings)
+    if logger: logger.log(f"📂 Acessando pasta: {folder_url}")
+    try:
+        with _phase(metrics, "folder_navigate"):
+            page.goto(folder_url, wait_until="domcontentloaded", timeout=90000)
+    except Exception as e:
+        if logger: logger.log(f"⚠️ Erro ao acessar {folder_url}: {e}")
+        if metrics: metrics.failure("folder_navigate", url=folder_url)
+        return [], []
+
+    emit = None
+    if on_links:
+        def emit():
+            new_subfolders, new_files = extract_links(page, only_new=True)
+            if new_subfolders or new_files:
+                on_links(new_subfolders, new_files)
+
+    try:
+        with _phase(metrics, "folder_scroll", mode=scroll_mode):
+            if emit: emit()
+            if scroll_mode == "events":
+                scroll_until_idle(page, logger=logger, on_step=emit, **(scroll_args or {}))
+            else:
+                time.sleep(1)
+                # Scroll usando função original
+                scroll_to_bottom(page, logger=logger, on_step=emit, **(scroll_args or {}))
+    except Exception as e:
+        if logger: logger.log(f"⚠️ Erro no scroll: {e}")
+        if metrics: metrics.failure("folder_scroll", url=folder_url)
+
+    with _phase(metrics, "folder_extract"):
+        if emit: emit()
+        subfolders, file_links = extract_links(page)
+    if metrics:
+        metrics.incr("folders")
+        metrics.incr("links", len(subfolders) + len(file_links))
+
+    if logger: logger.log(f"📑 Links encontrados: {len(file_links)} arquivos, {len(subfolders)} pastas.")
+    return subfolders, file_links
+
+# -------------------------
+# Transferência HTTP direta (o navegador só resolve URL e cookies)
+# -------------------------
+
+class HttpStatusError(Exception):
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status} em {url}")
+        self.status = status
+        self.url = url
+
+class HttpPool:
+    # Conexões keep-alive reaproveitadas entre workers, por (esquema, host)
+    def __init__(self, max_idle_per_host: int = 8, timeout: float = 60):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle = {}
+
+    def _new_conn(self, key):
+        scheme, host = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, timeout=self.timeout)
+
+    def _checkout(self, key):
+        with self._lock:
+            conns = self._idle.get(key)
+            if conns:
+                return conns.pop(), True
+        return self._new_conn(key), False
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.max_idle_per_host:
+                conns.append(conn)
+                return
+        conn.close()
+
+    def _send(self, key, target, headers):
+        conn, reused = self._checkout(key)
+        try:
+            conn.request("GET", target, headers=headers)
+            return conn, conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            if not reused:
+                raise
+        # conexão ociosa fechada pelo servidor: tenta de novo com uma nova
+        conn = self._new_conn(key)
+        try:
+            conn.request("GET", target, headers=headers)
+            return conn, conn.getresponse()
+        except BaseException:
+            conn.close()
+            raise
+
+    @contextmanager
+    def open(self, url: str, headers: dict = None, max_redirects: int = 5):
+        headers = dict(headers or {})
+        for _ in range(max_redirects + 1):
+            parts = urlparse(url)
+            key = (parts.scheme, parts.netloc)
+            target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            conn, resp = self._send(key, target, headers)
+            location = resp.getheader("Location")
+            if resp.status in (301, 302, 303, 307, 308) and location:
+                resp.read()
+                self._checkin(key, conn)
+                new_url = urljoin(url, location)
+                if urlparse(new_url).netloc != parts.netloc:
+                    headers.pop("Cookie", None)  # não vaza cookies para outro host
+                url = new_url
+                continue
+            resp.url = url
+            try:
+                yield resp
+            except BaseException:
+                conn.close()
+                raise
+            if resp.isclosed():
+                self._checkin(key, conn)
+            else:
+                conn.close()
+            return
+        raise Exception(f"Redirecionamentos demais para {url}")
+
+    def close(self):
+        with self._lock:
+            conns = [c for cs in self._idle.values() for c in cs]
+            self._idle.clear()
+        for c in conns:
+            c.close()
+
+def cookie_header(context, url: str) -> str:
+    return format_cookies(context.cookies(url))
+
+def format_cookies(cookies) -> str:
+    return "; ".join(f"{c['name']}={c['value']}" for c in cookies)
+
+PART_SUFFIX = ".part"
+SEGMENTS_SUFFIX = ".part.json"
+
+class IntegrityError(Exception):
+    pass
+
+class RangeChanged(IntegrityError):
+    # If-Range não conferiu: o servidor mandou o arquivo inteiro, que mudou desde o parcial
+    pass
+
+def _validator(resp):
+    # ETag forte ou Last-Modified: o que o If-Range aceita para provar que o parcial é do mesmo arquivo
+    etag = resp.getheader("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return resp.getheader("Last-Modified")
+
+def _total_size(resp):
+    # Tamanho total do recurso: Content-Range (206) ou Content-Length (200)
+    content_range = resp.getheader("Content-Range") or ""
+    if "/" in content_range:
+        total = content_range.rsplit("/", 1)[1].strip()
+        if total.isdigit():
+            return int(total)
+    length = resp.getheader("Content-Length") or ""
+    return int(length) if length.isdigit() else None
+
+def _expected_digest(resp):
+    # Digest/Repr-Digest (sha-256, sha-512, md5) ou Content-MD5 -> (algoritmo, bytes esperados)
+    for header in ("Repr-Digest", "Digest"):
+        value = resp.getheader(header)
+        if not value:
+            continue
+        for item in value.split(","):
+            algo, _, encoded = item.strip().partition("=")
+            algo = algo.strip().lower().replace("-", "")
+            if algo in ("sha256", "sha512", "md5"):
+                try:
+                    return algo, base64.b64decode(encoded.strip().strip(":"))
+                except ValueError:
+                    pass
+    content_md5 = resp.getheader("Content-MD5")
+    if content_md5 and resp.status == 200:
+        try:
+            return "md5", base64.b64decode(content_md5.strip())
+        except ValueError:
+            pass
+    return None
+
+# -------------------------
+# Estágio de escrita: orçamento de bytes em trânsito, pré-alocação, fsync e rename atômico
+# -------------------------
+
+TEMP_DIR_NAME = ".drivedepobre_tmp"
+FSYNC_POLICIES = ("none", "file", "dir")
+FALLOC_FL_KEEP_SIZE = 0x01
+
+def with_download_dir(settings, out_dir):
+    # Temporários do navegador dentro do destino (mesmo sistema de arquivos): o arquivo pronto é
+    # renomeado para o lugar em vez de copiado pelo save_as
+    settings = dict(settings)
+    settings["downloads_path"] = settings.get("temp_dir") or os.path.join(out_dir, TEMP_DIR_NAME)
+    return settings
+
+def preallocate(fd, size):
+    # Reserva os blocos sem mudar o tamanho aparente (FALLOC_FL_KEEP_SIZE): a retomada segue usando o
+    # tamanho do .part como progresso. Fora do Linux ou em FS sem fallocate, não faz nada.
+    if not size:
+        return
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.fallocate.argtypes = (ctypes.c_int, ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong)
+        libc.fallocate(fd, FALLOC_FL_KEEP_SIZE, 0, size)
+    except (OSError, AttributeError, TypeError):
+        pass
+
+def _pwrite(fd, data, offset):
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # Windows não abre diretórios
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def commit_file(src, dst, fsync="file", sync_file=False):
+    # rename atômico para o nome final; "file" garante os dados antes do rename, "dir" também a entrada
+    if sync_file and fsync != "none":
+        with open(src, "rb") as f:
+            os.fsync(f.fileno())
+    os.replace(src, dst)
+    if fsync == "dir":
+        _fsync_dir(os.path.dirname(dst) or ".")
+
+def _same_filesystem(path, directory) -> bool:
+    try:
+        return os.stat(path).st_dev == os.stat(directory).st_dev
+    except OSError:
+        return False
+
+class WriteHandle:
+    # Um arquivo aberto no DiskWriter: write() só enfileira; close() espera os blocos pendentes,
+    # aplica o fsync e propaga o primeiro erro de escrita.
+    # No máximo um bloco por arquivo fica com as threads de escrita, na ordem de write(): um processo
+    # morto no meio deixa no disco só um prefixo contínuo, que é o que a retomada (tamanho do .part e
+    # contadores do .part.json) supõe. Arquivos diferentes (e faixas de um download segmentado) seguem
+    # em paralelo.
+    def __init__(self, writer, path, size=None, truncate=False):
+        flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0) | (os.O_TRUNC if truncate else 0)
+        self.writer = writer
+        self.path = path
+        self.fd = os.open(path, flags, 0o644)
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._waiting = deque()
+        self._error = None
+        if writer.preallocate:
+            preallocate(self.fd, size)
+
+    def write(self, offset, data, on_done=None):
+        if self._error:
+            raise self._error
+        self.writer._acquire(len(data))
+        with self._cond:
+            self._pending += 1
+            if self._pending > 1:
+                # o bloco anterior ainda está sendo gravado: este sai quando ele terminar
+                self._waiting.append((offset, data, on_done))
+                return
+        self.writer._pool.submit(self._write, offset, data, on_done)
+
+    def _write(self, offset, data, on_done):
+        try:
+            if self._error is None:
+                if self.writer.positional:
+                    _pwrite(self.fd, data, offset)
+                else:
+                    os.lseek(self.fd, offset, os.SEEK_SET)
+                    os.write(self.fd, data)
+                if on_done:
+                    on_done(len(data))
+        except BaseException as e:
+            self._error = e
+        finally:
+            self.writer._release(len(data))
+            with self._cond:
+                self._pending -= 1
+                following = self._waiting.popleft() if self._waiting else None
+                self._cond.notify_all()
+            if following:
+                self.writer._pool.submit(self._write, *following)
+
+    def close(self, sync=True):
+        with self._cond:
+            while self._pending:
+                self._cond.wait()
+        try:
+            if sync and self._error is None and self.writer.fsync != "none":
+                os.fsync(self.fd)
+        finally:
+            os.close(self.fd)
+        if self._error:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # com erro no corpo só espera e fecha; o erro original é o que importa
+        try:
+            self.close(sync=exc_type is None)
+        except Exception:
+            if exc_type is None:
+                raise
+
+class DiskWriter:
+    # Quem lê da rede entrega (offset, bloco) e segue lendo; `threads` threads gravam no disco.
+    # No máximo `max_inflight` bytes esperam o disco ao mesmo tempo: acima disso a leitura espera
+    # (backpressure), então a memória fica limitada mesmo com destino lento (NAS).
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_inflight: int = 64 * 1024 * 1024, threads: int = 2, fsync: str = "file",
+                 preallocate: bool = True):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync inválido: {fsync} (use {', '.join(FSYNC_POLICIES)})")
+        self.max_inflight = max(1, int(max_inflight))
+        self.fsync = fsync
+        self.preallocate = preallocate
+        self.positional = hasattr(os, "pwrite")
+        self._inflight = 0
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="disk-writer")
+
+    @classmethod
+    def from_settings(cls, settings):
+        # Um estágio por processo e configuração: o orçamento vale para todos os downloads juntos
+        key = (int(settings.get("write_budget_mb", 64)), int(settings.get("write_threads", 2)),
+               settings.get("fsync", "file"), bool(settings.get("preallocate", True)))
+        with cls._shared_lock:
+            writer = cls._shared.get(key)
+            if writer is None:
+                writer = cls._shared[key] = cls(key[0] * 1024 * 1024, key[1], key[2], key[3])
+            return writer
+
+    def _acquire(self, n):
+        with self._cond:
+            # um bloco maior que o orçamento inteiro passa sozinho
+            while self._inflight and self._inflight + n > self.max_inflight:
+                self._cond.wait()
+            self._inflight += n
+
+    def _release(self, n):
+        with self._cond:
+            self._inflight -= n
+            self._cond.notify_all()
+
+    def open(self, path, size=None, truncate=False) -> WriteHandle:
+        return WriteHandle(self, path, size, truncate)
+
+def save_download(download, save_path, fsync="file"):
+    # Navegador com downloads_path no destino: o temporário já está no mesmo sistema de arquivos e vira
+    # o arquivo final por rename. Em outro disco, save_as copia para .part e o rename fecha a troca.
+    tmp = download.path()
+    if tmp and _same_filesystem(tmp, os.path.dirname(save_path)):
+        commit_file(tmp, save_path, fsync, sync_file=True)
+        return
+    part_path = save_path + PART_SUFFIX
+    download.save_as(part_path)
+    commit_file(part_path, save_path, fsync, sync_file=True)
+
+async def async_save_download(download, save_path, fsync="file"):
+    tmp = await download.path()
+    if tmp and _same_filesystem(tmp, os.path.dirname(save_path)):
+        await asyncio.to_thread(commit_file, tmp, save_path, fsync, True)
+        return
+    part_path = save_path + PART_SUFFIX
+    await download.save_as(part_path)
+    await asyncio.to_thread(commit_file, part_path, save_path, fsync, True)
+
+def _copy_stream(resp, out: WriteHandle, offset, chunk_size, on_chunk=None):
+    # on_chunk só é chamado depois que o bloco chegou ao disco, na ordem do stream (WriteHandle grava
+    # um bloco por vez): o progresso salvo nunca passa do prefixo contínuo já gravado
+    while True:
+        chunk = resp.read(chunk_size)
+        if not chunk:
+            break
+        out.write(offset, chunk, on_chunk)
+        offset += len(chunk)
+
+def _load_segments(part_path):
+    try:
+        with open(part_path[:-len(PART_SUFFIX)] + SEGMENTS_SUFFIX, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _save_segments(part_path, state):
+    seg_path = part_path[:-len(PART_SUFFIX)] + SEGMENTS_SUFFIX
+    with open(seg_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(seg_path + ".tmp", seg_path)
+
+def _discard_partial(part_path):
+    for path in (part_path, part_path[:-len(PART_SUFFIX)] + SEGMENTS_SUFFIX):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _stream_whole(resp, writer, part_path, total, chunk_size, validator=None):
+    # Resposta 200 inteira para o .part; com validador, o .part.json permite retomar se cair no meio
+    if validator and total is not None:
+        _save_segments(part_path, {"total": total, "validator": validator})
+    with writer.open(part_path, total, truncate=True) as out:
+        _copy_stream(resp, out, 0, chunk_size)
+
+def _fetch_range(http_pool, writer, url, headers, part_path, start, end, chunk_size, on_chunk=None, total=None,
+                 validator=None):
+    range_headers = dict(headers)
+    range_headers["Range"] = f"bytes={start}-{end}"
+    if validator:
+        range_headers["If-Range"] = validator
+    with http_pool.open(url, headers=range_headers) as resp:
+        if resp.status == 200 and validator:
+            raise RangeChanged("Arquivo mudou no servidor desde o download parcial.")
+        if resp.status != 206:
+            raise HttpStatusError(resp.status, resp.url)
+        content_range = resp.getheader("Content-Range") or ""
+        if not content_range.startswith(f"bytes {start}-"):
+            raise IntegrityError(f"Content-Range inesperado: {content_range!r}")
+        with writer.open(part_path, total) as out:
+            _copy_stream(resp, out, start, chunk_size, on_chunk)
+
+def _segmented_fetch(http_pool, writer, url, headers, part_path, total, segments, chunk_size, state=None,
+                     validator=None):
+    # Baixa um arquivo grande em N faixas paralelas; o progresso de cada faixa fica no .part.json
+    if not state or state.get("total") != total:
+        step = -(-total // segments)
+        state = {"total": total, "validator": validator,
+                 "segments": [[a, min(a + step, total) - 1, 0] for a in range(0, total, step)]}
+        with writer.open(part_path, total, truncate=True) as out:
+            os.ftruncate(out.fd, total)
+        _save_segments(part_path, state)
+    lock = threading.Lock()
+    last_save = [time.monotonic()]
+
+    def run_segment(seg):
+        def progress(n):
+            with lock:
+                seg[2] += n
+                if time.monotonic() - last_save[0] >= 1:
+                    _save_segments(part_path, state)
+                    last_save[0] = time.monotonic()
+        start, end, done = seg
+        if start + done <= end:
+            _fetch_range(http_pool, writer, url, headers, part_path, start + done, end, chunk_size, progress, total,
+                         state.get("validator"))
+
+    with ThreadPoolExecutor(max_workers=len(state["segments"])) as pool:
+        futures = [pool.submit(run_segment, seg) for seg in state["segments"]]
+    with lock:
+        _save_segments(part_path, state)
+    for fut in futures:
+        fut.result()
+
+def _verify(part_path, total, digest, verify_hash):
+    size = os.path.getsize(part_path)
+    if total is not None and size != total:
+        raise IntegrityError(f"Tamanho {size} diferente do esperado ({total} bytes).")
+    if digest and verify_hash:
+        algo, expected = digest
+        h = hashlib.new(algo)
+        with open(part_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        if h.digest() != expected:
+            _discard_partial(part_path)
+            raise IntegrityError(f"Hash {algo} não confere; parcial descartado.")
+
+def http_download(http_pool: HttpPool, url: str, local_path: str, visible_name: str,
+                  suggested: str = None, headers: dict = None, chunk_size: int = 1024 * 1024,
+                  segments: int = 1, segment_min_size: int = 64 * 1024 * 1024, verify_hash: bool = True,
+                  logger: GuiLogger = None, writer: DiskWriter = None) -> str:
+    # Stream direto para <destino>.part, retomando via Range o que já existir de tentativas anteriores.
+    # O .part.json guarda tamanho e validador (ETag/Last-Modified) do arquivo: parcial sem validador ou de
+    # outra versão é descartado, e a retomada manda If-Range (resposta 200 = mudou, recomeça do zero).
+    # Só renomeia para o nome final depois de conferir tamanho (e hash, se o servidor informar).
+    writer = writer or DiskWriter.from_settings({})
+    headers = dict(headers or {})
+    save_path = None
+    try:
+        with http_pool.open(url, headers=headers) as resp:
+            if resp.status != 200:
+                resp.read()
+                raise HttpStatusError(resp.status, resp.url)
+            content_type = (resp.getheader("Content-Type") or "").lower()
+            if content_type.startswith("text/html"):
+                resp.read()
+                raise Exception(f"Servidor devolveu HTML em vez do arquivo: {resp.url}")
+            suggested = resp.headers.get_filename() or suggested or os.path.basename(urlparse(resp.url).path)
+            save_path = unique_save_path(local_path, target_name(visible_name, suggested))
+            part_path = save_path + PART_SUFFIX
+            final_url = resp.url
+            total = _total_size(resp)
+            digest = _expected_digest(resp)
+            validator = _validator(resp)
+            ranges_ok = total is not None and (resp.getheader("Accept-Ranges") or "").lower() == "bytes"
+            state = _load_segments(part_path) if ranges_ok else None
+            have = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            if (have or state) and not (validator and state and state.get("validator") == validator
+                                        and state.get("total") == total and have <= total):
+                # parcial de outra versão do arquivo (ou sem como conferir): emendar corromperia o resultado
+                if have and logger:
+                    logger.log(f"🗑️ {os.path.basename(save_path)}: parcial não confere com o servidor; recomeçando.")
+                _discard_partial(part_path)
+                have, state = 0, None
+            use_segments = ranges_ok and ((state or {}).get("segments") is not None or (
+                have == 0 and segments > 1 and total >= segment_min_size))
+            streamed = False
+            if not ranges_ok or (have == 0 and not use_segments):
+                # Sem parcial utilizável: aproveita esta mesma resposta
+                _stream_whole(resp, writer, part_path, total, chunk_size, validator if ranges_ok else None)
+                streamed = True
+            # senão a resposta é descartada (conexão fechada) e os bytes vêm por Range
+
+        if urlparse(final_url).netloc != urlparse(url).netloc:
+            headers.pop("Cookie", None)
+        if not streamed:
+            try:
+                if use_segments:
+                    if logger:
+                        logger.log(f"🧩 {os.path.basename(save_path)}: {total / 1e6:.0f} MB em {segments if state is None else len(state['segments'])} segmentos.")
+                    _segmented_fetch(http_pool, writer, final_url, headers, part_path, total,
+                                     max(1, segments), chunk_size, state, validator)
+                elif have < total:
+                    if logger:
+                        logger.log(f"♻️ Retomando {os.path.basename(save_path)} a partir de {have / 1e6:.1f} MB.")
+                    _fetch_range(http_pool, writer, final_url, headers, part_path, have, total - 1, chunk_size,
+                                 total=total, validator=validator)
+            except RangeChanged:
+                if logger:
+                    logger.log(f"🗑️ {os.path.basename(save_path)} mudou no servidor; baixando do zero.")
+                _discard_partial(part_path)
+                with http_pool.open(final_url, headers=headers) as resp:
+                    if resp.status != 200:
+                        resp.read()
+                        raise HttpStatusError(resp.status, resp.url)
+                    total = _total_size(resp)
+                    digest = _expected_digest(resp)
+                    _stream_whole(resp, writer, part_path, total, chunk_size, _validator(resp))
+
+        _verify(part_path, total, digest, verify_hash)
+        commit_file(part_path, save_path, writer.fsync)
+        _discard_partial(part_path)
+        return save_path
+    except BaseException:
+        # nome reservado e nunca concluído volta ao índice; o .part fica para retomar
+        release_save_path(save_path)
+        raise
+
+def _direct_download_href(page, link_direct):
+    # href de a[download] que possa ser baixado fora do navegador
+    try:
+        if link_direct.count() == 0:
+            return None
+        href = link_direct.first.get_attribute("href")
+    except Exception:
+        return None
+    if not href or href.startswith(("blob:", "data:", "javascript:")):
+        return None
+    return urljoin(page.url, href)
+
+# -------------------------
+# Ritmo adaptativo (substitui as esperas fixas/aleatórias)
+# -------------------------
+
+def classify_failure(exc: Exception):
+    # Falhas que indicam site sobrecarregado/instável; None = erro que não diz nada sobre a saúde do site
+    if isinstance(exc, HttpStatusError):
+        if exc.status == 429:
+            return "http_429"
+        return "http_5xx" if exc.status >= 500 else None
+    if isinstance(exc, (PlaywrightTimeoutError, TimeoutError)) or "Timeout" in str(exc):
+        # timeout da corrida clique -> download vs. navegação/espera da página
+        return "download_timeout" if "aguardando o download" in str(exc) else "nav_timeout"
+    if "Erro no download" in str(exc):
+        return "banner"
+    if "não encontrado" in str(exc):
+        return "missing_button"
+    return None
+
+# Falhas que pedem ritmo menor; botão ausente é problema da página, não sinal de congestionamento
+CONGESTION_FAILURES = frozenset({"banner", "nav_timeout", "download_timeout", "http_429", "http_5xx"})
+
+# Estado por host dividido entre processos (motor processes): hosts caem num número fixo de baldes,
+# porque semáforos e memória compartilhada precisam existir antes do spawn. Colisão só deixa mais lento.
+HOST_BUCKETS = 16
+
+def _host_bucket(host: str, buckets: int = HOST_BUCKETS) -> int:
+    # hash() muda a cada processo; sha1 dá o mesmo balde em todos
+    return int(hashlib.sha1(host.encode("utf-8")).hexdigest()[:8], 16) % buckets
+
+class _SharedHostState:
+    # Mesmo acesso do dict de estado do AdaptiveThrottle, sobre um trecho de um mp.Array
+    FIELDS = ("used", "interval", "next", "failures")
+
+    def __init__(self, array, offset):
+        self.array = array
+        self.offset = offset
+
+    def __getitem__(self, key):
+        value = self.array[self.offset + self.FIELDS.index(key)]
+        return int(value) if key == "failures" else value
+
+    def __setitem__(self, key, value):
+        self.array[self.offset + self.FIELDS.index(key)] = value
+
+class AdaptiveThrottle:
+    # AIMD por host: cada sucesso encurta o intervalo entre requisições em um passo fixo (ritmo sobe
+    # aos poucos); banner de erro, timeout ou HTTP 429/5xx dobra o intervalo e pausa o host inteiro
+    # com backoff exponencial + jitter, que cresce a cada falha seguida.
+    # Com `shared` (motor processes), o ritmo de cada host vale para todos os processos.
+    def __init__(self, initial_interval: float = 2.0, min_interval: float = 0.25, max_interval: float = 60.0,
+                 step: float = 0.25, backoff_base: float = 2.0, backoff_max: float = 120.0, stop_event: threading.Event = None,
+                 shared=None):
+        self.initial_interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.step = step
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stop_event = stop_event
+        self.shared = shared
+        self._lock = shared.get_lock() if shared is not None else threading.Lock()
+        self._hosts = {}
+
+    @classmethod
+    def from_settings(cls, settings, stop_event: threading.Event = None, shared=None):
+        if settings.get("throttle", "fixed") != "adaptive":
+            return None
+        return cls(
+            initial_interval=float(settings.get("throttle_initial_interval", 2.0)),
+            min_interval=float(settings.get("throttle_min_interval", 0.25)),
+            max_interval=float(settings.get("throttle_max_interval", 60.0)),
+            stop_event=stop_event,
+            shared=shared,
+        )
+
+    @staticmethod
+    def shared_state(mp_context):
+        # por balde de host: [em uso, intervalo, próxima vez (time.monotonic), falhas seguidas]
+        return mp_context.Array("d", len(_SharedHostState.FIELDS) * HOST_BUCKETS)
+
+    def _state(self, url):
+        host = urlparse(url).netloc
+        if self.shared is not None:
+            st = _SharedHostState(self.shared, _host_bucket(host) * len(_SharedHostState.FIELDS))
+            if not st["used"]:
+                st["used"] = 1
+                st["interval"] = self.initial_interval
+            return st
+        st = self._hosts.get(host)
+        if st is None:
+            st = self._hosts[host] = {
+                "interval": self.initial_interval, "next": 0.0, "failures": 0
+            }
+        return st
+
+    def reserve(self, url) -> float:
+        # Reserva a próxima vez do host e devolve quantos segundos esperar (não bloqueia)
+        with self._lock:
+            st = self._state(url)
+            now = time.monotonic()
+            slot = max(now, st["next"])
+            st["next"] = slot + st["interval"]
+        return slot - time.monotonic()
+
+    def wait(self, url):
+        remaining = self.reserve(url)
+        if remaining > 0:
+            if self.stop_event is not None:
+                self.stop_event.wait(remaining)
+            else:
+                time.sleep(remaining)
+
+    def success(self, url):
+        with self._lock:
+            st = self._state(url)
+            st["interval"] = max(self.min_interval, st["interval"] - self.step)
+            st["failures"] = 0
+
+    def failure(self, url, kind) -> float:
+        # Devolve a pausa aplicada ao host (0 se a falha não indica congestionamento)
+        if kind not in CONGESTION_FAILURES:
+            return 0.0
+        with self._lock:
+            st = self._state(url)
+            st["interval"] = min(self.max_interval, st["interval"] * 2)
+            st["failures"] += 1
+            pause = min(self.backoff_max, self.backoff_base * 2 ** (st["failures"] - 1)) * random.uniform(0.5, 1.5)
+            st["next"] = max(st["next"], time.monotonic() + pause)
+        return pause
+
+    def retry_delay(self, attempt: int) -> float:
+        return min(self.backoff_max, self.backoff_base * 2 ** max(0, attempt - 1)) * random.uniform(0.5, 1.5)
+
+    def describe(self, url) -> str:
+        with self._lock:
+            st = self._state(url)
+            return f"intervalo {st['interval']:.2f}s, falhas seguidas {st['failures']}"
+
+# -------------------------
+# Novas tentativas por classe de falha + disjuntor do site
+# -------------------------
+
+# Por classe de falha (classify_failure): (máx. de tentativas ou None = max_attempts, espera base em s).
+# A espera cresce em dobro a cada tentativa, com jitter.
+RETRY_POLICY = {
+    "banner": (None, 10.0),
+    "missing_button": (2, 5.0),  # página sem botão quase nunca se resolve sozinha
+    "nav_timeout": (None, 15.0),
+    "download_timeout": (None, 20.0),
+    "http_429": (None, 30.0),
+    "http_5xx": (None, 15.0),
+    None: (None, 5.0),
+}
+RETRY_MAX_DELAY = 300.0
+# Devolvido por download_file quando a nova tentativa foi agendada em vez de feita na hora
+RETRY_LATER = object()
+
+def retry_limit(kind, max_attempts: int) -> int:
+    limit = RETRY_POLICY.get(kind, RETRY_POLICY[None])[0]
+    return min(max_attempts, limit) if limit else max_attempts
+
+def retry_delay(kind, attempt: int, pause: float = 0.0) -> float:
+    # attempt: tentativa que acabou de falhar; a pausa do host (throttle) é o piso
+    base = RETRY_POLICY.get(kind, RETRY_POLICY[None])[1]
+    delay = min(RETRY_MAX_DELAY, base * 2 ** max(0, attempt - 1)) * random.uniform(0.5, 1.5)
+    return max(delay, pause)
+
+class RetryScheduler:
+    # Fila de novas tentativas com prazo (heap por horário): o arquivo que falhou sai do worker, que
+    # segue para o próximo; vencido o prazo, o job (com o número da tentativa) volta via `submit`.
+    def __init__(self, submit, stop_event: threading.Event = None):
+        self.submit = submit
+        self.stop_event = stop_event
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seq = 0
+        # já fora do heap, entrando na fila: quem drena não vê o job "sumir" no meio do caminho
+        self._submitting = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name="retry-scheduler")
+        self._thread.start()
+
+    @classmethod
+    def from_settings(cls, settings, submit, stop_event: threading.Event = None):
+        if not settings.get("retry_queue", True):
+            return None
+        return cls(submit, stop_event)
+
+    def retry_later(self, job, attempt: int, kind, pause: float = 0.0) -> float:
+        delay = retry_delay(kind, attempt - 1, pause)
+        self.schedule(job[:3] + (attempt,), delay)
+        return delay
+
+    def schedule(self, job, delay: float):
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (time.monotonic() + delay, self._seq, job))
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap) + self._submitting
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self.stop_event is not None and self.stop_event.is_set():
+                        return
+                    now = time.monotonic()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    timeout = self._heap[0][0] - now if self._heap else 1.0
+                    self._cond.wait(min(1.0, timeout))
+                if self._closed:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+                self._submitting += 1
+            try:
+                self.submit(job)
+            finally:
+                with self._cond:
+                    self._submitting -= 1
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+class RetryRelay:
+    # No processo filho do motor processes: a nova tentativa é agendada pelo RetryScheduler do pai
+    def __init__(self, events):
+        self.events = events
+
+    def retry_later(self, job, attempt: int, kind, pause: float = 0.0) -> float:
+        delay = retry_delay(kind, attempt - 1, pause)
+        self.events.put(("retry", os.getpid(), job[:3] + (attempt,), delay))
+        return delay
+
+class CircuitBreaker:
+    # Disjuntor do site: se na janela recente (window s, ao menos min_calls resultados) a fração de falhas
+    # de saúde (banner, timeouts, 429/5xx, botão ausente) passa de threshold, abre e pausa todos os
+    # workers por cooldown s, em vez de gastar tentativas durante uma queda. Vencida a pausa, um único
+    # arquivo de teste passa: sucesso fecha o disjuntor, falha reabre com o dobro da pausa.
+    # Com `shared` (motor processes), abertura, teste e fechamento valem para todos os processos.
+    def __init__(self, window: float = 60.0, min_calls: int = 8, threshold: float = 0.5, cooldown: float = 30.0,
+                 max_cooldown: float = 600.0, logger=None, stop_event: threading.Event = None, shared=None):
+        self.window = window
+        self.min_calls = min_calls
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.logger = logger
+        self.stop_event = stop_event
+        self._lock = threading.Lock()
+        self._results = deque()
+        self._state = "closed"
+        self._open_until = 0.0
+        self._probe_since = None
+        self._trips = 0
+        self.shared = shared
+
+    @classmethod
+    def from_settings(cls, settings, logger=None, stop_event: threading.Event = None, shared=None):
+        if not settings.get("circuit_breaker", True):
+            return None
+        return cls(
+            threshold=float(settings.get("breaker_threshold", 0.5)),
+            cooldown=float(settings.get("breaker_cooldown", 30.0)),
+            logger=logger,
+            stop_event=stop_event,
+            shared=shared,
+        )
+
+    @staticmethod
+    def shared_state(mp_context):
+        # [aberto até (time.monotonic, comum a todos os processos da máquina), início do teste, aberturas]
+        return mp_context.Array("d", 3)
+
+    def _sync(self, now):
+        # Adota o que outro processo decidiu: abertura mais nova que a nossa (ou ainda não fechada,
+        # para um processo recém-criado) ou fechamento
+        with self.shared.get_lock():
+            open_until, _, trips = self.shared[:]
+        if trips and (open_until > self._open_until or self._state == "closed"):
+            self._state = "open"
+            self._open_until = open_until
+            self._trips = max(self._trips, int(trips))
+            self._probe_since = None
+            self._results.clear()
+        elif self._state != "closed" and not trips:
+            self._state = "closed"
+            self._trips = 0
+            self._results.clear()
+
+    def _claim_probe(self, now) -> bool:
+        if self.shared is None:
+            return self._probe_since is None or now - self._probe_since > 300
+        with self.shared.get_lock():
+            if not self.shared[1] or now - self.shared[1] > 300:
+                self.shared[1] = now
+                return True
+        return False
+
+    def _release_probe(self):
+        self._probe_since = None
+        if self.shared is not None:
+            with self.shared.get_lock():
+                self.shared[1] = 0.0
+
+    def _log(self, message):
+        if self.logger:
+            self.logger.log(message)
+
+    def _gate(self) -> float:
+        # 0 = pode seguir; senão quantos segundos esperar antes de perguntar de novo
+        with self._lock:
+            now = time.monotonic()
+            if self.shared is not None:
+                self._sync(now)
+            if self._state == "closed":
+                return 0.0
+            if self._state == "open":
+                if now < self._open_until:
+                    return min(1.0, self._open_until - now)
+                self._state = "half"
+                self._probe_since = None
+            # meio-aberto: um arquivo de teste por vez (teste sem resposta em 5 min libera outro)
+            if self._claim_probe(now):
+                self._probe_since = now
+                return 0.0
+            return 1.0
+
+    def wait(self) -> bool:
+        while True:
+            delay = self._gate()
+            if not delay:
+                return True
+            if self.stop_event is not None:
+                if self.stop_event.wait(delay):
+                    return False
+            else:
+                time.sleep(delay)
+
+    async def async_wait(self) -> bool:
+        while True:
+            delay = self._gate()
+            if not delay:
+                return True
+            if self.stop_event is not None and self.stop_event.is_set():
+                return False
+            await asyncio.sleep(delay)
+
+    def success(self):
+        with self._lock:
+            # só o arquivo de teste fecha o disjuntor; downloads que já estavam em andamento e terminam
+            # durante a pausa entram na janela sem encurtá-la
+            if self._state == "half":
+                self._state = "closed"
+                self._trips = 0
+                self._results.clear()
+                self._probe_since = None
+                if self.shared is not None:
+                    with self.shared.get_lock():
+                        self.shared[1] = 0.0
+                        self.shared[2] = 0.0
+                closed = True
+            else:
+                self._record(time.monotonic(), False)
+                closed = False
+        if closed:
+            self._log("🟢 Disjuntor fechado: o site voltou a responder; downloads retomados.")
+
+    def failure(self, kind):
+        now = time.monotonic()
+        with self._lock:
+            if self._state == "half":
+                if kind is None:
+                    # teste inconclusivo: libera outro arquivo de teste
+                    self._release_probe()
+                    return
+                tripped = self._trip(now)
+            else:
+                self._record(now, kind is not None)
+                errors = sum(1 for _, is_error in self._results if is_error)
+                total = len(self._results)
+                tripped = None
+                if self._state == "closed" and total >= self.min_calls and errors / total >= self.threshold:
+                    tripped = self._trip(now)
+        if tripped:
+            self._log(f"🔴 Disjuntor aberto ({kind}): muitas falhas no site; todos os downloads pausados "
+                      f"por {tripped:.0f}s.")
+
+    def _record(self, now, is_error):
+        # só a janela recente fica guardada, com ou sem falhas
+        self._results.append((now, is_error))
+        while self._results and self._results[0][0] < now - self.window:
+            self._results.popleft()
+
+    def _trip(self, now) -> float:
+        pause = min(self.max_cooldown, self.cooldown * 2 ** self._trips)
+        self._trips += 1
+        self._state = "open"
+        self._open_until = now + pause
+        self._probe_since = None
+        self._results.clear()
+        if self.shared is not None:
+            with self.shared.get_lock():
+                self.shared[0] = max(self.shared[0], self._open_until)
+                self.shared[1] = 0.0
+                self.shared[2] = max(self.shared[2], self._trips)
+        return pause
+
+def _raise_for_status(response, url):
+    # page.goto devolve a resposta principal: 429/5xx vira erro classificável
+    if response is not None and (response.status == 429 or response.status >= 500):
+        raise HttpStatusError(response.status, url)
+
+# -------------------------
+# Esperas por condição na página do arquivo
+# -------------------------
+
+DOWNLOAD_BUTTON_TIMEOUT_MS = 30000
+ERROR_BANNER_SELECTOR = 'text="Erro no download."'
+
+def _wait_for_download_control(page, btn_download, link_direct, timeout_ms=DOWNLOAD_BUTTON_TIMEOUT_MS):
+    # Retorna assim que o botão OU o link aparecem (antes: 30 polls de 1s)
+    try:
+        btn_download.or_(link_direct).first.wait_for(state="attached", timeout=timeout_ms)
+    except PlaywrightTimeoutError:
+        raise Exception("Botão/link de download não encontrado.")
+
+def _click_and_race_download(page, btn_download, link_direct, timeout_ms):
+    # Corrida entre o evento de download e o banner de erro: o que vier primeiro decide.
+    # page.wait_for_timeout bombeia os eventos do Playwright, então o handler dispara durante a espera.
+    downloads = []
+    on_download = downloads.append
+    page.on("download", on_download)
+    try:
+        if btn_download.count() > 0:
+            btn_download.first.click()
+        else:
+            link_direct.first.click()
+        error_banner = page.locator(ERROR_BANNER_SELECTOR)
+        deadline = time.monotonic() + timeout_ms / 1000
+        while not downloads:
+            if error_banner.count() > 0:
+                raise Exception("Interface exibiu: Erro no download.")
+            if time.monotonic() >= deadline:
+                raise PlaywrightTimeoutError(f"Timeout {timeout_ms}ms aguardando o download.")
+            page.wait_for_timeout(200)
+        return downloads[0]
+    finally:
+        page.remove_listener("download", on_download)
+
+def _record_file_metrics(metrics: Metrics, file_url, save_path, attempt, started):
+    try:
+        size = os.path.getsize(save_path)
+    except OSError:
+        size = 0
+    metrics.incr("files_done")
+    metrics.incr("bytes", size)
+    metrics.record("file_total", time.monotonic() - started, url=file_url, bytes=size, attempts=attempt)
+
+def _close_quietly(page):
+    try:
+        page.close()
+    except Exception:
+        pass
+
+# -------------------------
+# Pool de páginas + bloqueio opcional de recursos
+# -------------------------
+
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+# No modo crawl só as âncoras importam: corta também legendas e manifests
+CRAWL_BLOCKED_RESOURCE_TYPES = BLOCKED_RESOURCE_TYPES | {"texttrack", "manifest"}
+ANALYTICS_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "facebook.net", "hotjar.com", "clarity.ms", "scorecardresearch.com",
+)
+AD_HOSTS = (
+    "googleadservices.com", "adservice.google.com", "amazon-adsystem.com", "adnxs.com", "taboola.com",
+    "outbrain.com", "popads.net", "propellerads.com", "criteo.com", "pubmatic.com", "rubiconproject.com",
+)
+
+# Flags do Chromium que reduzem RSS/CPU sem mudar o DOM que lemos
+CHROMIUM_LOW_MEMORY_ARGS = (
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--mute-audio",
+    "--no-first-run",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+)
+
+def _host_matches(host, suffixes):
+    return any(host == s or host.endswith("." + s) for s in suffixes)
+
+class RequestBlocker:
+    # Handler de page.route/context.route: aborta tipos de recurso e hosts que não ajudam a ler âncoras
+    # nem a clicar em botões. Hosts do allow-list passam sempre.
+    def __init__(self, blocked_types=BLOCKED_RESOURCE_TYPES, blocked_hosts=ANALYTICS_HOSTS, allow_hosts=()):
+        self.blocked_types = frozenset(blocked_types)
+        self.blocked_hosts = tuple(blocked_hosts)
+        self.allow_hosts = tuple(h.lower() for h in allow_hosts)
+        self.blocked = 0
+
+    @classmethod
+    def for_crawl(cls, settings):
+        return cls(CRAWL_BLOCKED_RESOURCE_TYPES, ANALYTICS_HOSTS + AD_HOSTS, settings.get("crawl_allow_hosts", ()))
+
+    def should_block(self, resource_type, url) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        if self.allow_hosts and _host_matches(host, self.allow_hosts):
+            return False
+        return resource_type in self.blocked_types or _host_matches(host, self.blocked_hosts)
+
+    def handle(self, route):
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked += 1
+            route.abort()
+        else:
+            route.continue_()
+
+    async def async_handle(self, route):
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+_default_blocker = RequestBlocker()
+
+class PagePool:
+    # Páginas "quentes" reaproveitadas entre downloads: evita abrir/fechar aba e rebaixar JS/CSS a
+    # cada arquivo. Páginas com erro ou com max_uses usos são fechadas e trocadas por novas (limita o
+    # crescimento de memória do renderer). Como os objetos sync do Playwright são presos à thread,
+    # cada worker tem o próprio pool.
+    def __init__(self, context, size: int = 1, max_uses: int = 50, block_resources: bool = False):
+        self.context = context
+        self.size = max(1, int(size))
+        self.max_uses = max(1, int(max_uses))
+        self.block_resources = block_resources
+        self._idle = []
+        self._uses = {}
+
+    @classmethod
+    def from_settings(cls, context, settings, size: int = 1):
+        return cls(context, size, settings.get("page_max_uses", 50), settings.get("block_resources", False))
+
+    def _new_page(self):
+        page = self.context.new_page()
+        if self.block_resources:
+            page.route("**/*", _default_blocker.handle)
+        self._uses[page] = 0
+        return page
+
+    def _healthy(self, page) -> bool:
+        try:
+            return not page.is_closed() and page.evaluate("() => 1") == 1
+        except Exception:
+            return False
+
+    def acquire(self):
+        while self._idle:
+            page = self._idle.pop()
+            if self._healthy(page):
+                self._uses[page] += 1
+                return page
+            self._discard(page)
+        page = self._new_page()
+        self._uses[page] += 1
+        return page
+
+    def release(self, page, healthy: bool = True):
+        if healthy and len(self._idle) < self.size and self._uses.get(page, self.max_uses) < self.max_uses \
+                and not page.is_closed():
+            self._idle.append(page)
+        else:
+            self._discard(page)
+
+    def _discard(self, page):
+        self._uses.pop(page, None)
+        _close_quietly(page)
+
+    @contextmanager
+    def page(self):
+        page = self.acquire()
+        healthy = False
+        try:
+            yield page
+            healthy = True
+        finally:
+            self.release(page, healthy)
+
+    def close(self):
+        while self._idle:
+            self._discard(self._idle.pop())
+
+def download_file(
+    context,
+    file_url,
+    visible_name,
+    local_path,
+    logger: GuiLogger = None,
+    max_attempts: int = 4,
+    pre_wait_random: tuple = (5, 10),
+    post_save_random: tuple = (2, 5),
+    retry_random_delay: tuple = (5, 15),
+    expect_download_timeout: int = 120000,
+    transfer: str = "browser",
+    http_pool: HttpPool = None,
+    user_agent: str = None,
+    http_options: dict = None,
+    throttle: AdaptiveThrottle = None,
+    page_pool: PagePool = None,
+    metrics: Metrics = None,
+    fsync: str = "file",
+    attempt: int = 1,
+    retry_scheduler: RetryScheduler = None,
+    breaker: CircuitBreaker = None
+):
+    # Sem throttle: esperas fixas/aleatórias originais. Com throttle: ritmo adaptativo por host.
+    # Com page_pool, a página vem do pool e volta para ele (em vez de new_page/close a cada tentativa).
+    # Com retry_scheduler, a falha agenda a próxima tentativa (a partir de `attempt`) e devolve RETRY_LATER
+    # em vez de dormir no worker; com breaker, cada tentativa espera o disjuntor do site fechar.
+    os.makedirs(local_path, exist_ok=True)
+    use_http = transfer == "http" and http_pool is not None
+    # chave do item na tabela/contadores: a mesma de "na fila" até "concluído", antes da limpeza do nome
+    item_id = os.path.join(local_path, visible_name)
+    started = time.monotonic()
+
+    def release(page, healthy=True):
+        if page_pool:
+            page_pool.release(page, healthy)
+        else:
+            _close_quietly(page)
+
+    while attempt <= max_attempts:
+        if breaker and not breaker.wait():
+            return None
+        if throttle:
+            throttle.wait(file_url)
+        page = page_pool.acquire() if page_pool else context.new_page()
+        try:
+            if logger:
+                logger.log(f"📥 Baixando ({attempt}/{max_attempts}): {visible_name} -> {local_path}")
+                logger.set_item_status(item_id, f"baixando ({attempt})")
+
+            with _phase(metrics, "file_navigate"):
+                _raise_for_status(page.goto(file_url, wait_until="domcontentloaded", timeout=60000), file_url)
+            if throttle is None:
+                time.sleep(random.randint(*pre_wait_random))
+
+            btn_download = page.locator("text=Download")
+            link_direct = page.locator("a[download]")
+
+            # Aguarda botão/link aparecer
+            with _phase(metrics, "button_wait"):
+                _wait_for_download_control(page, btn_download, link_direct)
+
+            # Modo HTTP: se houver a[download] com URL real, nem precisa clicar
+            direct_url = _direct_download_href(page, link_direct) if use_http else None
+            download = None
+            if direct_url is None:
+                # Clica e espera o download ou o erro visual, o que vier primeiro
+                with _phase(metrics, "click_to_download"):
+                    download = _click_and_race_download(page, btn_download, link_direct, expect_download_timeout)
+
+            if use_http and (direct_url or download.url.startswith(("http://", "https://"))):
+                # 🌐 Navegador só resolveu a URL final; os bytes vêm pelo pool HTTP
+                url = direct_url or download.url
+                suggested = None
+                if download is not None:
+                    suggested = download.suggested_filename
+                    download.cancel()
+                headers = {"Referer": page.url, "Accept": "*/*"}
+                if user_agent:
+                    headers["User-Agent"] = user_agent
+                cookies = cookie_header(context, url)
+                if cookies:
+                    headers["Cookie"] = cookies
+                release(page)
+                page = None
+                with _phase(metrics, "transfer", mode="http"):
+                    save_path = http_download(http_pool, url, local_path, visible_name, suggested, headers,
+                                              logger=logger, **(http_options or {}))
+            else:
+                # 💾 Salva arquivo com nome limpo
+                save_path = unique_save_path(local_path, target_name(visible_name, download.suggested_filename))
+                try:
+                    with _phase(metrics, "transfer", mode="browser"):
+                        save_download(download, save_path, fsync)
+                except Exception:
+                    release_save_path(save_path)
+                    raise
+
+            if logger:
+                logger.log(f"✅ Arquivo salvo: {save_path}")
+                logger.set_item_status(item_id, "concluído")
+            if metrics:
+                _record_file_metrics(metrics, file_url, save_path, attempt, started)
+
+            if breaker:
+                breaker.success()
+            if throttle:
+                throttle.success(file_url)
+            else:
+                time.sleep(random.randint(*post_save_random))
+            if page is not None:
+                release(page)
+            return save_path
+
+        except Exception as e:
+            if logger:
+                logger.log(f"❌ Erro no download ({attempt}/{max_attempts}): {e}")
+                logger.set_item_status(item_id, f"erro ({attempt})")
+
+            kind = classify_failure(e)
+            pause = throttle.failure(file_url, kind) if throttle else 0
+            if breaker:
+                breaker.failure(kind)
+            if metrics:
+                metrics.failure(kind or type(e).__name__, url=file_url, attempt=attempt)
+            attempt += 1
+            if page is not None:
+                release(page, healthy=False)
+
+            if attempt <= retry_limit(kind, max_attempts) and retry_scheduler is not None:
+                if metrics:
+                    metrics.incr("retries")
+                delay = retry_scheduler.retry_later((file_url, visible_name, local_path), attempt, kind, pause)
+                if logger:
+                    logger.log(f"⏳ {visible_name}: nova tentativa ({kind or 'erro'}) em ~{delay:.0f}s; "
+                               f"os outros arquivos seguem.")
+                    logger.set_item_status(item_id, f"nova tentativa ({attempt})")
+                return RETRY_LATER
+            if attempt <= retry_limit(kind, max_attempts):
+                if metrics:
+                    metrics.incr("retries")
+                if throttle:
+                    # a pausa do host já vale para a próxima tentativa; erros "neutros" usam backoff próprio
+                    delay = pause or throttle.retry_delay(attempt - 1)
+                    if logger:
+                        logger.log(f"🔄 Tentando novamente em ~{delay:.0f}s ({throttle.describe(file_url)})...")
+                    if not pause:
+                        time.sleep(delay)
+                else:
+                    delay = random.randint(*retry_random_delay)
+                    if logger:
+                        logger.log(f"🔄 Tentando novamente em {delay}s...")
+                    time.sleep(delay)
+            else:
+                if logger:
+                    logger.log(f"⚠️ Arquivo {visible_name} pulado após {attempt - 1} tentativa(s).")
+                    logger.set_item_status(item_id, "pulado")
+                if metrics:
+                    metrics.incr("files_failed")
+                return None
+    return None
+
+# -------------------------
+# Thread de execução principal (para não travar a GUI)
+# -------------------------
+
+def fixed_waits(settings) -> tuple:
+    # Esperas às cegas do ritmo fixo (antes de procurar o botão, depois de salvar). Sem valor configurado,
+    # ficam desligadas só com o throttle adaptativo, que já espaça as requisições por host; o limite por
+    # host só conta conexões simultâneas e está sempre definido, então não substitui o ritmo fixo.
+    paced = settings.get("throttle", "fixed") == "adaptive"
+    pre = settings.get("pre_wait_random")
+    post = settings.get("post_save_random")
+    if pre is None:
+        pre = (0, 0) if paced else (5, 10)
+    if post is None:
+        post = (0, 0) if paced else (2, 5)
+    return pre, post
+
+def download_options(settings) -> dict:
+    # Argumentos de download_file/async_download_file derivados das configurações
+    pre_wait, post_save = fixed_waits(settings)
+    return {
+        "max_attempts": settings.get("max_attempts", 4),
+        "pre_wait_random": pre_wait,
+        "post_save_random": post_save,
+        "retry_random_delay": settings.get("retry_random_delay", (5,15)),
+        "expect_download_timeout": settings.get("expect_download_timeout", 120000),
+        "transfer": settings.get("transfer", "browser"),
+        "user_agent": settings.get("user_agent"),
+        "fsync": settings.get("fsync", "file"),
+        "http_options": {
+            "writer": DiskWriter.from_settings(settings),
+            "segments": settings.get("segments", 1),
+            "segment_min_size": int(settings.get("segment_min_size_mb", 64)) * 1024 * 1024,
+            "verify_hash": settings.get("verify_hash", True),
+        },
+    }
+
+def _downloads_path(settings):
+    path = settings.get("downloads_path")
+    if path:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+def launch_args(settings, crawl: bool = False):
+    return list(CHROMIUM_LOW_MEMORY_ARGS) if crawl and settings.get("crawl_lite", True) else []
+
+def launch_browser(p, settings, crawl: bool = False):
+    # Cada thread do sync_playwright precisa do próprio browser/contexto.
+    # crawl=True: perfil leve (flags de pouca memória, sem downloads, recursos inúteis bloqueados).
+    browser = p.chromium.launch(headless=True, slow_mo=settings.get("slow_mo", 0), args=launch_args(settings, crawl),
+                                downloads_path=_downloads_path(settings))
+    lite = crawl and settings.get("crawl_lite", True)
+    context = browser.new_context(
+        accept_downloads=not lite,
+        user_agent=settings.get("user_agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"),
+        **({"service_workers": "block"} if lite else {})
+    )
+    if lite:
+        context.route("**/*", RequestBlocker.for_crawl(settings).handle)
+    return browser, context
+
+class HostLimiter:
+    # Limita quantos downloads simultâneos cada host recebe
+    def __init__(self, max_per_host: int):
+        self.max_per_host = max(1, int(max_per_host))
+        self._lock = threading.Lock()
+        self._slots = {}
+
+    def _slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = self._slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return slot
+
+    def acquire(self, url, stop_event: threading.Event = None) -> bool:
+        slot = self._slot(url)
+        while not slot.acquire(timeout=0.5):
+            if stop_event is not None and stop_event.is_set():
+                return False
+        return True
+
+    def release(self, url):
+        self._slot(url).release()
+
+class ProcessHostLimiter(HostLimiter):
+    # HostLimiter entre processos: um semáforo por balde de host, criados no pai antes do spawn
+    def __init__(self, mp_context, max_per_host: int):
+        self.max_per_host = max(1, int(max_per_host))
+        self._slots = [mp_context.BoundedSemaphore(self.max_per_host) for _ in range(HOST_BUCKETS)]
+
+    def _slot(self, url):
+        return self._slots[_host_bucket(urlparse(url).netloc)]
+
+class CrawlFrontier:
+    # Fronteira compartilhada pelas páginas de crawl: heap por profundidade (BFS) com dedup de URLs.
+    # get() devolve None quando não há pasta na fila nem em processamento (crawl terminado).
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = []
+        self._seen = set()
+        self._seq = 0
+        self._in_flight = 0
+
+    def reserve(self, url) -> bool:
+        with self._cond:
+            if url in self._seen:
+                return False
+            self._seen.add(url)
+            return True
+
+    def mark_seen(self, urls):
+        with self._cond:
+            self._seen.update(urls)
+
+    def put(self, item, priority=0):
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (priority, self._seq, item))
+            self._cond.notify()
+
+    def get(self, stop_event: threading.Event):
+        with self._cond:
+            while not stop_event.is_set():
+                if self._heap:
+                    self._in_flight += 1
+                    return heapq.heappop(self._heap)[2]
+                if self._in_flight == 0:
+                    self._cond.notify_all()
+                    return None
+                self._cond.wait(0.5)
+            return None
+
+    def task_done(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+class HostPoliteness:
+    # Intervalo mínimo entre visitas ao mesmo host, somando todas as páginas de crawl
+    def __init__(self, delay: float):
+        self.delay = max(0.0, float(delay))
+        self._lock = threading.Lock()
+        self._next = {}
+
+    def reserve(self, url) -> float:
+        # Reserva o próximo horário livre do host e devolve quantos segundos faltam para ele
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.delay
+        return slot - time.monotonic()
+
+    def wait(self, url, stop_event: threading.Event) -> bool:
+        remaining = self.reserve(url)
+        return not (remaining > 0 and stop_event.wait(remaining))
+
+class DownloadWorker(threading.Thread):
+    # Consome a fila de arquivos com o próprio browser enquanto o crawl continua
+    def __init__(self, worker_id, jobs: Queue, settings, logger: GuiLogger, stop_event: threading.Event,
+                 host_limiter: HostLimiter, manifest: Manifest = None, http_pool: HttpPool = None,
+                 on_result=None, throttle: AdaptiveThrottle = None, metrics: Metrics = None,
+                 retry_scheduler: RetryScheduler = None, breaker: CircuitBreaker = None):
+        super().__init__(daemon=True, name=f"download-worker-{worker_id}")
+        self.worker_id = worker_id
+        self.jobs = jobs
+        self.settings = settings
+        self.logger = logger
+        self.stop_event = stop_event
+        self.host_limiter = host_limiter
+        self.manifest = manifest
+        self.http_pool = http_pool
+        self.on_result = on_result
+        self.throttle = throttle
+        self.metrics = metrics
+        self.retry_scheduler = retry_scheduler
+        self.breaker = breaker
+
+    def run(self):
+        with sync_playwright() as p:
+            browser, context = launch_browser(p, self.settings)
+            page_pool = PagePool.from_settings(context, self.settings)
+            while not self.stop_event.is_set():
+                try:
+                    job = self.jobs.get(timeout=0.5)
+                except Empty:
+                    continue
+                try:
+                    if job is None or not self._handle(context, page_pool, job):
+                        break
+                finally:
+                    # a drenagem final espera a fila (e as novas tentativas agendadas) zerarem
+                    self.jobs.task_done()
+            page_pool.close()
+            try:
+                browser.close()
+            except Exception:
+                pass
+
+    def _handle(self, context, page_pool, job) -> bool:
+        # Job: (url, nome, pasta) ou, vindo do RetryScheduler, (url, nome, pasta, tentativa)
+        file_url, visible_name, local_path = job[:3]
+        if self.manifest and self.manifest.is_done(file_url, local_path):
+            return True
+        if not self.host_limiter.acquire(file_url, self.stop_event):
+            return False
+        try:
+            save_path = download_file(
+                context,
+                file_url,
+                visible_name,
+                local_path,
+                logger=self.logger,
+                http_pool=self.http_pool,
+                throttle=self.throttle,
+                page_pool=page_pool,
+                metrics=self.metrics,
+                attempt=job[3] if len(job) > 3 else 1,
+                retry_scheduler=self.retry_scheduler,
+                breaker=self.breaker,
+                **download_options(self.settings)
+            )
+            if self.on_result and save_path is not RETRY_LATER:
+                self.on_result(file_url, local_path, save_path)
+        except Exception as e:
+            self.logger.log(f"⚠️ Worker {self.worker_id}: falha inesperada em {visible_name}: {e}")
+        finally:
+            self.host_limiter.release(file_url)
+        return True
+
+class _RootPipeline(ABC):
+    # Estado de uma pasta raiz comum aos motores: dedup de pastas/arquivos, filtro, manifesto e
+    # contadores de progresso. Cada motor define como pastas e arquivos entram na fila
+    # (_put_folder/_put_job).
+    def _init_root(self, base_url, out_dir, settings, logger: GuiLogger, stop_event: threading.Event,
+                   metrics: Metrics = None):
+        self.base_url = base_url
+        self.out_dir = out_dir
+        self.settings = with_download_dir(settings, out_dir)
+        self.logger = logger
+        self.stop_event = stop_event
+        self.frontier = CrawlFrontier()
+        self.queued_files = set()
+        self.file_filter = FileFilter.from_settings(settings)
+        self.skipped_count = 0
+        self.manifest = None
+        self.listing_cache = None
+        self.dedup = None
+        # raízes do mesmo agendador dividem um único coletor
+        self.metrics = metrics if metrics is not None else Metrics.from_settings(settings)
+        self.stats = {"folders": 0, "queued": 0, "done": 0, "failed": 0, "cached": 0, "changed": 0, "deduped": 0}
+        self._lock = threading.Lock()
+
+    def _open_manifest(self):
+        if self.settings.get("resume", True):
+            self.manifest = Manifest(self.out_dir)
+        self.listing_cache = ListingCache.from_settings(self.out_dir, self.settings)
+        self.dedup = DedupStore.from_settings(self.out_dir, self.settings)
+
+    def _seed_frontier(self):
+        # Com manifesto: retoma as pastas pendentes e re-enfileira arquivos não concluídos
+        root = [(self.base_url, "", self.out_dir)]
+        if self.manifest and self.manifest.interrupted():
+            pending = self.manifest.pending_folders()
+            self.frontier.mark_seen(self.manifest.visited_folders())
+            pending_files = self.manifest.pending_files()
+            self.logger.log(
+                f"♻️ Retomando execução anterior: {len(pending)} pasta(s) pendente(s), "
+                f"{len(pending_files)} arquivo(s) pendente(s), {self.manifest.done_count()} já baixado(s)."
+            )
+            for file_url, visible_name, local_path in pending_files:
+                self._enqueue_file(file_url, visible_name, local_path)
+            seeds = pending
+        else:
+            seeds = root
+            if self.manifest:
+                self.manifest.add_folders(root)
+        for folder_url, folder_name, local_path in seeds:
+            if self.frontier.reserve(folder_url):
+                self._put_folder((folder_url, folder_name, local_path, 0), 0)
+
+    @abstractmethod
+    def _put_folder(self, item, priority):
+        pass
+
+    @abstractmethod
+    def _put_job(self, job):
+        pass
+
+    def _enqueue_file(self, file_url, visible_name, local_path) -> str:
+        # Devolve o destino desta ocorrência: "queued" (foi para os workers), "placed"/"skip" (o dedup já a
+        # pôs na pasta), "wait" (o dedup a liga quando o download em andamento terminar), "duplicate"
+        # (sem dedup, a mesma URL já está na fila para esta pasta) ou "done" (baixada numa execução anterior).
+        # Sem dedup, cada pasta que lista a URL recebe a própria cópia.
+        if self.dedup:
+            # o DedupStore decide por ID: a mesma URL em outra pasta vira link, não é descartada
+            action = self._claim_dedup(file_url, visible_name, local_path)
+            if action != "download":
+                return action
+            with self._lock:
+                self.queued_files.add((file_url, local_path))
+        else:
+            with self._lock:
+                if (file_url, local_path) in self.queued_files:
+                    return "duplicate"
+                self.queued_files.add((file_url, local_path))
+        if self.manifest and self.manifest.is_done(file_url, local_path):
+            if self.dedup:
+                # baixado numa execução anterior: vira o blob das próximas ocorrências
+                saved = self.manifest.saved_path(file_url, local_path)
+                self._dedup_finished(file_url, saved if saved and os.path.exists(saved) else None)
+            return "done"
+        with self._lock:
+            self.stats["queued"] += 1
+        # registra no logger/lista e entrega para os workers
+        self.logger.set_item_status(os.path.join(local_path, visible_name), "na fila")
+        self._put_job((file_url, visible_name, local_path))
+        return "queued"
+
+    def _claim_dedup(self, file_url, visible_name, local_path) -> str:
+        # Ação do DedupStore para esta ocorrência; erro de disco vira "download"
+        try:
+            action = self.dedup.claim(file_url, visible_name, local_path)
+        except OSError as e:
+            self.logger.log(f"⚠️ Dedup falhou para {visible_name}, baixando normalmente: {e}")
+            return "download"
+        if action == "placed":
+            with self._lock:
+                self.stats["deduped"] += 1
+            self.logger.set_item_status(os.path.join(local_path, visible_name), "concluído (dedup)")
+        return action
+
+    def _occurrence_placed(self, file_url, local_path):
+        # Ocorrência em espera que o dedup acabou de ligar na pasta; InventoryDownloader fecha a reserva
+        pass
+
+    def _dedup_finished(self, file_url, save_path):
+        try:
+            placed, waiting = self.dedup.finished(file_url, save_path)
+        except OSError as e:
+            self.logger.log(f"⚠️ Dedup: não foi possível ligar as cópias de {file_url}: {e}")
+            return
+        for url, name, path, _ in placed:
+            self.logger.set_item_status(os.path.join(path, name), "concluído (dedup)")
+            self._occurrence_placed(url, path)
+        if placed:
+            with self._lock:
+                self.stats["deduped"] += len(placed)
+        # o dono falhou: a próxima ocorrência assume o download, as demais voltam a esperar por ela
+        for w_url, w_name, w_path in waiting:
+            self._enqueue_file(w_url, w_name, w_path)
+
+    def _handle_links(self, local_path, depth, subfolders, files) -> int:
+        # Chamado a cada lote revelado pelo scroll: subpastas vão para a fronteira, arquivos para os workers
+        new_subfolders = []
+        for sub_url, sub_name in subfolders:
+            sub_name_clean = clean_folder_name(sub_name)
+            if self.frontier.reserve(sub_url):
+                new_subfolders.append((sub_url, sub_name_clean, os.path.join(local_path, sub_name_clean)))
+        if self.manifest and new_subfolders:
+            self.manifest.add_folders(new_subfolders)
+        for item in new_subfolders:
+            self._put_folder(item + (depth + 1,), depth + 1)
+
+        # 🧩 Filtra por nome/URL antes de qualquer navegação
+        accepted = [(u, n) for u, n in files if self.file_filter.accepts(u, n)]
+        if self.manifest and accepted:
+            self.manifest.add_files([(u, n, local_path) for u, n in accepted])
+        for file_url, visible_name in accepted:
+            if self.stop_event.is_set():
+                break
+            self._enqueue_file(file_url, visible_name, local_path)
+        return len(files) - len(accepted)
+
+    async def _async_scan_folder(self, page, folder_url, local_path, depth):
+        # Varredura async de uma pasta (motor asyncio e crawl do motor threads). Manifesto, cache de
+        # pastas e dedup rodam em asyncio.to_thread; os lotes de links, um por vez na ordem do scroll.
+        loop = asyncio.get_running_loop()
+        links_lock = asyncio.Lock()
+        batches = []
+
+        async def handle_links(subfolders, files):
+            async with links_lock:
+                return await asyncio.to_thread(self._handle_links, local_path, depth, subfolders, files)
+
+        def on_links(subfolders, files):
+            batches.append(loop.create_task(handle_links(subfolders, files)))
+
+        try:
+            subfolders, files = await async_process_folder(
+                page, folder_url, logger=self.logger,
+                scroll_mode=self.settings.get("scroll_mode", "poll"), on_links=on_links,
+                metrics=self.metrics, scroll_args=scroll_options(self.settings)
+            )
+        except Exception:
+            await asyncio.gather(*batches, return_exceptions=True)
+            raise
+        skipped = sum(await asyncio.gather(*batches))
+        await asyncio.to_thread(self._store_listing, folder_url, subfolders, files)
+        await asyncio.to_thread(self._finish_folder, folder_url, skipped)
+
+    def _replay_cached(self, folder_url, local_path, depth) -> bool:
+        # Sincronização incremental: pasta no prazo do cache não abre página; os arquivos já baixados
+        # são descartados pelo manifesto, então só os novos chegam aos workers
+        if not self.listing_cache:
+            return False
+        cached = self.listing_cache.get(folder_url)
+        if cached is None:
+            return False
+        subfolders, files = cached
+        skipped = self._handle_links(local_path, depth, subfolders, files)
+        with self._lock:
+            self.stats["cached"] += 1
+        self._finish_folder(folder_url, skipped)
+        return True
+
+    def _store_listing(self, folder_url, subfolders, files):
+        # Listagem vazia pode ser falha de navegação: não vale a pena guardar
+        if not self.listing_cache or self.stop_event.is_set() or not (subfolders or files):
+            return
+        if self.listing_cache.put(folder_url, subfolders, files):
+            with self._lock:
+                self.stats["changed"] += 1
+
+    def _finish_folder(self, folder_url, skipped):
+        with self._lock:
+            self.stats["folders"] += 1
+            self.skipped_count += skipped
+        if skipped:
+            self.logger.log(f"🚫 {skipped} arquivo(s) ignorado(s) pelo filtro nesta pasta.")
+        if self.manifest and not self.stop_event.is_set():
+            self.manifest.folder_done(folder_url)
+
+    def _record_result(self, file_url, local_path, save_path):
+        with self._lock:
+            self.stats["done" if save_path else "failed"] += 1
+        if self.manifest:
+            self.manifest.file_finished(file_url, local_path, save_path, "done" if save_path else "failed")
+        if self.dedup:
+            self._dedup_finished(file_url, save_path)
+
+    def progress_line(self) -> str:
+        with self._lock:
+            st = dict(self.stats)
+            skipped = self.skipped_count
+        line = (f"{st['folders']} pasta(s), {st['done']}/{st['queued']} arquivo(s) baixado(s), "
+                f"{st['failed']} falha(s), {skipped} ignorado(s)")
+        if self.listing_cache:
+            line += f", {st['cached']} pasta(s) do cache, {st['changed']} varrida(s) com mudança"
+        if self.dedup:
+            line += f", {st['deduped']} cópia(s) por dedup"
+        return line
+
+    def _finish_run(self):
+        if self.skipped_count:
+            self.logger.log(f"🚫 Total ignorado pelo filtro: {self.skipped_count} arquivo(s).")
+        if self.listing_cache:
+            self.logger.log(
+                f"🗂️ Cache de pastas: {self.stats['cached']} reaproveitada(s), "
+                f"{self.stats['changed']} nova(s)/alterada(s) na varredura."
+            )
+            self.listing_cache.close()
+        if self.dedup:
+            self.logger.log(f"🔗 Dedup: {self.dedup.summary()}")
+            self.dedup.close()
+        if self.manifest:
+            self.manifest.close()
+        forget_save_paths(self.out_dir)
+
+class DownloaderThread(_RootPipeline, threading.Thread):
+    def __init__(self, base_url, out_dir, settings, logger: GuiLogger, stop_event: threading.Event):
+        threading.Thread.__init__(self, daemon=True)
+        self._init_root(base_url, out_dir, settings, logger, stop_event)
+        self.politeness = HostPoliteness(settings.get("crawl_host_delay", 1.0))
+        self.jobs = Queue()
+        self.retry = None
+
+    def _put_folder(self, item, priority):
+        self.frontier.put(item, priority)
+
+    def _put_job(self, job):
+        self.jobs.put(job)
+
+    def _crawl_loop(self):
+        # Todas as páginas de crawl num único navegador: a API sync prende o navegador à thread que o
+        # abriu, então o crawl é uma thread com event loop próprio e crawl_pages páginas async
+        asyncio.run(self._async_crawl())
+
+    async def _async_crawl(self):
+        n_pages = max(1, int(self.settings.get("crawl_pages", 2)))
+        async with async_playwright() as p:
+            browser = await async_launch_browser(p, self.settings)
+            context = await async_new_context(browser, self.settings, crawl=True)
+            page_pool = async_crawl_page_pool(context, self.settings, n_pages)
+            try:
+                await asyncio.gather(*(self._async_crawl_page(page_pool) for _ in range(n_pages)))
+            finally:
+                await page_pool.close()
+                try:
+                    await browser.close()
+                except Exception:
+                    pass
+
+    async def _async_crawl_page(self, page_pool):
+        while True:
+            item = await asyncio.to_thread(self.frontier.get, self.stop_event)
+            if item is None:
+                break
+            folder_url, folder_name, local_path, depth = item
+            try:
+                cached = await asyncio.to_thread(self._replay_cached, folder_url, local_path, depth)
+            except Exception as e:
+                self.logger.log(f"⚠️ Cache de pastas indisponível para {folder_url}: {e}")
+                cached = False
+            if cached:
+                self.frontier.task_done()
+                continue
+            page = await page_pool.acquire()
+            healthy = False
+            try:
+                # intervalo de cortesia por host, não mais por pasta
+                remaining = self.politeness.reserve(folder_url)
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+                if self.stop_event.is_set():
+                    continue
+                await self._async_scan_folder(page, folder_url, local_path, depth)
+                healthy = True
+            except Exception as e:
+                self.logger.log(f"⚠️ Erro ao processar pasta {folder_url}: {e}")
+            finally:
+                await page_pool.release(page, healthy)
+                self.frontier.task_done()
+
+    def _start_workers(self):
+        # Workers de download começam antes do crawl e drenam a fila enquanto ela é preenchida
+        n_workers = max(1, int(self.settings.get("download_workers", 3)))
+        host_limiter = HostLimiter(self.settings.get("max_per_host", n_workers))
+        self._http_pool = HttpPool(max_idle_per_host=host_limiter.max_per_host) \
+            if self.settings.get("transfer", "browser") == "http" else None
+        throttle = AdaptiveThrottle.from_settings(self.settings, self.stop_event)
+        self.retry = RetryScheduler.from_settings(self.settings, self.jobs.put, self.stop_event)
+        breaker = CircuitBreaker.from_settings(self.settings, self.logger, self.stop_event)
+        self._workers = [
+            DownloadWorker(i + 1, self.jobs, self.settings, self.logger, self.stop_event, host_limiter,
+                           manifest=self.manifest, http_pool=self._http_pool, on_result=self._record_result,
+                           throttle=throttle, metrics=self.metrics, retry_scheduler=self.retry, breaker=breaker)
+            for i in range(n_workers)
+        ]
+        for w in self._workers:
+            w.start()
+        self.logger.log(f"👷 {n_workers} worker(s) de download iniciados (máx. {host_limiter.max_per_host} por host).")
+
+    def _stop_workers(self):
+        # Novas tentativas agendadas e ocorrências que esperavam um dono que falhou (dedup) voltam para a
+        # fila: os sentinelas só entram quando nada mais pode voltar
+        while not self.stop_event.is_set() and (self.jobs.unfinished_tasks or (self.retry and self.retry.pending())):
+            time.sleep(0.5)
+        if self.retry:
+            self.retry.close()
+        # Com parada solicitada os workers saem sozinhos; numa fila limitada o sentinela poderia travar
+        for _ in self._workers:
+            while not self.stop_event.is_set():
+                try:
+                    self.jobs.put(None, timeout=0.5)
+                    break
+                except Full:
+                    continue
+        for w in self._workers:
+            w.join()
+        if self._http_pool:
+            self._http_pool.close()
+
+    def _crawl(self):
+        self._seed_frontier()
+        n_pages = max(1, int(self.settings.get("crawl_pages", 2)))
+        crawler = threading.Thread(target=self._crawl_loop, daemon=True, name="crawl")
+        crawler.start()
+        self.logger.log(f"🕸️ {n_pages} página(s) de crawl num único navegador "
+                        f"(intervalo por host: {self.politeness.delay:.1f}s).")
+        crawler.join()
+
+    def run(self):
+        self._open_manifest()
+        reporter = MetricsReporter(self.metrics, self.logger, self.settings.get("metrics_interval", 30), self.settings)
+        reporter.start()
+        self._start_workers()
+        self._crawl()
+        if not self.stop_event.is_set():
+            self.logger.log("📭 Crawl concluído. Aguardando os downloads na fila...")
+        self._stop_workers()
+        reporter.stop()
+        self._finish_run()
+        self.logger.log("✅ Todos os arquivos/pastas processados (ou execução parada).")
+
+# -------------------------
+# Modo em duas fases: inventário (só crawl) e download a partir do inventário
+# -------------------------
+
+INVENTORY_VERSION = 1
+LEASES_DIR = ".drivedepobre_leases"
+
+class InventoryWriter:
+    # JSONL compacto: uma linha de cabeçalho por raiz e uma por arquivo
+    # {"folder": caminho relativo ao destino, "url", "name": nome visível}. O nome final não vai no
+    # inventário: depende da extensão sugerida pelo download, que só a fase 2 conhece.
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        self.count = 0
+
+    def header(self, root_url: str):
+        self._write({"inventory": INVENTORY_VERSION, "root": root_url, "created": time.time()})
+
+    def add(self, folder: str, file_url: str, visible_name: str):
+        self._write({"folder": folder, "url": file_url, "name": visible_name})
+        with self._lock:
+            self.count += 1
+
+    def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def read_inventory(path: str):
+    # Gera os registros de arquivo (cabeçalhos e linhas inválidas são pulados)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get("url"):
+                yield record
+
+def parse_shard(text):
+    # "2/8" -> (2, 8): este processo fica com a fatia 2 de 8 (índices a partir de 0)
+    if not text:
+        return None
+    index, total = (int(x) for x in str(text).split("/", 1))
+    if total < 1 or not 0 <= index < total:
+        raise ValueError(f"shard inválido: {text} (use I/N com 0 <= I < N)")
+    return index, total
+
+def _url_hash(file_url: str) -> str:
+    return hashlib.sha1(file_url.encode("utf-8")).hexdigest()
+
+def in_shard(file_url: str, shard) -> bool:
+    if shard is None:
+        return True
+    index, total = shard
+    return int(_url_hash(file_url)[:8], 16) % total == index
+
+class LeaseDir:
+    # Reserva de arquivos entre processos/máquinas num sistema de arquivos compartilhado, por ocorrência
+    # (URL + pasta do inventário): o mesmo arquivo listado em duas pastas tem duas reservas.
+    # <hash>.lease é criado com O_CREAT|O_EXCL (só um dono); o dono renova o mtime enquanto baixa e uma
+    # reserva sem renovação há mais de ttl segundos pode ser tomada. <hash>.done marca a ocorrência como
+    # gravada na pasta para sempre; falha apaga a reserva, e uma nova execução tenta de novo.
+    def __init__(self, out_dir: str, owner: str, ttl: float = 600):
+        self.path = os.path.join(out_dir, LEASES_DIR)
+        os.makedirs(self.path, exist_ok=True)
+        self.owner = owner
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._held = set()
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._renew_loop, daemon=True, name="lease-heartbeat")
+        self._heartbeat.start()
+
+    def _file(self, occurrence, suffix):
+        file_url, folder = occurrence
+        return os.path.join(self.path, _url_hash(f"{file_url}\0{folder}") + suffix)
+
+    def is_done(self, occurrence) -> bool:
+        return os.path.exists(self._file(occurrence, ".done"))
+
+    def claim(self, occurrence) -> bool:
+        # occurrence: (url, pasta relativa do inventário), igual em todas as máquinas
+        if self.is_done(occurrence):
+            return False
+        lease = self._file(occurrence, ".lease")
+        for _ in range(2):
+            try:
+                fd = os.open(lease, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                if not self._steal_if_stale(lease):
+                    return False
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"owner": self.owner, "url": occurrence[0], "folder": occurrence[1],
+                                    "at": time.time()}))
+            with self._lock:
+                self._held.add(occurrence)
+            return True
+        return False
+
+    def _steal_if_stale(self, lease) -> bool:
+        # rename é atômico: de vários processos tentando tomar a mesma reserva vencida, só um consegue
+        try:
+            if time.time() - os.path.getmtime(lease) < self.ttl:
+                return False
+            os.rename(lease, f"{lease}.stale.{os.getpid()}.{threading.get_ident()}")
+        except OSError:
+            return False
+        for name in os.listdir(self.path):
+            if name.startswith(os.path.basename(lease) + ".stale."):
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass
+        return True
+
+    def complete(self, occurrence):
+        with open(self._file(occurrence, ".done"), "w", encoding="utf-8") as f:
+            f.write(json.dumps({"owner": self.owner, "at": time.time()}))
+        self.release(occurrence)
+
+    def release(self, occurrence):
+        with self._lock:
+            self._held.discard(occurrence)
+        try:
+            os.remove(self._file(occurrence, ".lease"))
+        except OSError:
+            pass
+
+    def _renew_loop(self):
+        while not self._stop.wait(max(1.0, self.ttl / 3)):
+            with self._lock:
+                held = list(self._held)
+            for occurrence in held:
+                try:
+                    os.utime(self._file(occurrence, ".lease"))
+                except OSError:
+                    pass
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            held = list(self._held)
+        for occurrence in held:
+            self.release(occurrence)
+
+class InventoryThread(DownloaderThread):
+    # Fase 1: mesmo crawl do DownloaderThread, mas cada arquivo aceito vira uma linha do inventário
+    # em vez de um download. base_dir é a raiz dos caminhos relativos gravados.
+    def __init__(self, base_url, out_dir, settings, logger: GuiLogger, stop_event: threading.Event,
+                 writer: InventoryWriter, base_dir: str = None):
+        super().__init__(base_url, out_dir, settings, logger, stop_event)
+        self.writer = writer
+        self.base_dir = base_dir or out_dir
+
+    def _put_job(self, job):
+        file_url, visible_name, local_path = job
+        self.writer.add(os.path.relpath(local_path, self.base_dir), file_url, visible_name)
+
+    def run(self):
+        # sem manifesto de arquivos: nada é baixado, então nada ficaria "pendente" para a próxima execução
+        self.listing_cache = ListingCache.from_settings(self.out_dir, self.settings)
+        self.writer.header(self.base_url)
+        self._crawl()
+        self._finish_run()
+        self.logger.log(f"🧾 Inventário: {self.stats['queued']} arquivo(s) em {self.stats['folders']} pasta(s) "
+                        f"-> {self.writer.path}")
+
+class InventoryDownloader(DownloaderThread):
+    # Fase 2: baixa os arquivos de um inventário, opcionalmente só a fatia `shard` (hash da URL).
+    # Cada arquivo é reservado num LeaseDir antes de entrar na fila, então vários processos/máquinas
+    # no mesmo destino não se sobrepõem, e rodar de novo só refaz o que faltou ou falhou.
+    def __init__(self, inventory_path, out_dir, settings, logger: GuiLogger, stop_event: threading.Event):
+        super().__init__(inventory_path, out_dir, settings, logger, stop_event)
+        self.inventory_path = inventory_path
+        self.shard = parse_shard(settings.get("shard"))
+        n_workers = max(1, int(settings.get("download_workers", 3)))
+        # fila curta: só reserva o arquivo pouco antes de algum worker ficar livre
+        self.jobs = Queue(maxsize=n_workers * 2)
+        # (url, pasta) das ocorrências que foram para os workers
+        self._submitted = set()
+        self.leases = None
+
+    def _occurrence(self, file_url, local_path):
+        return file_url, os.path.relpath(local_path, self.out_dir)
+
+    def _open_manifest(self):
+        # Várias máquinas no mesmo destino (NFS/SMB): nada de SQLite dividido entre elas, e nada de WAL,
+        # que não funciona em sistema de arquivos de rede. O registro comum do que já está gravado são os
+        # .done do LeaseDir (claim pula essas ocorrências, inclusive as que outra máquina acabou de
+        # concluir); sem manifesto nem cache de pastas. O dedup, se ligado, tem um banco por máquina e
+        # fatia, com journal comum.
+        host = os.uname().nodename if hasattr(os, "uname") else "local"
+        shard = f"{self.shard[0]}-{self.shard[1]}" if self.shard else "todos"
+        name = f"{os.path.splitext(DEDUP_NAME)[0]}.{sanitize_filename(host)}.{shard}.sqlite3"
+        self.dedup = DedupStore.from_settings(self.out_dir, self.settings, name=name, journal_mode="DELETE")
+
+    def _put_job(self, job):
+        with self._lock:
+            self._submitted.add((job[0], job[2]))
+        while not self.stop_event.is_set():
+            try:
+                self.jobs.put(job, timeout=0.5)
+                return
+            except Full:
+                continue
+
+    def _record_result(self, file_url, local_path, save_path):
+        with self._lock:
+            submitted = (file_url, local_path) in self._submitted
+            self._submitted.discard((file_url, local_path))
+        super()._record_result(file_url, local_path, save_path)
+        if not submitted:
+            return
+        if save_path:
+            self.leases.complete(self._occurrence(file_url, local_path))
+        else:
+            self.leases.release(self._occurrence(file_url, local_path))
+
+    def _occurrence_placed(self, file_url, local_path):
+        self.leases.complete(self._occurrence(file_url, local_path))
+
+    def _feed(self):
+        claimed = mine = 0
+        for record in read_inventory(self.inventory_path):
+            if self.stop_event.is_set():
+                break
+            file_url = record["url"]
+            if not in_shard(file_url, self.shard):
+                continue
+            mine += 1
+            local_path = os.path.join(self.out_dir, record.get("folder") or "")
+            occurrence = self._occurrence(file_url, local_path)
+            if not self.leases.claim(occurrence):
+                continue
+            claimed += 1
+            outcome = self._enqueue_file(file_url, record["name"], local_path)
+            # .done só quando o arquivo está nesta pasta; "queued" e "wait" fecham a reserva depois
+            # (_record_result / _occurrence_placed)
+            if outcome in ("placed", "skip"):
+                self.leases.complete(occurrence)
+            elif outcome not in ("queued", "wait"):
+                self.leases.release(occurrence)
+        return mine, claimed
+
+    def run(self):
+        self._open_manifest()
+        host = os.uname().nodename if hasattr(os, "uname") else "local"
+        owner = f"{host}:{os.getpid()}:{self.settings.get('shard') or 'todos'}"
+        self.leases = LeaseDir(self.out_dir, owner, float(self.settings.get("lease_ttl", 600)))
+        reporter = MetricsReporter(self.metrics, self.logger, self.settings.get("metrics_interval", 30), self.settings)
+        reporter.start()
+        self._start_workers()
+        shard = f" (fatia {self.shard[0]}/{self.shard[1]})" if self.shard else ""
+        self.logger.log(f"🧾 Baixando a partir do inventário {self.inventory_path}{shard}...")
+        try:
+            mine, claimed = self._feed()
+            self.logger.log(f"🧾 {mine} arquivo(s) nesta fatia, {claimed} reservado(s) por este processo.")
+        except OSError as e:
+            self.logger.log(f"⚠️ Erro lendo o inventário: {e}")
+        self._stop_workers()
+        reporter.stop()
+        self.leases.close()
+        self._finish_run()
+        self.logger.log("✅ Inventário processado (ou execução parada).")
+
+# -------------------------
+# Motor de processos: downloads em vários processos, cada um com o próprio navegador
+# -------------------------
+
+# Código de saída de um processo que se aposentou (usos ou memória) e deve ser substituído
+WORKER_RETIRED = 3
+
+class QueueLogger:
+    # Logger do processo filho: log e status viram eventos tratados pelo logger do processo principal
+    def __init__(self, events):
+        self.events = events
+
+    def log(self, message: str):
+        self.events.put(("log", message))
+
+    def set_item_status(self, item_id: str, status: str):
+        self.events.put(("status", item_id, status))
+
+class MetricsRelay:
+    # Métricas do processo filho: cada registro é reaplicado no Metrics do processo principal
+    def __init__(self, events):
+        self.events = events
+
+    phase = Metrics.phase
+
+    def record(self, name: str, seconds: float, **fields):
+        self.events.put(("metric", "record", (name, seconds), fields))
+
+    def incr(self, name: str, n: int = 1):
+        self.events.put(("metric", "incr", (name, n), {}))
+
+    def failure(self, reason: str, **fields):
+        self.events.put(("metric", "failure", (reason,), fields))
+
+def _tree_rss_mb(pid: int):
+    # RSS do processo e de todos os descendentes (driver do playwright + Chromium); None fora do Linux
+    if not os.path.isdir("/proc"):
+        return None
+    children = {}
+    rss = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", encoding="utf-8") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        children.setdefault(int(fields[1]), []).append(int(name))
+        rss[int(name)] = int(fields[21])
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, ()))
+    return total * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+def _process_worker_main(jobs, events, settings, stop, retire, breaker_state, host_limiter, throttle_state):
+    # Corpo do processo filho (spawn): mesmo laço do DownloadWorker, com um navegador só dele.
+    # Sai com WORKER_RETIRED depois de worker_max_jobs arquivos ou quando o pai pede (memória).
+    pid = os.getpid()
+    logger = QueueLogger(events)
+    metrics = MetricsRelay(events)
+    http_pool = HttpPool() if settings.get("transfer", "browser") == "http" else None
+    # limite por host, ritmo por host e disjuntor são comuns a todos os processos
+    throttle = AdaptiveThrottle.from_settings(settings, stop, shared=throttle_state)
+    # novas tentativas vão para o agendador do pai
+    retry_scheduler = RetryRelay(events) if settings.get("retry_queue", True) else None
+    breaker = CircuitBreaker.from_settings(settings, logger, stop, shared=breaker_state)
+    max_jobs = int(settings.get("worker_max_jobs", 200))
+    handled = 0
+    code = 0
+    with sync_playwright() as p:
+        browser, context = launch_browser(p, settings)
+        page_pool = PagePool.from_settings(context, settings)
+        while not stop.is_set():
+            if retire.is_set() or (max_jobs and handled >= max_jobs):
+                code = WORKER_RETIRED
+                break
+            try:
+                job = jobs.get(timeout=0.5)
+            except Empty:
+                continue
+            if job is None:
+                break
+            file_url, visible_name, local_path = job[:3]
+            if not host_limiter.acquire(file_url, stop):
+                break
+            events.put(("start", pid, job))
+            save_path = None
+            try:
+                save_path = download_file(
+                    context, file_url, visible_name, local_path,
+                    logger=logger, http_pool=http_pool, throttle=throttle, page_pool=page_pool,
+                    metrics=metrics, attempt=job[3] if len(job) > 3 else 1, retry_scheduler=retry_scheduler,
+                    breaker=breaker, **download_options(settings)
+                )
+            except Exception as e:
+                logger.log(f"⚠️ Processo {pid}: falha inesperada em {visible_name}: {e}")
+            finally:
+                host_limiter.release(file_url)
+            if save_path is not RETRY_LATER:
+                events.put(("result", pid, file_url, local_path, save_path))
+            handled += 1
+        page_pool.close()
+        try:
+            browser.close()
+        except Exception:
+            pass
+    if http_pool:
+        http_pool.close()
+    sys.exit(code)
+
+class ProcessDownloaderThread(DownloaderThread):
+    # Crawl em threads no processo principal; downloads em `download_workers` processos (spawn), cada um
+    # com o próprio Chromium, lendo jobs de uma fila entre processos. Um supervisor repõe processos que
+    # morrem, travam num arquivo (worker_hang_timeout) ou passam de worker_max_rss_mb com os filhos.
+    def __init__(self, base_url, out_dir, settings, logger: GuiLogger, stop_event: threading.Event):
+        super().__init__(base_url, out_dir, settings, logger, stop_event)
+        self._mp = multiprocessing.get_context("spawn")
+        self.jobs = self._mp.Queue()
+        self.events = self._mp.Queue()
+        self._abort = self._mp.Event()
+        self._breaker_state = CircuitBreaker.shared_state(self._mp)
+        self._throttle_state = AdaptiveThrottle.shared_state(self._mp)
+        self._host_limiter = ProcessHostLimiter(
+            self._mp, settings.get("max_per_host", settings.get("download_workers", 3)))
+        self._slots = {}
+        self._slots_lock = threading.Lock()
+        # pid -> (job, início): arquivo em andamento em cada processo
+        self._inflight = {}
+        # processos que caíram: o job em andamento só é tratado depois que os eventos pendentes chegarem
+        self._orphans = []
+        self._requeued = set()
+        # (url, pasta) -> job entregue aos processos e ainda sem resultado; abandoned: os que a drenagem
+        # desistiu de esperar e marcou como falha
+        self._outstanding = {}
+        self._abandoned = set()
+        self._draining = False
+        self._supervisor_done = threading.Event()
+        self._pump_done = threading.Event()
+
+    def _put_job(self, job):
+        with self._slots_lock:
+            self._outstanding[(job[0], job[2])] = job
+        self.jobs.put(job)
+
+    def _spawn(self, slot_id):
+        retire = self._mp.Event()
+        process = self._mp.Process(
+            target=_process_worker_main, name=f"download-proc-{slot_id}", daemon=True,
+            args=(self.jobs, self.events, self.settings, self._abort, retire, self._breaker_state,
+                  self._host_limiter, self._throttle_state),
+        )
+        process.start()
+        with self._slots_lock:
+            self._slots[slot_id] = {"process": process, "retire": retire}
 
-from playwright.sync_api import sync_playwright
+    def _start_workers(self):
+        self._n_workers = max(1, int(self.settings.get("download_workers", 3)))
+        self.retry = RetryScheduler(self.jobs.put, self.stop_event)
+        for slot_id in range(1, self._n_workers + 1):
+            self._spawn(slot_id)
+        self._pump = threading.Thread(target=self._pump_events, daemon=True, name="process-events")
+        self._supervisor = threading.Thread(target=self._supervise, daemon=True, name="process-supervisor")
+        self._pump.start()
+        self._supervisor.start()
+        self.logger.log(f"🧩 {self._n_workers} processo(s) de download iniciados, cada um com o próprio navegador "
+                        f"(máx. {self._host_limiter.max_per_host} por host).")
 
-# -------------------------
-# Funções utilitárias (mesma lógica do script original)
-# -------------------------
+    def _pump_events(self):
+        # Único consumidor da fila de eventos: repassa log/status/métricas e registra os resultados
+        while True:
+            try:
+                event = self.events.get(timeout=0.5)
+            except Empty:
+                if self._pump_done.is_set():
+                    return
+                continue
+            kind = event[0]
+            if kind == "log":
+                self.logger.log(event[1])
+            elif kind == "status":
+                self.logger.set_item_status(event[1], event[2])
+            elif kind == "metric":
+                _, method, args, fields = event
+                getattr(self.metrics, method)(*args, **fields)
+            elif kind == "start":
+                with self._slots_lock:
+                    self._inflight[event[1]] = (event[2], time.monotonic())
+            elif kind == "retry":
+                # o job continua pendente: só sai do processo e espera o prazo no agendador
+                _, pid, job, delay = event
+                with self._slots_lock:
+                    self._inflight.pop(pid, None)
+                self.retry.schedule(job, delay)
+            elif kind == "result":
+                _, pid, file_url, local_path, save_path = event
+                with self._slots_lock:
+                    self._inflight.pop(pid, None)
+                    self._outstanding.pop((file_url, local_path), None)
+                    late = (file_url, local_path) in self._abandoned
+                    self._abandoned.discard((file_url, local_path))
+                if late:
+                    # resultado de um job que a drenagem já contou como falha
+                    if not save_path:
+                        continue
+                    with self._lock:
+                        self.stats["failed"] -= 1
+                self._record_result(file_url, local_path, save_path)
 
-def sanitize_filename(name: str) -> str:
-    return re.sub(r'[\\/*?:"<>|]', "_", name).strip()
+    def _supervise(self):
+        hang = float(self.settings.get("worker_hang_timeout", 900))
+        max_rss = float(self.settings.get("worker_max_rss_mb", 2048))
+        while not self._supervisor_done.wait(2.0):
+            if self.stop_event.is_set():
+                self._abort.set()
+                continue
+            self._handle_orphans()
+            with self._slots_lock:
+                slots = list(self._slots.items())
+            for slot_id, slot in slots:
+                process = slot["process"]
+                if process.exitcode is None:
+                    self._check_alive(slot_id, slot, hang, max_rss)
+                elif process.exitcode == 0 and self._draining:
+                    continue
+                else:
+                    if process.exitcode != WORKER_RETIRED:
+                        self.logger.log(f"💥 Processo {slot_id} terminou (código {process.exitcode}); reiniciando.")
+                        with self._slots_lock:
+                            self._orphans.append((process.pid, time.monotonic() + 2.0))
+                    self._spawn(slot_id)
 
-def clean_file_name(text: str) -> str:
-    text = re.sub(r'[^\w\s\-\.]', '', text, flags=re.UNICODE)
-    unwanted_prefixes = ["picture_as_pdf", "Resolva_", "arquivo_", "download_", "video_"]
-    for prefix in unwanted_prefixes:
-        if text.startswith(prefix):
-            text = text[len(prefix):]
-    remove_words = ["picture", "pdf", "arquivo", "baixar", "download", "documento", "file", "imagem", "video", "mp4"]
-    pattern = r'\b(?:' + '|'.join(remove_words) + r')\b'
-    text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-    text = re.sub(r'\s+', ' ', text).strip()
-    text = re.sub(r'\.(pdf|mp4|jpg|png|docx|xlsx|zip|rar)$', '', text, flags=re.IGNORECASE)
-    return text
+    def _check_alive(self, slot_id, slot, hang, max_rss):
+        process = slot["process"]
+        with self._slots_lock:
+            inflight = self._inflight.get(process.pid)
+        if hang and inflight and time.monotonic() - inflight[1] > hang:
+            self.logger.log(f"⏱️ Processo {slot_id} parado há {hang:.0f}s em {inflight[0][1]}; reiniciando.")
+            process.terminate()
+            process.join(5)
+            if process.exitcode is None:
+                process.kill()
+            return
+        if max_rss and not slot["retire"].is_set():
+            rss = _tree_rss_mb(process.pid)
+            if rss and rss > max_rss:
+                # aposentadoria limpa: termina o arquivo atual e sai; o supervisor põe outro no lugar
+                self.logger.log(f"🧹 Processo {slot_id} usando {rss:.0f} MB; será substituído após o arquivo atual.")
+                slot["retire"].set()
 
-def clean_folder_name(name: str) -> str:
-    name = re.sub(r'[^\w\s\-\.]', '', name)
-    unwanted_prefixes = ["folder", "pasta", "dir", "subfolder"]
-    for prefix in unwanted_prefixes:
-        if name.lower().startswith(prefix.lower()):
-            name = name[len(prefix):]
-    name = re.sub(r'\s+', ' ', name).strip()
-    return name
+    def _handle_orphans(self):
+        now = time.monotonic()
+        with self._slots_lock:
+            due = [pid for pid, at in self._orphans if at <= now]
+            self._orphans = [(pid, at) for pid, at in self._orphans if at > now]
+            lost = [self._inflight.pop(pid)[0] for pid in due if pid in self._inflight]
+        for job in lost:
+            file_url, visible_name, local_path = job[:3]
+            # o processo morreu segurando a vaga do host
+            try:
+                self._host_limiter.release(file_url)
+            except ValueError:
+                pass
+            with self._slots_lock:
+                again = (file_url, local_path) in self._requeued
+                self._requeued.add((file_url, local_path))
+            if again:
+                self.logger.log(f"❌ {visible_name}: o processo caiu duas vezes neste arquivo; marcado como falha.")
+                with self._slots_lock:
+                    self._outstanding.pop((file_url, local_path), None)
+                self._record_result(file_url, local_path, None)
+            else:
+                self.logger.log(f"🔁 {visible_name}: processo caiu durante o download; voltando para a fila.")
+                self.jobs.put(job)
 
-def normalize(url: str) -> str:
-    if url.startswith("http://") or url.startswith("https://"):
-        return url
-    return urljoin("https://drivedepobre.com", url)
+    def _abandon_outstanding(self):
+        # Fila vazia, nenhum processo ocupado e ainda há jobs sem resultado: o evento se perdeu (processo
+        # morto antes do "start", por exemplo). Cada um vira falha, contada e registrada no manifesto,
+        # e a próxima execução tenta de novo; um resultado que ainda chegue corrige a contagem.
+        with self._slots_lock:
+            lost = list(self._outstanding.values())
+            self._outstanding.clear()
+            self._abandoned.update((job[0], job[2]) for job in lost)
+        self.logger.log(f"⚠️ {len(lost)} arquivo(s) sem resposta dos processos há 30s; marcados como falha.")
+        for file_url, visible_name, local_path in (job[:3] for job in lost):
+            self.logger.log(f"❌ {visible_name}: nenhum processo devolveu resultado; marcado como falha.")
+            self._record_result(file_url, local_path, None)
+
+    def _stop_workers(self):
+        # Espera a fila esvaziar antes dos sentinelas: um job re-enfileirado depois deles ficaria sem dono
+        idle_since = None
+        while not self.stop_event.is_set():
+            with self._slots_lock:
+                pending, busy = len(self._outstanding), bool(self._inflight or self._orphans or self.retry.pending())
+            if pending <= 0:
+                break
+            if busy or not self.jobs.empty():
+                idle_since = None
+            elif idle_since is None:
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since > 30:
+                self._abandon_outstanding()
+                break
+            time.sleep(0.5)
+        if self.stop_event.is_set():
+            self._abort.set()
+        else:
+            self._draining = True
+            for _ in range(self._n_workers):
+                self.jobs.put(None)
+        deadline = None
+        while True:
+            with self._slots_lock:
+                processes = [slot["process"] for slot in self._slots.values()]
+            if self.stop_event.is_set():
+                self._abort.set()
+                if deadline is None:
+                    deadline = time.monotonic() + 30
+                if all(p.exitcode is not None for p in processes):
+                    break
+                if time.monotonic() > deadline:
+                    for p in processes:
+                        if p.exitcode is None:
+                            p.terminate()
+                    break
+            elif all(p.exitcode == 0 for p in processes):
+                break
+            time.sleep(0.5)
+        self.retry.close()
+        self._supervisor_done.set()
+        self._supervisor.join()
+        for p in processes:
+            p.join(5)
+        self._pump_done.set()
+        self._pump.join()
 
 # -------------------------
-# GUI-aware logging (thread-safe)
+# Motor asyncio (playwright.async_api): um browser, muitas páginas num único event loop
 # -------------------------
-class GuiLogger:
-    def __init__(self, text_widget: ScrolledText, list_widget: ttk.Treeview):
-        self.text_widget = text_widget
-        self.list_widget = list_widget
-        self.queue = Queue()
-        # Start polling the queue to display messages in the GUI
-    def log(self, message: str):
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        self.queue.put(f"[{timestamp}] {message}")
-    def poll(self):
-        try:
-            while True:
-                msg = self.queue.get_nowait()
-                # append to scrolled text
-                self.text_widget.configure(state="normal")
-                self.text_widget.insert(tk.END, msg + "\n")
-                self.text_widget.see(tk.END)
-                self.text_widget.configure(state="disabled")
-        except Empty:
-            pass
-        # schedule next poll by caller
 
-    def set_item_status(self, item_id: str, status: str):
-        # Update or insert an item into the treeview: (id, filename, status)
-        # Expect item_id to be unique path
+async def async_launch_browser(p, settings):
+    # O navegador é dividido entre crawl e downloads; as flags de pouca memória não mudam o DOM
+    return await p.chromium.launch(headless=True, slow_mo=settings.get("slow_mo", 0),
+                                   args=launch_args(settings, crawl=True), downloads_path=_downloads_path(settings))
+
+async def async_new_context(browser, settings, crawl: bool = False):
+    # Um contexto por raiz: cookies/sessão isolados, mesmo processo de navegador.
+    # crawl=True: contexto separado para as pastas, com recursos inúteis bloqueados.
+    lite = crawl and settings.get("crawl_lite", True)
+    context = await browser.new_context(
+        accept_downloads=not lite,
+        user_agent=settings.get("user_agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"),
+        **({"service_workers": "block"} if lite else {})
+    )
+    if lite:
+        await context.route("**/*", RequestBlocker.for_crawl(settings).async_handle)
+    return context
+
+def async_crawl_page_pool(context, settings, size: int = 1):
+    pool = AsyncPagePool.from_settings(context, settings, size)
+    if settings.get("crawl_lite", True):
+        pool.block_resources = False
+    return pool
+
+async def _async_close_quietly(page):
+    try:
+        await page.close()
+    except Exception:
+        pass
+
+class AsyncPagePool:
+    # PagePool para o motor asyncio: um pool por contexto, dividido pelas tasks da mesma raiz.
+    # As vagas do AsyncBudget já limitam quantas páginas ficam em uso; size limita as ociosas.
+    def __init__(self, context, size: int = 1, max_uses: int = 50, block_resources: bool = False):
+        self.context = context
+        self.size = max(1, int(size))
+        self.max_uses = max(1, int(max_uses))
+        self.block_resources = block_resources
+        self._idle = []
+        self._uses = {}
+
+    @classmethod
+    def from_settings(cls, context, settings, size: int = 1):
+        return cls(context, size, settings.get("page_max_uses", 50), settings.get("block_resources", False))
+
+    async def _new_page(self):
+        page = await self.context.new_page()
+        if self.block_resources:
+            await page.route("**/*", _default_blocker.async_handle)
+        self._uses[page] = 0
+        return page
+
+    async def _healthy(self, page) -> bool:
         try:
-            if self.list_widget.exists(item_id):
-                self.list_widget.set(item_id, "status", status)
-            else:
-                # insert with filename column and status column
-                filename = os.path.basename(item_id)
-                self.list_widget.insert("", "end", iid=item_id, values=(filename, status))
+            return not page.is_closed() and await page.evaluate("() => 1") == 1
         except Exception:
-            pass
+            return False
 
-# -------------------------
-# Lógica de download e crawling (preservada)
-# -------------------------
+    async def acquire(self):
+        while self._idle:
+            page = self._idle.pop()
+            if await self._healthy(page):
+                self._uses[page] += 1
+                return page
+            await self._discard(page)
+        page = await self._new_page()
+        self._uses[page] += 1
+        return page
+
+    async def release(self, page, healthy: bool = True):
+        if healthy and len(self._idle) < self.size and self._uses.get(page, self.max_uses) < self.max_uses \
+                and not page.is_closed():
+            self._idle.append(page)
+        else:
+            await self._discard(page)
+
+    async def _discard(self, page):
+        self._uses.pop(page, None)
+        await _async_close_quietly(page)
 
-def scroll_to_bottom(page, max_wait=5, step_delay=0.8, max_scrolls=1000, logger: GuiLogger=None):
+    @asynccontextmanager
+    async def page(self):
+        page = await self.acquire()
+        healthy = False
+        try:
+            yield page
+            healthy = True
+        finally:
+            await self.release(page, healthy)
+
+    async def close(self):
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+async def async_scroll_to_bottom(page, max_wait=5, step_delay=0.8, max_scrolls=1000, logger: GuiLogger=None,
+                                 on_step=None):
     if logger: logger.log("🌀 Iniciando scroll completo da página...")
-    last_height = page.evaluate("() => document.body.scrollHeight")
+    last_height = await page.evaluate("() => document.body.scrollHeight")
     stable_time = 0
     scroll_count = 0
     while scroll_count < max_scrolls:
-        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-        time.sleep(step_delay)
-        new_height = page.evaluate("() => document.body.scrollHeight")
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        await asyncio.sleep(step_delay)
+        if on_step: await on_step()
+        new_height = await page.evaluate("() => document.body.scrollHeight")
         if new_height == last_height:
             stable_time += step_delay
             if stable_time >= max_wait:
@@ -114,54 +3925,158 @@ def scroll_to_bottom(page, max_wait=5, step_delay=0.8, max_scrolls=1000, logger:
             stable_time = 0
             last_height = new_height
         scroll_count += 1
-    time.sleep(1)
+    await asyncio.sleep(1)
 
-def process_folder(page, folder_url, logger: GuiLogger=None):
+async def _async_confirm_listing_endpoint(pending, endpoint):
+    while pending and not endpoint:
+        req, param, number = pending.pop(0)
+        try:
+            resp = await req.response()
+            if resp and resp.ok and _looks_like_listing(await resp.text()):
+                endpoint.append((req.url, param, number))
+        except Exception:
+            continue
+
+async def async_scroll_until_idle(page, quiet_ms=1000, max_wait=5, max_scrolls=1000, use_listing_endpoint=True,
+                                  max_listing_pages=500, logger: GuiLogger=None, on_step=None):
+    # Mesma lógica de scroll_until_idle
+    if logger: logger.log("🌀 Iniciando scroll por eventos...")
+    inflight = set()
+    endpoint = []
+    pending = []
+    on_request = _listing_request_hook(page.url, inflight, endpoint, pending)
+
+    def on_done(req):
+        inflight.discard(req)
+
+    page.on("request", on_request)
+    page.on("requestfinished", on_done)
+    page.on("requestfailed", on_done)
+    try:
+        items = await page.evaluate(_SCROLL_OBSERVER_JS, ITEM_SELECTOR)
+        scroll_count = 0
+        while scroll_count < max_scrolls:
+            await page.evaluate(_SCROLL_STEP_JS)
+            scroll_count += 1
+            deadline = time.monotonic() + max_wait
+            while True:
+                try:
+                    await page.wait_for_function(_SCROLL_SETTLED_JS, arg=[items, quiet_ms], polling=100,
+                                                 timeout=max(1, (deadline - time.monotonic()) * 1000))
+                except Exception:
+                    break
+                if not inflight or time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(0.1)
+            new_items = await page.evaluate("() => window.__ddpScroll.count")
+            if on_step and new_items > items: await on_step()
+
+            if use_listing_endpoint:
+                await _async_confirm_listing_endpoint(pending, endpoint)
+            if endpoint and use_listing_endpoint:
+                url, param, number = endpoint[0]
+                pages = await page.evaluate(_FETCH_LISTING_JS, {
+                    "url": url, "param": param, "start": number + 1,
+                    "sel": ITEM_SELECTOR, "maxPages": max_listing_pages
+                })
+                if logger: logger.log(f"⚡ Listagem paginada lida direto do endpoint ({pages} página(s) extra).")
+                break
+            if new_items <= items and not inflight:
+                if logger: logger.log(f"✅ Scroll finalizado após {scroll_count} roladas.")
+                break
+            items = new_items
+    finally:
+        page.remove_listener("request", on_request)
+        page.remove_listener("requestfinished", on_done)
+        page.remove_listener("requestfailed", on_done)
+
+async def async_extract_links(page, only_new: bool = False):
+    subs, files = await page.evaluate(_EXTRACT_LINKS_JS, [SUBFOLDER_SELECTOR, FILE_SELECTOR, only_new])
+    return _links_from_raw(subs, files, _page_base(page))
+
+async def async_process_folder(page, folder_url, logger: GuiLogger=None, scroll_mode: str = "poll", on_links=None,
+                               metrics: Metrics = None, scroll_args: dict = None):
     if logger: logger.log(f"📂 Acessando pasta: {folder_url}")
     try:
-        page.goto(folder_url, wait_until="domcontentloaded", timeout=90000)
+        with _phase(metrics, "folder_navigate"):
+            await page.goto(folder_url, wait_until="domcontentloaded", timeout=90000)
     except Exception as e:
         if logger: logger.log(f"⚠️ Erro ao acessar {folder_url}: {e}")
+        if metrics: metrics.failure("folder_navigate", url=folder_url)
         return [], []
 
-    time.sleep(1)
-    # Scroll usando função original
+    emit = None
+    if on_links:
+        async def emit():
+            new_subfolders, new_files = await async_extract_links(page, only_new=True)
+            if new_subfolders or new_files:
+                on_links(new_subfolders, new_files)
+
     try:
-        scroll_to_bottom(page, logger=logger)
+        with _phase(metrics, "folder_scroll", mode=scroll_mode):
+            if emit: await emit()
+            if scroll_mode == "events":
+                await async_scroll_until_idle(page, logger=logger, on_step=emit, **(scroll_args or {}))
+            else:
+                await asyncio.sleep(1)
+                await async_scroll_to_bottom(page, logger=logger, on_step=emit, **(scroll_args or {}))
     except Exception as e:
         if logger: logger.log(f"⚠️ Erro no scroll: {e}")
+        if metrics: metrics.failure("folder_scroll", url=folder_url)
 
-    # Seletores originais
-    subfolder_anchors = page.locator("a.text-dark.fw-medium[href^='/pasta/']").all()
-    subfolders = []
-    for a in subfolder_anchors:
-        href = a.get_attribute("href")
-        if not href:
-            continue
-        full_url = normalize(href)
-        try:
-            visible_name = a.evaluate("el => el.childNodes[el.childNodes.length-1].textContent.trim()")
-        except Exception:
-            visible_name = "subfolder"
-        subfolders.append((full_url, visible_name))
-
-    file_anchors = page.locator("a[href^='/arquivo/'], a[href^='/pdf/'], a[href$='.html']").all()
-    file_links = []
-    for a in file_anchors:
-        href = a.get_attribute("href")
-        if not href:
-            continue
-        full_url = normalize(href)
-        try:
-            visible_name = a.evaluate("el => el.childNodes[el.childNodes.length-1].textContent.trim()")
-        except Exception:
-            visible_name = "file"
-        file_links.append((full_url, visible_name))
+    with _phase(metrics, "folder_extract"):
+        if emit: await emit()
+        subfolders, file_links = await async_extract_links(page)
+    if metrics:
+        metrics.incr("folders")
+        metrics.incr("links", len(subfolders) + len(file_links))
 
     if logger: logger.log(f"📑 Links encontrados: {len(file_links)} arquivos, {len(subfolders)} pastas.")
     return subfolders, file_links
 
-def download_file(
+async def _async_direct_download_href(page, link_direct):
+    try:
+        if await link_direct.count() == 0:
+            return None
+        href = await link_direct.first.get_attribute("href")
+    except Exception:
+        return None
+    if not href or href.startswith(("blob:", "data:", "javascript:")):
+        return None
+    return urljoin(page.url, href)
+
+async def _async_wait_for_download_control(page, btn_download, link_direct,
+                                          timeout_ms=DOWNLOAD_BUTTON_TIMEOUT_MS):
+    try:
+        await btn_download.or_(link_direct).first.wait_for(state="attached", timeout=timeout_ms)
+    except AsyncPlaywrightTimeoutError:
+        raise Exception("Botão/link de download não encontrado.")
+
+async def _async_click_and_race_download(page, btn_download, link_direct, timeout_ms):
+    # Mesma corrida da versão sync, com asyncio.wait no primeiro que completar
+    download_task = asyncio.ensure_future(page.wait_for_event("download", timeout=timeout_ms))
+    error_task = asyncio.ensure_future(
+        page.locator(ERROR_BANNER_SELECTOR).first.wait_for(state="attached", timeout=timeout_ms)
+    )
+    try:
+        if await btn_download.count() > 0:
+            await btn_download.first.click()
+        else:
+            await link_direct.first.click()
+        done, _ = await asyncio.wait({download_task, error_task}, return_when=asyncio.FIRST_COMPLETED)
+        if download_task in done:
+            return download_task.result()
+        if error_task.exception() is None:
+            raise Exception("Interface exibiu: Erro no download.")
+        # banner não apareceu até o timeout: o download também estourou (ou está para estourar)
+        return await download_task
+    finally:
+        for task in (download_task, error_task):
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(download_task, error_task, return_exceptions=True)
+
+async def async_download_file(
     context,
     file_url,
     visible_name,
@@ -169,174 +4084,484 @@ def download_file(
     logger: GuiLogger = None,
     max_attempts: int = 4,
     pre_wait_random: tuple = (5, 10),
+    post_save_random: tuple = (2, 5),
     retry_random_delay: tuple = (5, 15),
-    expect_download_timeout: int = 120000
+    expect_download_timeout: int = 120000,
+    transfer: str = "browser",
+    http_pool: HttpPool = None,
+    user_agent: str = None,
+    http_options: dict = None,
+    throttle: AdaptiveThrottle = None,
+    page_pool: AsyncPagePool = None,
+    metrics: Metrics = None,
+    fsync: str = "file",
+    attempt: int = 1,
+    retry_scheduler=None,
+    breaker: CircuitBreaker = None
 ):
+    # Versão async de download_file; as esperas não bloqueiam os outros downloads do loop
     os.makedirs(local_path, exist_ok=True)
-    attempt = 1
+    use_http = transfer == "http" and http_pool is not None
+    # chave do item na tabela/contadores: a mesma de "na fila" até "concluído", antes da limpeza do nome
+    item_id = os.path.join(local_path, visible_name)
+    started = time.monotonic()
+
+    async def release(page, healthy=True):
+        if page_pool:
+            await page_pool.release(page, healthy)
+        else:
+            await _async_close_quietly(page)
 
     while attempt <= max_attempts:
-        page = context.new_page()
+        if breaker and not await breaker.async_wait():
+            return None
+        if throttle:
+            remaining = throttle.reserve(file_url)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+        page = await page_pool.acquire() if page_pool else await context.new_page()
         try:
             if logger:
                 logger.log(f"📥 Baixando ({attempt}/{max_attempts}): {visible_name} -> {local_path}")
-                logger.set_item_status(os.path.join(local_path, visible_name), f"baixando ({attempt})")
+                logger.set_item_status(item_id, f"baixando ({attempt})")
 
-            page.goto(file_url, wait_until="domcontentloaded", timeout=60000)
-            time.sleep(random.randint(*pre_wait_random))
+            with _phase(metrics, "file_navigate"):
+                _raise_for_status(await page.goto(file_url, wait_until="domcontentloaded", timeout=60000), file_url)
+            if throttle is None:
+                await asyncio.sleep(random.randint(*pre_wait_random))
 
             btn_download = page.locator("text=Download")
             link_direct = page.locator("a[download]")
 
             # Aguarda botão/link aparecer
-            found = False
-            for _ in range(30):
+            with _phase(metrics, "button_wait"):
+                await _async_wait_for_download_control(page, btn_download, link_direct)
+
+            direct_url = await _async_direct_download_href(page, link_direct) if use_http else None
+            download = None
+            if direct_url is None:
+                with _phase(metrics, "click_to_download"):
+                    download = await _async_click_and_race_download(page, btn_download, link_direct,
+                                                                    expect_download_timeout)
+
+            if use_http and (direct_url or download.url.startswith(("http://", "https://"))):
+                url = direct_url or download.url
+                suggested = None
+                if download is not None:
+                    suggested = download.suggested_filename
+                    await download.cancel()
+                headers = {"Referer": page.url, "Accept": "*/*"}
+                if user_agent:
+                    headers["User-Agent"] = user_agent
+                cookies = format_cookies(await context.cookies(url))
+                if cookies:
+                    headers["Cookie"] = cookies
+                await release(page)
+                page = None
+                # o stream HTTP é bloqueante: roda numa thread para não travar o loop
+                with _phase(metrics, "transfer", mode="http"):
+                    save_path = await asyncio.to_thread(
+                        http_download, http_pool, url, local_path, visible_name, suggested, headers,
+                        logger=logger, **(http_options or {})
+                    )
+            else:
+                save_path = unique_save_path(local_path, target_name(visible_name, download.suggested_filename))
                 try:
-                    if btn_download.count() > 0 or link_direct.count() > 0:
-                        found = True
-                        break
+                    with _phase(metrics, "transfer", mode="browser"):
+                        await async_save_download(download, save_path, fsync)
                 except Exception:
-                    pass
-                time.sleep(1)
+                    release_save_path(save_path)
+                    raise
+
+            if logger:
+                logger.log(f"✅ Arquivo salvo: {save_path}")
+                logger.set_item_status(item_id, "concluído")
+            if metrics:
+                _record_file_metrics(metrics, file_url, save_path, attempt, started)
 
-            if not found:
-                raise Exception("Botão/link de download não encontrado.")
+            if breaker:
+                breaker.success()
+            if throttle:
+                throttle.success(file_url)
+            else:
+                await asyncio.sleep(random.randint(*post_save_random))
+            if page is not None:
+                await release(page)
+            return save_path
+
+        except Exception as e:
+            if logger:
+                logger.log(f"❌ Erro no download ({attempt}/{max_attempts}): {e}")
+                logger.set_item_status(item_id, f"erro ({attempt})")
+
+            kind = classify_failure(e)
+            pause = throttle.failure(file_url, kind) if throttle else 0
+            if breaker:
+                breaker.failure(kind)
+            if metrics:
+                metrics.failure(kind or type(e).__name__, url=file_url, attempt=attempt)
+            attempt += 1
+            if page is not None:
+                await release(page, healthy=False)
 
-            # 🧩 Verifica o nome do arquivo antes de tentar baixar
-            visible_lower = visible_name.lower()
-            if not (visible_lower.endswith(".pdf") or visible_lower.endswith(".mp4")):
+            if attempt <= retry_limit(kind, max_attempts) and retry_scheduler is not None:
+                if metrics:
+                    metrics.incr("retries")
+                delay = retry_scheduler.retry_later((file_url, visible_name, local_path), attempt, kind, pause)
                 if logger:
-                    logger.log(f"🚫 Ignorado (não é PDF/MP4): {visible_name}")
-                    logger.set_item_status(os.path.join(local_path, visible_name), "ignorado")
-                page.close()
-                return  # pula este arquivo
-
-            # Clica e verifica erro visual
-            with page.expect_download(timeout=expect_download_timeout) as download_info:
-                if btn_download.count() > 0:
-                    btn_download.first.click()
+                    logger.log(f"⏳ {visible_name}: nova tentativa ({kind or 'erro'}) em ~{delay:.0f}s; "
+                               f"os outros arquivos seguem.")
+                    logger.set_item_status(item_id, f"nova tentativa ({attempt})")
+                return RETRY_LATER
+            if attempt <= retry_limit(kind, max_attempts):
+                if metrics:
+                    metrics.incr("retries")
+                if throttle:
+                    delay = pause or throttle.retry_delay(attempt - 1)
+                    if logger:
+                        logger.log(f"🔄 Tentando novamente em ~{delay:.0f}s ({throttle.describe(file_url)})...")
+                    if not pause:
+                        await asyncio.sleep(delay)
                 else:
-                    link_direct.first.click()
+                    delay = random.randint(*retry_random_delay)
+                    if logger:
+                        logger.log(f"🔄 Tentando novamente em {delay}s...")
+                    await asyncio.sleep(delay)
+            else:
+                if logger:
+                    logger.log(f"⚠️ Arquivo {visible_name} pulado após {attempt - 1} tentativa(s).")
+                    logger.set_item_status(item_id, "pulado")
+                if metrics:
+                    metrics.incr("files_failed")
+                return None
+    return None
 
-                # ⏳ Espera um pouco e verifica mensagem de erro
-                time.sleep(5)
-                if page.locator('text="Erro no download."').count() > 0:
-                    raise Exception("Interface exibiu: Erro no download.")
+class PrioritySlots:
+    # Semáforo asyncio em que, havendo disputa, é atendido primeiro quem tem a menor prioridade
+    def __init__(self, size: int):
+        self._free = max(1, int(size))
+        self._waiters = []
+        self._seq = 0
 
-            download = download_info.value
+    async def acquire(self, priority=0):
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(self._waiters, (priority, self._seq, fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
 
-            # 💾 Salva arquivo com nome limpo
-            suggested = download.suggested_filename
-            ext = os.path.splitext(suggested)[1] if suggested else ""
-            if visible_name.lower().endswith(".mp4"):
-                final_name = sanitize_filename(visible_name)
-            else:
-                final_name = sanitize_filename(clean_file_name(visible_name).rstrip(".") + ext)
+    def release(self):
+        while self._waiters:
+            fut = heapq.heappop(self._waiters)[2]
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._free += 1
 
-            save_path = os.path.join(local_path, final_name)
-            base, ext = os.path.splitext(save_path)
-            counter = 1
-            while os.path.exists(save_path):
-                save_path = f"{base} ({counter}){ext}"
-                counter += 1
+    @asynccontextmanager
+    async def slot(self, priority=0):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
 
-            download.save_as(save_path)
+class AsyncBudget:
+    # Recursos do motor asyncio divididos por todas as raízes do mesmo event loop:
+    # vagas de varredura e de download, limite por host, cortesia por host e pool HTTP
+    def __init__(self, settings, logger: GuiLogger = None, stop_event: threading.Event = None):
+        self.n_crawl = max(1, int(settings.get("crawl_pages", 2)))
+        self.n_download = max(1, int(settings.get("download_workers", 3)))
+        self.max_per_host = max(1, int(settings.get("max_per_host", self.n_download)))
+        self.crawl_slots = PrioritySlots(self.n_crawl)
+        self.download_slots = PrioritySlots(self.n_download)
+        self.politeness = HostPoliteness(settings.get("crawl_host_delay", 1.0))
+        self.http_pool = HttpPool(max_idle_per_host=self.max_per_host) \
+            if settings.get("transfer", "browser") == "http" else None
+        self.throttle = AdaptiveThrottle.from_settings(settings)
+        self.breaker = CircuitBreaker.from_settings(settings, logger, stop_event)
+        self._host_slots = {}
 
-            if logger:
-                logger.log(f"✅ Arquivo salvo: {save_path}")
-                logger.set_item_status(save_path, "concluído")
+    def host_slot(self, url):
+        host = urlparse(url).netloc
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return slot
 
-            time.sleep(random.randint(2, 5))
-            page.close()
+    def close(self):
+        if self.http_pool:
+            self.http_pool.close()
+
+class AsyncRootJob(_RootPipeline):
+    # Uma pasta raiz no motor asyncio: cada pasta e cada arquivo vira uma task. Várias raízes podem
+    # dividir o mesmo navegador (um contexto por raiz) e o mesmo AsyncBudget. Manifesto, cache de
+    # pastas e dedup (SQLite, sha256, cópias) rodam em asyncio.to_thread, fora do event loop.
+    def __init__(self, base_url, out_dir, settings, logger: GuiLogger, stop_event: threading.Event,
+                 priority: int = 0, metrics: Metrics = None):
+        self._init_root(base_url, out_dir, settings, logger, stop_event, metrics)
+        self.priority = priority
+
+    def _put_folder(self, item, priority):
+        self._spawn(self._crawl(item, priority))
+
+    def _put_job(self, job):
+        self._spawn(self._download(job))
+
+    def _spawn(self, coro):
+        # também chamado das threads do to_thread (enfileiramento pelo manifesto/dedup)
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if not on_loop:
+            self._loop.call_soon_threadsafe(self._spawn, coro)
             return
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
 
+    async def _crawl(self, item, depth):
+        folder_url, folder_name, local_path, _ = item
+        try:
+            # pasta no prazo do cache não ocupa vaga de crawl nem abre página
+            if await asyncio.to_thread(self._replay_cached, folder_url, local_path, depth):
+                return
         except Exception as e:
-            if logger:
-                logger.log(f"❌ Erro no download ({attempt}/{max_attempts}): {e}")
-                logger.set_item_status(os.path.join(local_path, visible_name), f"erro ({attempt})")
-
-            attempt += 1
+            self.logger.log(f"⚠️ Cache de pastas indisponível para {folder_url}: {e}")
+        async with self._budget.crawl_slots.slot((self.priority, depth)):
+            if self.stop_event.is_set():
+                return
+            remaining = self._budget.politeness.reserve(folder_url)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            page = await self._crawl_pages.acquire()
+            healthy = False
             try:
-                page.close()
-            except Exception:
-                pass
+                await self._async_scan_folder(page, folder_url, local_path, depth)
+                healthy = True
+            except Exception as e:
+                self.logger.log(f"⚠️ Erro ao processar pasta {folder_url}: {e}")
+            finally:
+                await self._crawl_pages.release(page, healthy)
 
-            if attempt <= max_attempts:
-                retry_delay = random.randint(*retry_random_delay)
-                if logger:
-                    logger.log(f"🔄 Tentando novamente em {retry_delay}s...")
-                time.sleep(retry_delay)
-            else:
-                if logger:
-                    logger.log(f"⚠️ Arquivo {visible_name} pulado após {max_attempts} tentativas.")
-                    logger.set_item_status(os.path.join(local_path, visible_name), "pulado")
+    def retry_later(self, job, attempt: int, kind, pause: float = 0.0) -> float:
+        # Fila de novas tentativas do motor asyncio: uma task que dorme fora das vagas de download
+        delay = retry_delay(kind, attempt - 1, pause)
+        self._spawn(self._retry_after(delay, job[:3] + (attempt,)))
+        return delay
 
-# -------------------------
-# Thread de execução principal (para não travar a GUI)
-# -------------------------
+    async def _retry_after(self, delay, job):
+        deadline = time.monotonic() + delay
+        while not self.stop_event.is_set() and time.monotonic() < deadline:
+            await asyncio.sleep(min(1.0, deadline - time.monotonic()))
+        if not self.stop_event.is_set():
+            await self._download(job)
+
+    async def _download(self, job):
+        file_url, visible_name, local_path = job[:3]
+        async with self._budget.download_slots.slot((self.priority, 0)), self._budget.host_slot(file_url):
+            if self.stop_event.is_set() or (self.manifest and self.manifest.is_done(file_url, local_path)):
+                return
+            try:
+                save_path = await async_download_file(
+                    self._context,
+                    file_url,
+                    visible_name,
+                    local_path,
+                    logger=self.logger,
+                    http_pool=self._budget.http_pool,
+                    throttle=self._budget.throttle,
+                    page_pool=self._download_pages,
+                    metrics=self.metrics,
+                    attempt=job[3] if len(job) > 3 else 1,
+                    retry_scheduler=self if self.settings.get("retry_queue", True) else None,
+                    breaker=self._budget.breaker,
+                    **download_options(self.settings)
+                )
+                if save_path is not RETRY_LATER:
+                    await asyncio.to_thread(self._record_result, file_url, local_path, save_path)
+            except Exception as e:
+                self.logger.log(f"⚠️ Falha inesperada em {visible_name}: {e}")
+
+    async def run(self, browser, budget: AsyncBudget):
+        self._budget = budget
+        self._loop = asyncio.get_running_loop()
+        self._tasks = set()
+        await asyncio.to_thread(self._open_manifest)
+        self._context = await async_new_context(browser, self.settings)
+        self._crawl_context = await async_new_context(browser, self.settings, crawl=True) \
+            if self.settings.get("crawl_lite", True) else self._context
+        self._crawl_pages = async_crawl_page_pool(self._crawl_context, self.settings, budget.n_crawl)
+        self._download_pages = AsyncPagePool.from_settings(self._context, self.settings, budget.n_download)
+        try:
+            await asyncio.to_thread(self._seed_frontier)
+            while self._tasks:
+                await asyncio.wait(set(self._tasks))
+        finally:
+            await self._crawl_pages.close()
+            await self._download_pages.close()
+            for context in {self._crawl_context, self._context}:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            self._finish_run()
 
-class DownloaderThread(threading.Thread):
+class AsyncDownloaderThread(threading.Thread):
+    # Uma raiz no motor asyncio, com navegador e orçamento próprios
     def __init__(self, base_url, out_dir, settings, logger: GuiLogger, stop_event: threading.Event):
         super().__init__(daemon=True)
-        self.base_url = base_url
-        self.out_dir = out_dir
-        self.settings = settings
+        self.settings = with_download_dir(settings, out_dir)
         self.logger = logger
-        self.stop_event = stop_event
-        self.visited_folders = set()
+        self.job = AsyncRootJob(base_url, out_dir, settings, logger, stop_event)
 
     def run(self):
-        # Inicia playwright e aplica configuracões
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True, slow_mo=self.settings.get("slow_mo", 0))
-            context = browser.new_context(
-                accept_downloads=True,
-                user_agent=self.settings.get("user_agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64)")
-            )
-            page = context.new_page()
+        reporter = MetricsReporter(self.job.metrics, self.logger, self.settings.get("metrics_interval", 30),
+                                   self.settings)
+        reporter.start()
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            self.logger.log(f"⚠️ Erro no motor asyncio: {e}")
+        reporter.stop()
+        self.logger.log("✅ Todos os arquivos/pastas processados (ou execução parada).")
 
-            folders_to_visit = [(self.base_url, "", self.out_dir)]
-            while folders_to_visit and not self.stop_event.is_set():
-                folder_url, folder_name, local_path = folders_to_visit.pop(0)
-                if folder_url in self.visited_folders:
-                    continue
-                self.visited_folders.add(folder_url)
+    async def _main(self):
+        budget = AsyncBudget(self.settings, self.logger, self.job.stop_event)
+        try:
+            async with async_playwright() as p:
+                browser = await async_launch_browser(p, self.settings)
+                self.logger.log(
+                    f"⚡ Motor asyncio: até {budget.n_crawl} pasta(s) e {budget.n_download} download(s) "
+                    f"simultâneos (máx. {budget.max_per_host} por host) num único navegador."
+                )
+                try:
+                    await self.job.run(browser, budget)
+                finally:
+                    try:
+                        await browser.close()
+                    except Exception:
+                        pass
+        finally:
+            budget.close()
+
+class PrefixLogger:
+    # Identifica de qual job veio cada mensagem quando várias raízes rodam juntas
+    def __init__(self, logger: GuiLogger, prefix: str):
+        self.logger = logger
+        self.prefix = prefix
 
-                subfolders, files = process_folder(page, folder_url, logger=self.logger)
+    def log(self, message: str):
+        self.logger.log(f"{self.prefix}{message}")
 
-                # pequena espera entre visitas
-                time.sleep(random.randint(*self.settings.get("between_folder_wait", (3,7))))
+    def set_item_status(self, item_id: str, status: str):
+        self.logger.set_item_status(item_id, status)
 
-                for sub_url, sub_name in subfolders:
-                    if self.stop_event.is_set():
-                        break
-                    sub_name_clean = clean_folder_name(sub_name)
-                    sub_local_path = os.path.join(local_path, sub_name_clean)
-                    if sub_url not in self.visited_folders:
-                        folders_to_visit.append((sub_url, sub_name_clean, sub_local_path))
+class JobScheduler(threading.Thread):
+    # Várias pastas raiz. Motor asyncio: todas num único navegador (um contexto por raiz), com orçamento
+    # global de varreduras/downloads; prioridade menor = atendida primeiro quando as vagas estão
+    # disputadas. Motores threads/processes: navegador e processos são de cada raiz, então as raízes
+    # rodam uma depois da outra, na ordem de prioridade.
+    def __init__(self, roots, settings, logger: GuiLogger, stop_event: threading.Event, report_interval: float = 30):
+        # roots: [(url, out_dir, prioridade)]
+        super().__init__(daemon=True)
+        # um navegador para todas as raízes: temporários no diretório comum a elas
+        self.settings = with_download_dir(settings, os.path.commonpath([out_dir for _, out_dir, _ in roots]))
+        self.root_settings = settings
+        self.engine = settings.get("engine", "threads")
+        self.roots = sorted(roots, key=lambda r: r[2])
+        self.logger = logger
+        self.stop_event = stop_event
+        self.report_interval = report_interval
+        self.metrics = Metrics.from_settings(settings)
+        # [(nome, job, prioridade)]; nos motores sequenciais cada raiz entra quando começa
+        self.jobs = []
+        if self.engine == "asyncio":
+            self.jobs = [
+                (root_slug(url), AsyncRootJob(url, out_dir, settings, PrefixLogger(logger, f"[{root_slug(url)}] "),
+                                              stop_event, priority, self.metrics), priority)
+                for url, out_dir, priority in self.roots
+            ]
 
-                for file_url, visible_name in files:
-                    if self.stop_event.is_set():
-                        break
-                    # registra no logger/lista
-                    self.logger.set_item_status(os.path.join(local_path, visible_name), "na fila")
-                    download_file(
-                        context,
-                        file_url,
-                        visible_name,
-                        local_path,
-                        logger=self.logger,
-                        max_attempts=self.settings.get("max_attempts", 4),
-                        pre_wait_random=self.settings.get("pre_wait_random", (5,10)),
-                        retry_random_delay=self.settings.get("retry_random_delay", (5,15)),
-                        expect_download_timeout=self.settings.get("expect_download_timeout", 120000)
-                    )
+    def run(self):
+        if self.engine != "asyncio":
+            self._run_sequential()
+            return
+        reporter = MetricsReporter(self.metrics, self.logger, self.report_interval, self.settings)
+        reporter.start()
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            self.logger.log(f"⚠️ Erro no agendador: {e}")
+        reporter.stop()
+        self.logger.log("✅ Todos os jobs processados (ou execução parada).")
 
-            try:
-                browser.close()
-            except Exception:
-                pass
-            self.logger.log("✅ Todos os arquivos/pastas processados (ou execução parada).")
+    def _run_sequential(self):
+        # Cada raiz roda inteira nesta thread, com métricas e relatório próprios do motor
+        cls = downloader_class(self.root_settings)
+        self.logger.log(f"🗂️ {len(self.roots)} job(s) em sequência (motor {self.engine}).")
+        try:
+            for url, out_dir, priority in self.roots:
+                if self.stop_event.is_set():
+                    break
+                name = root_slug(url)
+                self.logger.log(f"▶️ Job [{name}] (prioridade {priority}): {url} -> {out_dir}")
+                job = cls(url, out_dir, self.root_settings, PrefixLogger(self.logger, f"[{name}] "), self.stop_event)
+                self.jobs.append((name, job, priority))
+                job.run()
+        except Exception as e:
+            self.logger.log(f"⚠️ Erro no agendador: {e}")
+        self._report(final=True)
+        self.logger.log("✅ Todos os jobs processados (ou execução parada).")
+
+    def _report(self, final=False):
+        for name, job, priority in self.jobs:
+            self.logger.log(f"📊 {'Final' if final else 'Progresso'} [{name}] (prioridade {priority}): {job.progress_line()}")
+
+    async def _reporter(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self._report()
+
+    async def _main(self):
+        budget = AsyncBudget(self.settings, self.logger, self.stop_event)
+        try:
+            async with async_playwright() as p:
+                browser = await async_launch_browser(p, self.settings)
+                self.logger.log(
+                    f"🗂️ {len(self.jobs)} job(s) num único navegador: até {budget.n_crawl} pasta(s) e "
+                    f"{budget.n_download} download(s) simultâneos no total."
+                )
+                reporter = asyncio.create_task(self._reporter())
+                try:
+                    results = await asyncio.gather(*(job.run(browser, budget) for _, job, _ in self.jobs),
+                                                   return_exceptions=True)
+                finally:
+                    reporter.cancel()
+                    try:
+                        await browser.close()
+                    except Exception:
+                        pass
+            for (name, _, _), result in zip(self.jobs, results):
+                if isinstance(result, Exception):
+                    self.logger.log(f"⚠️ Job {name} terminou com erro: {result}")
+            self._report(final=True)
+        finally:
+            budget.close()
+
+def downloader_class(settings):
+    engine = settings.get("engine", "threads")
+    if engine == "asyncio":
+        return AsyncDownloaderThread
+    return ProcessDownloaderThread if engine == "processes" else DownloaderThread
 
 # -------------------------
 # GUI
@@ -346,7 +4571,7 @@ class App:
     def __init__(self, root):
         self.root = root
         root.title("Downloader Drivedepobre — GUI")
-        root.geometry("900x640")
+        root.geometry("1000x760")
         style = ttk.Style(root)
         # tenta tema nativo, se disponível
         try:
@@ -387,9 +4612,14 @@ class App:
         self.entry_step_delay.insert(0, "0.8")
         self.entry_step_delay.grid(row=0, column=5, sticky=tk.W, padx=(6,20))
 
+        ttk.Label(frm_opts, text="Scroll:").grid(row=0, column=6, sticky=tk.W)
+        self.combo_scroll_mode = ttk.Combobox(frm_opts, values=("eventos", "intervalo fixo"), width=12, state="readonly")
+        self.combo_scroll_mode.set("eventos")
+        self.combo_scroll_mode.grid(row=0, column=7, sticky=tk.W, padx=(6,0))
+
         ttk.Label(frm_opts, text="Pre-wait random (s) min,max:").grid(row=1, column=0, sticky=tk.W, pady=(6,0))
         self.entry_prewait = ttk.Entry(frm_opts, width=10)
-        self.entry_prewait.insert(0, "5,10")
+        self.entry_prewait.insert(0, "auto")
         self.entry_prewait.grid(row=1, column=1, sticky=tk.W, padx=(6,20), pady=(6,0))
 
         ttk.Label(frm_opts, text="Retry delay random (s) min,max:").grid(row=1, column=2, sticky=tk.W, pady=(6,0))
@@ -402,6 +4632,83 @@ class App:
         self.entry_expect_timeout.insert(0, "120000")
         self.entry_expect_timeout.grid(row=1, column=5, sticky=tk.W, padx=(6,20), pady=(6,0))
 
+        # "auto": esperas do ritmo fixo; nenhuma quando o ritmo adaptativo já controla o site
+        ttk.Label(frm_opts, text="Pós-download (s) min,max:").grid(row=1, column=6, sticky=tk.W, pady=(6,0))
+        self.entry_postsave = ttk.Entry(frm_opts, width=10)
+        self.entry_postsave.insert(0, "auto")
+        self.entry_postsave.grid(row=1, column=7, sticky=tk.W, padx=(6,0), pady=(6,0))
+
+        ttk.Label(frm_opts, text="Downloads simultâneos:").grid(row=2, column=0, sticky=tk.W, pady=(6,0))
+        self.spin_workers = ttk.Spinbox(frm_opts, from_=1, to=16, width=5)
+        self.spin_workers.set(3)
+        self.spin_workers.grid(row=2, column=1, sticky=tk.W, padx=(6,20), pady=(6,0))
+
+        ttk.Label(frm_opts, text="Máx. simultâneos por host:").grid(row=2, column=2, sticky=tk.W, pady=(6,0))
+        self.spin_max_per_host = ttk.Spinbox(frm_opts, from_=1, to=16, width=5)
+        self.spin_max_per_host.set(3)
+        self.spin_max_per_host.grid(row=2, column=3, sticky=tk.W, padx=(6,20), pady=(6,0))
+
+        ttk.Label(frm_opts, text="Extensões incluídas:").grid(row=3, column=0, sticky=tk.W, pady=(6,0))
+        self.entry_include_exts = ttk.Entry(frm_opts, width=14)
+        self.entry_include_exts.insert(0, "pdf,mp4")
+        self.entry_include_exts.grid(row=3, column=1, sticky=tk.W, padx=(6,20), pady=(6,0))
+
+        ttk.Label(frm_opts, text="Excluir (glob ou re:regex):").grid(row=3, column=2, sticky=tk.W, pady=(6,0))
+        self.entry_exclude_patterns = ttk.Entry(frm_opts, width=24)
+        self.entry_exclude_patterns.grid(row=3, column=3, columnspan=3, sticky=tk.W, padx=(6,20), pady=(6,0))
+
+        ttk.Label(frm_opts, text="Transferência:").grid(row=4, column=4, sticky=tk.W, pady=(6,0))
+        self.combo_transfer = ttk.Combobox(frm_opts, values=("navegador", "http direto"), width=12, state="readonly")
+        self.combo_transfer.set("navegador")
+        self.combo_transfer.grid(row=4, column=5, sticky=tk.W, padx=(6,20), pady=(6,0))
+
+        ttk.Label(frm_opts, text="Segmentos (arquivos ≥ 64 MB):").grid(row=5, column=4, sticky=tk.W, pady=(6,0))
+        self.spin_segments = ttk.Spinbox(frm_opts, from_=1, to=16, width=5)
+        self.spin_segments.set(1)
+        self.spin_segments.grid(row=5, column=5, sticky=tk.W, padx=(6,20), pady=(6,0))
+
+        ttk.Label(frm_opts, text="Motor:").grid(row=2, column=4, sticky=tk.W, pady=(6,0))
+        self.combo_engine = ttk.Combobox(frm_opts, values=("threads", "asyncio", "processes"), width=12, state="readonly")
+        self.combo_engine.set("threads")
+        self.combo_engine.grid(row=2, column=5, sticky=tk.W, padx=(6,20), pady=(6,0))
+
+        ttk.Label(frm_opts, text="Páginas de crawl:").grid(row=5, column=0, sticky=tk.W, pady=(6,0))
+        self.spin_crawl_pages = ttk.Spinbox(frm_opts, from_=1, to=8, width=5)
+        self.spin_crawl_pages.set(2)
+        self.spin_crawl_pages.grid(row=5, column=1, sticky=tk.W, padx=(6,20), pady=(6,0))
+
+        ttk.Label(frm_opts, text="Intervalo por host (s):").grid(row=5, column=2, sticky=tk.W, pady=(6,0))
+        self.entry_host_delay = ttk.Entry(frm_opts, width=6)
+        self.entry_host_delay.insert(0, "1.0")
+        self.entry_host_delay.grid(row=5, column=3, sticky=tk.W, padx=(6,20), pady=(6,0))
+
+        ttk.Label(frm_opts, text="Ritmo:").grid(row=3, column=6, sticky=tk.W, pady=(6,0))
+        self.combo_throttle = ttk.Combobox(frm_opts, values=("adaptativo", "fixo"), width=12, state="readonly")
+        self.combo_throttle.set("adaptativo")
+        self.combo_throttle.grid(row=3, column=7, sticky=tk.W, padx=(6,0), pady=(6,0))
+
+        self.resume_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frm_opts, text="Retomar execução anterior e pular arquivos já baixados (manifesto)",
+                        variable=self.resume_var).grid(row=4, column=0, columnspan=4, sticky=tk.W, pady=(6,0))
+
+        self.listing_cache_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frm_opts, text="Sincronização incremental (cache de pastas, 24h)",
+                        variable=self.listing_cache_var).grid(row=6, column=0, columnspan=4, sticky=tk.W, pady=(6,0))
+
+        ttk.Label(frm_opts, text="Duplicados:").grid(row=6, column=4, sticky=tk.W, pady=(6,0))
+        self.combo_dedup = ttk.Combobox(frm_opts, values=("desligado", "por ID", "por conteúdo"), width=12,
+                                        state="readonly")
+        self.combo_dedup.set("desligado")
+        self.combo_dedup.grid(row=6, column=5, sticky=tk.W, padx=(6,20), pady=(6,0))
+
+        self.crawl_lite_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frm_opts, text="Crawl leve (sem imagens/anúncios nas pastas)",
+                        variable=self.crawl_lite_var).grid(row=5, column=6, columnspan=2, sticky=tk.W, pady=(6,0))
+
+        self.block_resources_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frm_opts, text="Bloquear imagens/fontes/analytics",
+                        variable=self.block_resources_var).grid(row=4, column=6, columnspan=2, sticky=tk.W, pady=(6,0))
+
         # Botões de controle
         frm_controls = ttk.Frame(root, padding=(10,0,10,0))
         frm_controls.pack(side=tk.TOP, fill=tk.X)
@@ -452,9 +4759,7 @@ class App:
             self.out_dir_var.set(d)
 
     def clear_log(self):
-        self.txt_log.configure(state="normal")
-        self.txt_log.delete("1.0", tk.END)
-        self.txt_log.configure(state="disabled")
+        self.logger.clear_text()
 
     def save_log(self):
         initial = os.path.join(self.out_dir_var.get(), "download_log.txt")
@@ -471,12 +4776,13 @@ class App:
     def _poll_logger(self):
         self.logger.poll()
         # também atualiza status de botões
+        summary = self.logger.summary()
         if self.downloader_thread and self.downloader_thread.is_alive():
-            self.status_var.set("Executando...")
+            self.status_var.set(f"Executando... {summary}" if summary else "Executando...")
             self.btn_start.config(state="disabled")
             self.btn_stop.config(state="normal")
         else:
-            self.status_var.set("Pronto")
+            self.status_var.set(f"Pronto — {summary}" if summary else "Pronto")
             self.btn_start.config(state="normal")
             self.btn_stop.config(state="disabled")
         self.root.after(200, self._poll_logger)
@@ -505,12 +4811,38 @@ class App:
         except Exception:
             settings["step_delay"] = 0.8
 
-        settings["pre_wait_random"] = parse_tuple(self.entry_prewait.get(), (5,10))
+        settings["scroll_mode"] = "events" if self.combo_scroll_mode.get() == "eventos" else "poll"
+
+        settings["pre_wait_random"] = parse_tuple(self.entry_prewait.get(), None)
+        settings["post_save_random"] = parse_tuple(self.entry_postsave.get(), None)
         settings["retry_random_delay"] = parse_tuple(self.entry_retrywait.get(), (5,15))
         try:
             settings["expect_download_timeout"] = int(self.entry_expect_timeout.get())
         except Exception:
             settings["expect_download_timeout"] = 120000
+        try:
+            settings["download_workers"] = max(1, int(self.spin_workers.get()))
+        except Exception:
+            settings["download_workers"] = 3
+        try:
+            settings["max_per_host"] = max(1, int(self.spin_max_per_host.get()))
+        except Exception:
+            settings["max_per_host"] = settings["download_workers"]
+
+        settings["include_exts"] = parse_list(self.entry_include_exts.get())
+        settings["exclude_patterns"] = parse_list(self.entry_exclude_patterns.get())
+        settings["resume"] = bool(self.resume_var.get())
+        settings["block_resources"] = bool(self.block_resources_var.get())
+        settings["crawl_lite"] = bool(self.crawl_lite_var.get())
+        settings["listing_cache"] = bool(self.listing_cache_var.get())
+        settings["dedup"] = {"por ID": "id", "por conteúdo": "content"}.get(self.combo_dedup.get(), "off")
+        settings["transfer"] = "http" if self.combo_transfer.get() == "http direto" else "browser"
+        settings["engine"] = self.combo_engine.get() or "threads"
+        settings["throttle"] = "adaptive" if self.combo_throttle.get() == "adaptativo" else "fixed"
+        try:
+            settings["segments"] = max(1, int(self.spin_segments.get()))
+        except Exception:
+            settings["segments"] = 1
 
         # other small settings for playwright
         settings["slow_mo"] = 0  # mantemos 0 por padrão
@@ -521,12 +4853,20 @@ class App:
             "max_wait": settings["scroll_max_wait"],
             "step_delay": settings["step_delay"]
         }
-        # between folder wait
-        settings["between_folder_wait"] = (3, 7)
+        # crawl: páginas simultâneas e intervalo de cortesia por host
+        try:
+            settings["crawl_pages"] = max(1, int(self.spin_crawl_pages.get()))
+        except Exception:
+            settings["crawl_pages"] = 2
+        try:
+            settings["crawl_host_delay"] = max(0.0, float(self.entry_host_delay.get()))
+        except Exception:
+            settings["crawl_host_delay"] = 1.0
         return settings
 
     def start(self):
-        base_url = self.entry_url.get().strip()
+        base_urls = self.entry_url.get().split()
+        base_url = base_urls[0] if base_urls else ""
         if not base_url:
             messagebox.showwarning("URL faltando", "Digite o link da pasta raiz para iniciar.")
             return
@@ -538,27 +4878,53 @@ class App:
         # pass these specific waits into the worker loop via the settings mapping:
         # We'll adapt calls inside thread to use them where needed.
 
-        # Clean tree and log
-        for iid in self.tree.get_children():
-            self.tree.delete(iid)
-        self.clear_log()
+        # Clean tree and log; histórico completo vai para um arquivo rotativo no destino
+        self.logger.reset()
+        try:
+            self.logger.set_spill_file(os.path.join(out_dir, "drivedepobre.log"))
+        except Exception as e:
+            self.logger.log(f"⚠️ Não foi possível abrir o arquivo de log: {e}")
 
         self.stop_event.clear()
-        self.downloader_thread = DownloaderThread(
-            base_url=base_url,
-            out_dir=out_dir,
-            settings={
-                "max_attempts": settings["max_attempts"],
-                "pre_wait_random": settings["pre_wait_random"],
-                "retry_random_delay": settings["retry_random_delay"],
-                "expect_download_timeout": settings["expect_download_timeout"],
-                "slow_mo": settings["slow_mo"],
-                "user_agent": settings["user_agent"],
-                "between_folder_wait": settings["between_folder_wait"]
-            },
-            logger=self.logger,
-            stop_event=self.stop_event
-        )
+        thread_settings = {
+            "max_attempts": settings["max_attempts"],
+            "pre_wait_random": settings["pre_wait_random"],
+            "post_save_random": settings["post_save_random"],
+            "retry_random_delay": settings["retry_random_delay"],
+            "expect_download_timeout": settings["expect_download_timeout"],
+            "slow_mo": settings["slow_mo"],
+            "user_agent": settings["user_agent"],
+            "crawl_pages": settings["crawl_pages"],
+            "crawl_host_delay": settings["crawl_host_delay"],
+            "download_workers": settings["download_workers"],
+            "max_per_host": settings["max_per_host"],
+            "include_exts": settings["include_exts"],
+            "exclude_patterns": settings["exclude_patterns"],
+            "resume": settings["resume"],
+            "transfer": settings["transfer"],
+            "segments": settings["segments"],
+            "scroll_mode": settings["scroll_mode"],
+            "scroll_max_wait": settings["scroll_max_wait"],
+            "step_delay": settings["step_delay"],
+            "engine": settings["engine"],
+            "throttle": settings["throttle"],
+            "block_resources": settings["block_resources"],
+            "crawl_lite": settings["crawl_lite"],
+            "listing_cache": settings["listing_cache"],
+            "dedup": settings["dedup"]
+        }
+        if len(base_urls) > 1:
+            # vários links separados por espaço: agendador (um navegador para todos no motor asyncio)
+            roots = [(url, root_out_dir(out_dir, url, True), i) for i, url in enumerate(base_urls)]
+            self.downloader_thread = JobScheduler(roots, thread_settings, self.logger, self.stop_event)
+        else:
+            self.downloader_thread = downloader_class(settings)(
+                base_url=base_url,
+                out_dir=out_dir,
+                settings=thread_settings,
+                logger=self.logger,
+                stop_event=self.stop_event
+            )
         # Monkey patch scroll parameters into process_folder by setting a small global? Instead, we override scroll function behavior:
         # We'll wrap page.evaluate usage by temporarily setting attributes in logger for scroll args. Simpler: modify scroll_to_bottom to consult settings if provided.
         # For now, scroll_to_bottom uses fixed signature; we will rely on default step_delay and max_wait in code; but to honor inputs, we will replace
@@ -568,7 +4934,7 @@ class App:
         _GUI_SCROLL_MAX_WAIT = settings["scroll_max_wait"]
         _GUI_STEP_DELAY = settings["step_delay"]
 
-        self.logger.log(f"▶️ Iniciando download: {base_url}")
+        self.logger.log(f"▶️ Iniciando download: {' '.join(base_urls)}")
         self.downloader_thread.start()
         self.btn_start.config(state="disabled")
         self.btn_stop.config(state="normal")
@@ -595,7 +4961,7 @@ except NameError:
 
 # Patch the scroll_to_bottom function to consult globals if present (keeps logic same)
 _original_scroll_to_bottom = scroll_to_bottom
-def _scroll_to_bottom_patched(page, max_wait=5, step_delay=0.8, max_scrolls=1000, logger: GuiLogger=None):
+def _scroll_to_bottom_patched(page, max_wait=5, step_delay=0.8, max_scrolls=1000, logger: GuiLogger=None, on_step=None):
     mm = max_wait
     ss = step_delay
     if _GUI_SCROLL_MAX_WAIT is not None:
@@ -608,17 +4974,296 @@ def _scroll_to_bottom_patched(page, max_wait=5, step_delay=0.8, max_scrolls=1000
             ss = float(_GUI_STEP_DELAY)
         except Exception:
             pass
-    return _original_scroll_to_bottom(page, max_wait=mm, step_delay=ss, max_scrolls=max_scrolls, logger=logger)
+    return _original_scroll_to_bottom(page, max_wait=mm, step_delay=ss, max_scrolls=max_scrolls, logger=logger, on_step=on_step)
 
 # Replace reference in module
 scroll_to_bottom = _scroll_to_bottom_patched
 
+# Mesmo ajuste para o scroll do motor asyncio
+_original_async_scroll_to_bottom = async_scroll_to_bottom
+async def _async_scroll_to_bottom_patched(page, max_wait=5, step_delay=0.8, max_scrolls=1000, logger: GuiLogger=None, on_step=None):
+    mm = float(_GUI_SCROLL_MAX_WAIT) if _GUI_SCROLL_MAX_WAIT is not None else max_wait
+    ss = float(_GUI_STEP_DELAY) if _GUI_STEP_DELAY is not None else step_delay
+    return await _original_async_scroll_to_bottom(page, max_wait=mm, step_delay=ss, max_scrolls=max_scrolls, logger=logger, on_step=on_step)
+
+async_scroll_to_bottom = _async_scroll_to_bottom_patched
+
 # Also allow process_folder to pass logger into scroll_to_bottom (already done)
 
+# -------------------------
+# Modo CLI (sem GUI, para servidores/cron)
+# -------------------------
+
+def _parse_pair(text, cast=int):
+    parts = [cast(x.strip()) for x in text.split(",") if x.strip()]
+    if len(parts) != 2:
+        raise argparse.ArgumentTypeError("use o formato min,max")
+    return (parts[0], parts[1])
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="baixar_drivedepobre",
+        description="Baixa pastas do drivedepobre.com sem interface gráfica. Sem argumentos, abre a GUI."
+    )
+    parser.add_argument("urls", nargs="*", help="links das pastas raiz")
+    parser.add_argument("--urls-arquivo", metavar="ARQUIVO",
+                        help="arquivo com um link por linha, opcionalmente seguido da prioridade (# comenta)")
+    parser.add_argument("--relatorio", type=float, default=30, metavar="SEG",
+                        help="intervalo do resumo de métricas (e, com várias raízes, do progresso por job)")
+    parser.add_argument("-o", "--saida", default=os.path.join(os.getcwd(), "downloads"), help="pasta de destino")
+    parser.add_argument("--json", action="store_true", help="log em JSON, um evento por linha")
+    parser.add_argument("--motor", choices=("threads", "asyncio", "processes"), default="threads",
+                        help="processes: cada worker (--workers) é um processo com o próprio navegador")
+    parser.add_argument("--reciclar-apos", type=int, default=200, metavar="N",
+                        help="motor processes: substitui o processo depois de N arquivos (0 = nunca)")
+    parser.add_argument("--memoria-max", type=float, default=2048, metavar="MB",
+                        help="motor processes: substitui o processo cujo navegador passar de MB (0 = sem limite)")
+    parser.add_argument("--travado-apos", type=float, default=900, metavar="SEG",
+                        help="motor processes: reinicia o processo parado há SEG segundos no mesmo arquivo")
+    parser.add_argument("--transferencia", choices=("browser", "http"), default="browser")
+    parser.add_argument("--workers", type=int, default=3, help="downloads simultâneos")
+    parser.add_argument("--por-host", type=int, default=None, help="máx. downloads simultâneos por host")
+    parser.add_argument("--paginas-crawl", type=int, default=2, help="pastas varridas em paralelo")
+    parser.add_argument("--intervalo-host", type=float, default=1.0, help="intervalo mínimo entre pastas do mesmo host (s)")
+    parser.add_argument("--segmentos", type=int, default=1, help="segmentos paralelos para arquivos grandes (modo http)")
+    parser.add_argument("--tentativas", type=int, default=4, help="máx. tentativas por arquivo")
+    parser.add_argument("--sem-fila-retentativas", action="store_true",
+                        help="repete o arquivo na hora, no mesmo worker (comportamento antigo)")
+    parser.add_argument("--sem-disjuntor", action="store_true",
+                        help="não pausa os downloads quando a taxa de erro do site dispara")
+    parser.add_argument("--disjuntor-limiar", type=float, default=0.5, metavar="FRAÇÃO",
+                        help="fração de falhas no último minuto que abre o disjuntor")
+    parser.add_argument("--disjuntor-pausa", type=float, default=30, metavar="SEG",
+                        help="pausa inicial do disjuntor aberto (dobra a cada reabertura)")
+    parser.add_argument("--ritmo", choices=("adaptive", "fixed"), default="adaptive",
+                        help="adaptive: intervalo por host ajustado por sucesso/erro; fixed: esperas aleatórias originais")
+    parser.add_argument("--bloquear-recursos", action="store_true",
+                        help="não carrega imagens, fontes e analytics nas páginas de pasta e de arquivo")
+    parser.add_argument("--usos-por-pagina", type=int, default=50, metavar="N",
+                        help="recicla cada aba depois de N usos (limita a memória do navegador)")
+    parser.add_argument("--crawl-completo", action="store_true",
+                        help="carrega as pastas com todos os recursos (desliga o perfil leve de crawl)")
+    parser.add_argument("--metricas-jsonl", metavar="ARQ",
+                        help="grava cada fase/falha como evento JSON (uma linha por evento)")
+    parser.add_argument("--metricas-prom", metavar="ARQ",
+                        help="arquivo de métricas no formato texto do Prometheus (textfile collector)")
+    parser.add_argument("--metricas-porta", type=int, default=0, metavar="PORTA",
+                        help="serve /metrics em 127.0.0.1:PORTA enquanto roda")
+    parser.add_argument("--dedup", choices=("off", "id", "content"), default="off",
+                        help="desligado por padrão; id: mesmo arquivo em várias pastas é baixado uma vez e ligado (reflink/hardlink) "
+                             "nas outras; content: também compara tamanho + sha256")
+    parser.add_argument("--sync", action="store_true",
+                        help="sincronização incremental: reaproveita listagens de pastas do cache e baixa só o que é novo")
+    parser.add_argument("--cache-ttl", type=float, default=24, metavar="HORAS",
+                        help="validade das listagens em cache no modo --sync")
+    parser.add_argument("--permitir-hosts", default="", metavar="H1,H2",
+                        help="hosts nunca bloqueados no crawl leve (ex.: CDN que serve a listagem)")
+    parser.add_argument("--pre-wait", type=_parse_pair, default=None, metavar="MIN,MAX",
+                        help="espera aleatória antes de procurar o botão (padrão: 5,10 com --ritmo fixed; "
+                             "nenhuma com --ritmo adaptive, que já controla o site)")
+    parser.add_argument("--pos-espera", type=_parse_pair, default=None, metavar="MIN,MAX",
+                        help="espera aleatória depois de salvar cada arquivo (padrão: 2,5 com --ritmo fixed; "
+                             "nenhuma com --ritmo adaptive)")
+    parser.add_argument("--retry-wait", type=_parse_pair, default=(5, 15), metavar="MIN,MAX")
+    parser.add_argument("--timeout-download", type=int, default=120000, help="timeout do download (ms)")
+    parser.add_argument("--scroll", choices=("events", "poll"), default="events")
+    parser.add_argument("--scroll-max-wait", type=float, default=None,
+                        help="modo poll: segundos sem crescer para parar; modo events: espera máxima por rolada")
+    parser.add_argument("--scroll-step", type=float, default=None, help="modo poll: intervalo entre roladas (s)")
+    parser.add_argument("--scroll-quiet-ms", type=int, default=None,
+                        help="modo events: ms sem item novo nem XHR para considerar a rolada concluída")
+    parser.add_argument("--sem-endpoint-listagem", action="store_true",
+                        help="modo events: só rola a página, sem ler a listagem paginada direto do endpoint")
+    parser.add_argument("--extensoes", default="pdf,mp4", help="extensões incluídas (vazio = todas)")
+    parser.add_argument("--excluir", action="append", default=[], metavar="PADRAO",
+                        help="glob ou re:regex a excluir (nome ou URL); pode repetir")
+    parser.add_argument("--sem-retomar", action="store_true", help="ignora o manifesto de execuções anteriores")
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="file",
+                        help="none: confia no cache do SO; file: grava o arquivo antes do rename; dir: também a pasta")
+    parser.add_argument("--buffer-escrita", type=int, default=64, metavar="MB",
+                        help="máx. de dados baixados esperando o disco (modo http); acima disso a rede espera")
+    parser.add_argument("--tmp-dir", default=None, metavar="PASTA",
+                        help="temporários do navegador (padrão: dentro do destino, para o rename não virar cópia)")
+    parser.add_argument("--inventario", metavar="ARQ",
+                        help="fase 1: só varre as pastas e grava os arquivos encontrados em ARQ (JSONL), sem baixar")
+    parser.add_argument("--de-inventario", metavar="ARQ",
+                        help="fase 2: baixa os arquivos listados em ARQ (não precisa de links)")
+    parser.add_argument("--shard", default=None, metavar="I/N",
+                        help="com --de-inventario: baixa só a fatia I de N (0 <= I < N), por hash da URL")
+    parser.add_argument("--lease-ttl", type=float, default=600, metavar="SEG",
+                        help="reserva sem renovação há mais de SEG segundos pode ser tomada por outro processo")
+    return parser
+
+def settings_from_args(args) -> dict:
+    return {
+        "max_attempts": args.tentativas,
+        "pre_wait_random": args.pre_wait,
+        "post_save_random": args.pos_espera,
+        "retry_random_delay": args.retry_wait,
+        "expect_download_timeout": args.timeout_download,
+        "slow_mo": 0,
+        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, como Gecko) Chrome/120 Safari/537.36",
+        "download_workers": max(1, args.workers),
+        "max_per_host": max(1, args.por_host or args.workers),
+        "crawl_pages": max(1, args.paginas_crawl),
+        "crawl_host_delay": max(0.0, args.intervalo_host),
+        "include_exts": parse_list(args.extensoes),
+        "exclude_patterns": args.excluir,
+        "resume": not args.sem_retomar,
+        "transfer": args.transferencia,
+        "segments": max(1, args.segmentos),
+        "scroll_mode": args.scroll,
+        "scroll_max_wait": args.scroll_max_wait,
+        "step_delay": args.scroll_step,
+        "scroll_quiet_ms": args.scroll_quiet_ms,
+        "listing_endpoint": False if args.sem_endpoint_listagem else None,
+        "engine": args.motor,
+        "worker_max_jobs": args.reciclar_apos,
+        "worker_max_rss_mb": args.memoria_max,
+        "worker_hang_timeout": args.travado_apos,
+        "throttle": args.ritmo,
+        "retry_queue": not args.sem_fila_retentativas,
+        "circuit_breaker": not args.sem_disjuntor,
+        "breaker_threshold": args.disjuntor_limiar,
+        "breaker_cooldown": args.disjuntor_pausa,
+        "block_resources": args.bloquear_recursos,
+        "page_max_uses": args.usos_por_pagina,
+        "crawl_lite": not args.crawl_completo,
+        "crawl_allow_hosts": parse_list(args.permitir_hosts),
+        "listing_cache": args.sync,
+        "listing_ttl_hours": args.cache_ttl,
+        "metrics_interval": args.relatorio,
+        "metrics_jsonl": args.metricas_jsonl,
+        "metrics_prometheus": args.metricas_prom,
+        "metrics_port": args.metricas_porta,
+        "dedup": args.dedup,
+        "fsync": args.fsync,
+        "write_budget_mb": max(1, args.buffer_escrita),
+        "temp_dir": args.tmp_dir,
+        "shard": args.shard,
+        "lease_ttl": args.lease_ttl,
+    }
+
+def read_url_file(path: str) -> list:
+    # Uma raiz por linha: "LINK [prioridade]"; linhas vazias e com # são ignoradas
+    roots = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith("#"):
+                continue
+            priority = int(parts[1]) if len(parts) > 1 and parts[1].lstrip("-").isdigit() else 0
+            roots.append((parts[0], priority))
+    return roots
+
+def root_out_dir(out_dir: str, url: str, multiple: bool) -> str:
+    # Com várias raízes, cada uma vai para uma subpasta com o id da pasta na URL
+    if not multiple:
+        return out_dir
+    return os.path.join(out_dir, root_slug(url))
+
+def _write_inventory(roots, out_dir, path, settings, logger, stop_event):
+    # Raízes em sequência no mesmo inventário; "folder" é relativo a out_dir, como na fase 2
+    writer = InventoryWriter(path)
+    try:
+        for url, _ in roots:
+            if stop_event.is_set():
+                break
+            root_dir = root_out_dir(out_dir, url, len(roots) > 1)
+            os.makedirs(root_dir, exist_ok=True)
+            logger.log(f"🧾 Inventariando: {url}")
+            thread = InventoryThread(url, root_dir, settings, logger, stop_event, writer, base_dir=out_dir)
+            thread.run()
+    finally:
+        writer.close()
+    logger.log(f"🧾 {writer.count} arquivo(s) no inventário {path}.")
+
+# Código de saída do CLI quando algum arquivo terminou em falha (scripts/cron conseguem detectar)
+EXIT_FAILED = 1
+
+def failed_downloads(thread) -> int:
+    # Arquivos que terminaram em falha, em qualquer motor (a fase 1 do inventário não baixa nada)
+    if isinstance(thread, JobScheduler):
+        return sum(failed_downloads(job) for _, job, _ in thread.jobs)
+    if isinstance(thread, AsyncDownloaderThread):
+        thread = thread.job
+    stats = getattr(thread, "stats", None)
+    return stats["failed"] if stats else 0
+
+def cli_main(argv) -> int:
+    args = build_arg_parser().parse_args(argv)
+    roots = [(url, 0) for url in args.urls]
+    if args.urls_arquivo:
+        roots += read_url_file(args.urls_arquivo)
+    if args.shard:
+        try:
+            parse_shard(args.shard)
+        except ValueError as e:
+            print(f"--shard: {e}", file=sys.stderr)
+            return 2
+    if not roots and not args.de_inventario:
+        print("Nenhum link informado.", file=sys.stderr)
+        return 2
+    if (args.inventario or args.de_inventario) and args.motor != "threads":
+        print(f"--inventario/--de-inventario só rodam com --motor threads (recebido: {args.motor}).",
+              file=sys.stderr)
+        return 2
+
+    global _GUI_SCROLL_MAX_WAIT, _GUI_STEP_DELAY
+    _GUI_SCROLL_MAX_WAIT = args.scroll_max_wait
+    _GUI_STEP_DELAY = args.scroll_step
+
+    settings = settings_from_args(args)
+    logger = ConsoleLogger(json_lines=args.json)
+    stop_event = threading.Event()
+    if args.de_inventario:
+        os.makedirs(args.saida, exist_ok=True)
+        thread = InventoryDownloader(args.de_inventario, args.saida, settings, logger, stop_event)
+    elif args.inventario:
+        thread = threading.Thread(target=_write_inventory, daemon=True,
+                                  args=(roots, args.saida, args.inventario, settings, logger, stop_event))
+    elif len(roots) > 1:
+        # Várias raízes: no asyncio um navegador só e orçamento global; nos outros motores, em sequência
+        jobs = [(url, root_out_dir(args.saida, url, True), priority) for url, priority in roots]
+        for _, out_dir, _ in jobs:
+            os.makedirs(out_dir, exist_ok=True)
+        thread = JobScheduler(jobs, settings, logger, stop_event, report_interval=args.relatorio)
+    else:
+        url = roots[0][0]
+        os.makedirs(args.saida, exist_ok=True)
+        logger.log(f"▶️ Iniciando download: {url} -> {args.saida}")
+        thread = downloader_class(settings)(url, args.saida, settings, logger, stop_event)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.5)
+    except KeyboardInterrupt:
+        stop_event.set()
+        logger.log("⏹️ Parada solicitada (Ctrl+C). Aguardando término das operações em progresso...")
+        thread.join()
+    if stop_event.is_set():
+        return 130
+    failed = failed_downloads(thread)
+    if failed:
+        logger.log(f"❌ {failed} arquivo(s) falharam; saindo com código {EXIT_FAILED}.")
+        return EXIT_FAILED
+    return 0
+
 # -------------------------
 # Execução principal da GUI
 # -------------------------
-def main():
+def _import_tkinter():
+    # tkinter só é carregado quando a GUI sobe; o modo CLI não paga esse custo
+    global tk, ttk, filedialog, messagebox, ScrolledText
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox
+    from tkinter.scrolledtext import ScrolledText
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        sys.exit(cli_main(argv))
+    _import_tkinter()
     root = tk.Tk()
     app = App(root)
     root.mainloop()
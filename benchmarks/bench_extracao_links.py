@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da extração de links de uma pasta: caminho antigo (locators, 2 round trips por link)
+contra o novo (um único page.evaluate), sobre a fixture HTML salva em benchmarks/fixtures.
+
+Uso: python benchmarks/bench_extracao_links.py --itens 2000 --rodadas 5
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.sync_api import sync_playwright
+
+from baixar_drivedepobre import extract_links, _extract_links_locators
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pasta.html")
+START, END = "<!-- itens:inicio -->", "<!-- itens:fim -->"
+
+def build_page(n_items: int) -> str:
+    # Repete o bloco de itens da fixture até chegar em ~n_items links
+    with open(FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+    head, rest = html.split(START, 1)
+    block, tail = rest.split(END, 1)
+    per_block = block.count("<a ")
+    copies = max(1, -(-n_items // per_block))
+    return head + START + block * copies + END + tail
+
+def measure(page, func, rounds: int):
+    timings = []
+    result = None
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        result = func(page)
+        timings.append(time.perf_counter() - t0)
+    return result, timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da extração de links (locators x evaluate único).")
+    parser.add_argument("--itens", type=int, default=2000, help="quantidade aproximada de links na página")
+    parser.add_argument("--rodadas", type=int, default=5)
+    args = parser.parse_args()
+
+    html = build_page(args.itens)
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.set_content(html)
+
+        old, old_t = measure(page, _extract_links_locators, args.rodadas)
+        new, new_t = measure(page, extract_links, args.rodadas)
+        browser.close()
+
+    if old != new:
+        print("❌ Resultados diferentes entre os dois caminhos!")
+        sys.exit(1)
+    n_links = len(new[0]) + len(new[1])
+    old_med, new_med = statistics.median(old_t), statistics.median(new_t)
+    print(f"Links extraídos: {n_links} ({len(new[0])} pastas, {len(new[1])} arquivos)")
+    print(f"locators (antigo):   mediana {old_med * 1000:9.1f} ms")
+    print(f"evaluate único:      mediana {new_med * 1000:9.1f} ms")
+    print(f"Ganho: {old_med / new_med:.1f}x")
+
+if __name__ == "__main__":
+    main()
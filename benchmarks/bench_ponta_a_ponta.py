@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark ponta a ponta contra o servidor local de benchmarks/drive_falso.py (nada sai da máquina):
+
+1. pasta:    process_folder na raiz (navegação + scroll infinito + extração), mediana/p95 por rodada;
+2. arquivo:  download_file em sequência, latência por arquivo (com um AdaptiveThrottle de intervalo zero:
+             sem ele, download_file cai nas esperas fixas e cada amostra ganharia 2-5 s de sono após salvar);
+3. completo: DownloaderThread/AsyncDownloaderThread na árvore inteira, arquivos/min e MB/s.
+
+Uso: python benchmarks/bench_ponta_a_ponta.py --profundidade 2 --arquivos 30 --latencia-ms 20 --taxa-erro 0.1
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from playwright.sync_api import sync_playwright
+
+from baixar_drivedepobre import (
+    AdaptiveThrottle, ConsoleLogger, HttpPool, process_folder, download_file, downloader_class, launch_browser,
+    _percentile, scroll_options,
+)
+from drive_falso import DriveFalso
+
+class SilentLogger:
+    # Mesma interface do ConsoleLogger, sem saída: o benchmark mede, não narra
+    def log(self, message: str):
+        pass
+
+    def set_item_status(self, item_id: str, status: str):
+        pass
+
+def bench_settings(args) -> dict:
+    # Sem esperas de cortesia: mede o custo do código e do servidor, não dos intervalos
+    return {
+        "engine": args.motor,
+        "transfer": args.transferencia,
+        "download_workers": args.workers,
+        "max_per_host": args.workers,
+        "crawl_pages": args.paginas_crawl,
+        "crawl_host_delay": 0,
+        "scroll_mode": args.scroll,
+        "throttle": "adaptive",
+        "throttle_initial_interval": 0,
+        "throttle_min_interval": 0,
+        "pre_wait_random": (0, 0),
+        "retry_random_delay": (0, 1),
+        "max_attempts": 4,
+        "resume": False,
+        "include_exts": ["pdf"],
+        "metrics_interval": 3600,
+    }
+
+def describe(label, timings):
+    if not timings:
+        return f"{label:<28} sem amostras"
+    return (f"{label:<28} n={len(timings):<4} mediana {statistics.median(timings) * 1000:8.1f} ms"
+            f"   p95 {_percentile(timings, 0.95) * 1000:8.1f} ms")
+
+def bench_folder(drive, settings, rounds):
+    timings = []
+    links = None
+    with sync_playwright() as p:
+        browser, context = launch_browser(p, settings, crawl=True)
+        page = context.new_page()
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            subfolders, files = process_folder(page, drive.root_url, scroll_mode=settings["scroll_mode"],
+                                               scroll_args=scroll_options(settings))
+            timings.append(time.perf_counter() - t0)
+            links = len(subfolders) + len(files)
+        browser.close()
+    return timings, links
+
+def bench_files(drive, settings, n_files, out_dir):
+    # Arquivos da raiz: metade com botão (/arquivo/), metade com a[download] (/pdf/)
+    timings = []
+    failures = 0
+    http_pool = HttpPool() if settings["transfer"] == "http" else None
+    # intervalo e backoff zero: nenhuma espera de cortesia entra na latência medida
+    throttle = AdaptiveThrottle(initial_interval=0, min_interval=0, backoff_base=0)
+    with sync_playwright() as p:
+        browser, context = launch_browser(p, settings)
+        page = context.new_page()
+        _, files = process_folder(page, drive.root_url, scroll_mode=settings["scroll_mode"],
+                                  scroll_args=scroll_options(settings))
+        page.close()
+        for file_url, visible_name in files[:n_files]:
+            t0 = time.perf_counter()
+            saved = download_file(context, file_url, visible_name, out_dir, transfer=settings["transfer"],
+                                  http_pool=http_pool, throttle=throttle)
+            if saved:
+                timings.append(time.perf_counter() - t0)
+            else:
+                failures += 1
+        browser.close()
+    if http_pool:
+        http_pool.close()
+    return timings, failures
+
+def bench_full(drive, settings, out_dir, logger):
+    stop_event = threading.Event()
+    thread = downloader_class(settings)(drive.root_url, out_dir, settings, logger, stop_event)
+    t0 = time.perf_counter()
+    thread.start()
+    thread.join()
+    elapsed = time.perf_counter() - t0
+    job = getattr(thread, "job", thread)
+    return elapsed, job.stats, job.metrics
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta com um drivedepobre falso local.")
+    parser.add_argument("--fases", default="pasta,arquivo,completo", help="quais etapas rodar")
+    parser.add_argument("--profundidade", type=int, default=2)
+    parser.add_argument("--subpastas", type=int, default=2)
+    parser.add_argument("--arquivos", type=int, default=20, help="arquivos por pasta")
+    parser.add_argument("--por-pagina", type=int, default=25, help="itens por página do scroll infinito")
+    parser.add_argument("--tamanho-kb", type=int, default=256)
+    parser.add_argument("--latencia-ms", type=float, default=0)
+    parser.add_argument("--atraso-clique-ms", type=int, default=100)
+    parser.add_argument("--taxa-erro", type=float, default=0.0)
+    parser.add_argument("--rodadas", type=int, default=3)
+    parser.add_argument("--amostra-arquivos", type=int, default=10)
+    parser.add_argument("--motor", choices=("threads", "asyncio"), default="threads")
+    parser.add_argument("--transferencia", choices=("browser", "http"), default="browser")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--paginas-crawl", type=int, default=2)
+    parser.add_argument("--scroll", choices=("poll", "events"), default="events")
+    parser.add_argument("--verboso", action="store_true", help="mostra o log do downloader na etapa completa")
+    args = parser.parse_args()
+    stages = {s.strip() for s in args.fases.split(",") if s.strip()}
+
+    settings = bench_settings(args)
+    drive = DriveFalso(depth=args.profundidade, subfolders=args.subpastas, files=args.arquivos,
+                       page_size=args.por_pagina, file_size=args.tamanho_kb * 1024, latency_ms=args.latencia_ms,
+                       click_delay_ms=args.atraso_clique_ms, error_rate=args.taxa_erro)
+    with drive, tempfile.TemporaryDirectory() as tmp:
+        print(f"Drive falso em {drive.base_url}: {drive.expected_folders()} pasta(s), "
+              f"{drive.expected_files()} arquivo(s) de {args.tamanho_kb} KB, latência {args.latencia_ms} ms, "
+              f"erro no 1º clique {args.taxa_erro:.0%}")
+
+        if "pasta" in stages:
+            timings, links = bench_folder(drive, settings, args.rodadas)
+            print(describe(f"process_folder ({links} links)", timings))
+
+        if "arquivo" in stages:
+            timings, failures = bench_files(drive, settings, args.amostra_arquivos, os.path.join(tmp, "arquivos"))
+            print(describe(f"download_file ({settings['transfer']})", timings)
+                  + (f"   {failures} falha(s)" if failures else ""))
+
+        if "completo" in stages:
+            logger = ConsoleLogger() if args.verboso else SilentLogger()
+            elapsed, stats, metrics = bench_full(drive, settings, os.path.join(tmp, "completo"), logger)
+            snap = metrics.snapshot()
+            done = stats["done"]
+            size = snap["counters"].get("bytes", 0)
+            print(f"{'execução completo':<28} {elapsed:8.1f} s   {done}/{drive.expected_files()} arquivo(s), "
+                  f"{stats['folders']}/{drive.expected_folders()} pasta(s), {stats['failed']} falha(s)")
+            print(f"{'':<28} {done / elapsed * 60:8.1f} arq/min   {size / elapsed / 1e6:6.2f} MB/s   "
+                  f"{snap['counters'].get('retries', 0)} nova(s) tentativa(s)")
+            for name, phase in snap["phases"].items():
+                print(f"  {name:<26} n={phase['count']:<4} p50 {phase['p50'] * 1000:8.1f} ms"
+                      f"   p95 {phase['p95'] * 1000:8.1f} ms")
+        print(f"Servidor: {drive.requests} requisição(ões), {drive.bytes_sent / 1e6:.1f} MB enviados")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor HTTP local que imita o drivedepobre.com para benchmarks offline.
+
+- /pasta/<id>: listagem com scroll infinito. A primeira página vem no HTML; as seguintes chegam por XHR
+  em /pasta/<id>?page=N (fragmento HTML, vazio quando acaba).
+- /arquivo/<id>: botão "Download" que, depois de um atraso, mostra "Erro no download." ou navega para o binário.
+- /pdf/<id>: link a[download] direto para o binário.
+- /bin/<id>: o arquivo (Content-Disposition: attachment), com suporte a Range e If-Range (ETag).
+
+A árvore é determinística: profundidade, subpastas e arquivos por pasta, tamanho dos arquivos, latência
+e fração de arquivos cujo primeiro clique exibe o banner de erro são configuráveis.
+
+Uso isolado: python benchmarks/drive_falso.py --porta 8765 --profundidade 2
+"""
+
+import re
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+_PAGE = """<!DOCTYPE html>
+<html lang="pt-br">
+<head>
+<meta charset="utf-8">
+<title>Drive de Pobre - {title}</title>
+<style>li {{ height: 40px; }} #fim {{ height: 1200px; }}</style>
+</head>
+<body>
+<nav class="navbar navbar-light bg-light"><a class="navbar-brand" href="/">Drive de Pobre</a></nav>
+<main class="container py-3">
+{body}
+</main>
+</body>
+</html>"""
+
+_SCROLL_JS = """<script>
+let proxima = 2, carregando = false, acabou = false;
+window.addEventListener('scroll', async () => {
+    if (carregando || acabou) return;
+    if (window.innerHeight + window.scrollY < document.body.scrollHeight - 50) return;
+    carregando = true;
+    const resp = await fetch(location.pathname + '?page=' + proxima, {headers: {'X-Requested-With': 'XMLHttpRequest'}});
+    const html = await resp.text();
+    if (!html.trim()) { acabou = true; }
+    else { document.getElementById('lista').insertAdjacentHTML('beforeend', html); proxima++; }
+    carregando = false;
+});
+</script>"""
+
+_BUTTON_JS = """<script>
+document.getElementById('baixar').addEventListener('click', () => {{
+    setTimeout(() => {{
+        fetch('/clique/{file_id}').then(r => r.text()).then((res) => {{
+            if (res === 'erro') {{
+                const d = document.createElement('div');
+                d.className = 'alert alert-danger';
+                d.textContent = 'Erro no download.';
+                document.body.appendChild(d);
+            }} else {{
+                location.href = '/bin/{file_id}';
+            }}
+        }});
+    }}, {delay_ms});
+}});
+</script>"""
+
+class DriveFalso:
+    # Árvore: "r" é a raiz; "r-0", "r-1"... são subpastas; arquivos são "<pasta>-f<i>"
+    def __init__(self, depth: int = 2, subfolders: int = 2, files: int = 20, page_size: int = 25,
+                 file_size: int = 256 * 1024, latency_ms: float = 0, click_delay_ms: int = 100,
+                 error_rate: float = 0.0, pdf_ratio: float = 0.5, seed: int = 1, host: str = "127.0.0.1",
+                 port: int = 0):
+        self.depth = depth
+        self.subfolders = subfolders
+        self.files = files
+        self.page_size = page_size
+        self.file_size = file_size
+        self.latency_ms = latency_ms
+        self.click_delay_ms = click_delay_ms
+        self.error_rate = error_rate
+        self.pdf_ratio = pdf_ratio
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._clicks = {}
+        self.requests = 0
+        self.bytes_sent = 0
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def root_url(self) -> str:
+        return f"{self.base_url}/pasta/r"
+
+    def expected_files(self) -> int:
+        folders = sum(self.subfolders ** level for level in range(self.depth + 1))
+        return folders * self.files
+
+    def expected_folders(self) -> int:
+        return sum(self.subfolders ** level for level in range(self.depth + 1))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True, name="drive-falso")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- conteúdo -------------------------------------------------------
+
+    def _items(self, folder_id: str) -> list:
+        level = folder_id.count("-")
+        items = []
+        if level < self.depth:
+            for i in range(self.subfolders):
+                items.append(
+                    f'<li class="list-group-item"><a class="text-dark fw-medium" href="/pasta/{folder_id}-{i}">'
+                    f'<span class="material-icons">folder</span> Pasta {folder_id}-{i}</a></li>'
+                )
+        rng = random.Random(f"{self.seed}:{folder_id}")
+        for i in range(self.files):
+            file_id = f"{folder_id}-f{i}"
+            kind = "pdf" if rng.random() < self.pdf_ratio else "arquivo"
+            items.append(
+                f'<li class="list-group-item"><a class="text-dark" href="/{kind}/{file_id}">'
+                f'<span class="material-icons">picture_as_pdf</span> Documento {file_id}.pdf</a></li>'
+            )
+        return items
+
+    def _listing_page(self, folder_id: str, number: int) -> list:
+        items = self._items(folder_id)
+        start = (number - 1) * self.page_size
+        return items[start:start + self.page_size]
+
+    def _first_click_fails(self, file_id: str) -> bool:
+        return random.Random(f"{self.seed}:erro:{file_id}").random() < self.error_rate
+
+    def _click(self, file_id: str) -> str:
+        # Só o primeiro clique de um arquivo "azarado" falha: exercita o caminho de nova tentativa
+        with self._lock:
+            count = self._clicks[file_id] = self._clicks.get(file_id, 0) + 1
+        return "erro" if count == 1 and self._first_click_fails(file_id) else "ok"
+
+    def _content(self, file_id: str) -> bytes:
+        block = (file_id.encode("utf-8") + b"\n") * 64
+        reps = -(-self.file_size // len(block))
+        return (block * reps)[:self.file_size]
+
+    # --- HTTP -----------------------------------------------------------
+
+    def _handler(self):
+        drive = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body: bytes, content_type="text/html; charset=utf-8", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+                with drive._lock:
+                    drive.bytes_sent += len(body)
+
+            def do_HEAD(self):
+                self.do_GET()
+
+            def do_GET(self):
+                with drive._lock:
+                    drive.requests += 1
+                if drive.latency_ms:
+                    time.sleep(drive.latency_ms / 1000)
+                url = urlparse(self.path)
+                m = re.fullmatch(r"/(pasta|arquivo|pdf|bin|clique)/([\w-]+)", url.path)
+                if not m:
+                    return self._send(404, b"nao encontrado")
+                kind, item_id = m.groups()
+                if kind == "pasta":
+                    return self._folder(item_id, parse_qs(url.query))
+                if kind == "arquivo":
+                    body = (
+                        f'<h5>Documento {item_id}.pdf</h5>'
+                        f'<button id="baixar" class="btn btn-primary">Download</button>'
+                        + _BUTTON_JS.format(file_id=item_id, delay_ms=drive.click_delay_ms)
+                    )
+                    return self._send(200, _PAGE.format(title=item_id, body=body).encode("utf-8"))
+                if kind == "pdf":
+                    body = (
+                        f'<h5>Documento {item_id}.pdf</h5>'
+                        f'<a class="btn btn-primary" href="/bin/{item_id}" download>Download</a>'
+                    )
+                    return self._send(200, _PAGE.format(title=item_id, body=body).encode("utf-8"))
+                if kind == "clique":
+                    return self._send(200, drive._click(item_id).encode("utf-8"), "text/plain")
+                return self._binary(item_id)
+
+            def _folder(self, folder_id, query):
+                number = int((query.get("page") or ["1"])[0])
+                items = drive._listing_page(folder_id, number)
+                if number > 1:
+                    # XHR do scroll infinito: só o fragmento
+                    return self._send(200, "\n".join(items).encode("utf-8"))
+                body = (
+                    f'<h5 class="mb-3">Pasta {folder_id}</h5>\n<ul class="list-group" id="lista">\n'
+                    + "\n".join(items) + '\n</ul>\n<div id="fim"></div>\n' + _SCROLL_JS
+                )
+                return self._send(200, _PAGE.format(title=folder_id, body=body).encode("utf-8"))
+
+            def _binary(self, file_id):
+                data = drive._content(file_id)
+                headers = {
+                    "Content-Disposition": f'attachment; filename="Documento {file_id}.pdf"',
+                    "Accept-Ranges": "bytes",
+                    "ETag": f'"{file_id}-{len(data)}"',
+                }
+                rng = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+                if_range = self.headers.get("If-Range")
+                if rng and (if_range is None or if_range == headers["ETag"]):
+                    start = int(rng.group(1))
+                    end = int(rng.group(2)) if rng.group(2) else len(data) - 1
+                    if start >= len(data):
+                        return self._send(416, b"", "application/pdf", {"Content-Range": f"bytes */{len(data)}"})
+                    end = min(end, len(data) - 1)
+                    headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+                    return self._send(206, data[start:end + 1], "application/pdf", headers)
+                return self._send(200, data, "application/pdf", headers)
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita o drivedepobre.com.")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--profundidade", type=int, default=2)
+    parser.add_argument("--subpastas", type=int, default=2)
+    parser.add_argument("--arquivos", type=int, default=20, help="arquivos por pasta")
+    parser.add_argument("--tamanho-kb", type=int, default=256)
+    parser.add_argument("--latencia-ms", type=float, default=0)
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="fração de arquivos cujo 1º clique falha")
+    args = parser.parse_args()
+    drive = DriveFalso(depth=args.profundidade, subfolders=args.subpastas, files=args.arquivos,
+                       file_size=args.tamanho_kb * 1024, latency_ms=args.latencia_ms, error_rate=args.taxa_erro,
+                       port=args.porta)
+    print(f"Servindo {drive.expected_files()} arquivo(s) em {drive.expected_folders()} pasta(s): {drive.root_url}")
+    try:
+        drive.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        drive.server.server_close()
+
+if __name__ == "__main__":
+    main()
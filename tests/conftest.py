@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Os testes importam baixar_drivedepobre e benchmarks/drive_falso direto da árvore.
+# Os componentes testados aqui não usam o Playwright; sem ele instalado, um módulo mínimo só com os
+# nomes importados no topo do script deixa a importação passar.
+
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+try:
+    import playwright.sync_api  # noqa: F401
+    import playwright.async_api  # noqa: F401
+except ImportError:
+    class _TimeoutError(Exception):
+        pass
+
+    def _unavailable():
+        raise RuntimeError("Playwright não instalado")
+
+    _sync = types.ModuleType("playwright.sync_api")
+    _sync.sync_playwright = _unavailable
+    _sync.TimeoutError = _TimeoutError
+    _async = types.ModuleType("playwright.async_api")
+    _async.async_playwright = _unavailable
+    _async.TimeoutError = _TimeoutError
+    sys.modules.update({
+        "playwright": types.ModuleType("playwright"),
+        "playwright.sync_api": _sync,
+        "playwright.async_api": _async,
+    })
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+import baixar_drivedepobre
+from baixar_drivedepobre import EXIT_FAILED, cli_main
+
+def _fake_engine(failed):
+    class FakeDownloader(threading.Thread):
+        def __init__(self, base_url, out_dir, settings, logger, stop_event):
+            super().__init__(daemon=True)
+            self.stats = {"failed": 0}
+
+        def run(self):
+            self.stats["failed"] = failed
+
+        def progress_line(self):
+            return f"{self.stats['failed']} falha(s)"
+
+    return lambda settings: FakeDownloader
+
+@pytest.mark.parametrize("failed, code", [(0, 0), (2, EXIT_FAILED)])
+def test_exit_code_reflects_failed_files(tmp_path, monkeypatch, capsys, failed, code):
+    monkeypatch.setattr(baixar_drivedepobre, "downloader_class", _fake_engine(failed))
+    assert cli_main(["https://drivedepobre.com/pasta/r", "-o", str(tmp_path)]) == code
+
+def test_exit_code_sums_failures_across_roots(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(baixar_drivedepobre, "downloader_class", _fake_engine(1))
+    urls = ["https://drivedepobre.com/pasta/a", "https://drivedepobre.com/pasta/b"]
+    assert cli_main(urls + ["-o", str(tmp_path), "--motor", "threads"]) == EXIT_FAILED
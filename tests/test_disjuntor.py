@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import time
+import threading
+import multiprocessing
+
+from baixar_drivedepobre import CircuitBreaker, RetryScheduler
+
+# --- CircuitBreaker -------------------------------------------------------
+
+def _breaker(**kw):
+    kw.setdefault("min_calls", 4)
+    kw.setdefault("threshold", 0.5)
+    kw.setdefault("cooldown", 0.05)
+    return CircuitBreaker(**kw)
+
+def test_breaker_opens_when_error_rate_crosses_threshold():
+    breaker = _breaker()
+    breaker.success()
+    breaker.failure("banner")
+    breaker.failure(None)  # erro que não diz nada sobre o site não conta como falha
+    assert breaker._state == "closed"
+    breaker.failure("nav_timeout")
+    assert breaker._state == "open"
+    assert breaker._gate() > 0
+
+def test_breaker_lets_a_single_probe_through_after_cooldown():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.failure("banner")
+    time.sleep(0.06)
+    assert breaker._gate() == 0.0
+    assert breaker._state == "half"
+    assert breaker._gate() == 1.0  # segundo worker espera o teste
+    breaker.success()
+    assert breaker._state == "closed"
+    assert breaker._gate() == 0.0
+
+def test_breaker_failed_probe_reopens_with_longer_pause():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.failure("banner")
+    first = breaker._open_until - time.monotonic()
+    time.sleep(0.06)
+    assert breaker._gate() == 0.0
+    breaker.failure("banner")
+    assert breaker._state == "open"
+    assert breaker._open_until - time.monotonic() > first
+
+def test_breaker_inconclusive_probe_releases_another():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.failure("banner")
+    time.sleep(0.06)
+    assert breaker._gate() == 0.0
+    breaker.failure(None)
+    assert breaker._state == "half"
+    assert breaker._gate() == 0.0
+
+def test_breaker_window_is_pruned_on_success():
+    breaker = _breaker(window=0.05)
+    for _ in range(50):
+        breaker.success()
+    time.sleep(0.06)
+    breaker.success()
+    assert len(breaker._results) == 1
+
+def test_breaker_shared_state_opens_every_instance():
+    shared = CircuitBreaker.shared_state(multiprocessing.get_context("spawn"))
+    a = _breaker(cooldown=30.0, shared=shared)
+    b = _breaker(cooldown=30.0, shared=shared)
+    for _ in range(4):
+        a.failure("http_5xx")
+    assert b._gate() > 0
+    assert b._state == "open"
+    # instância criada depois da abertura também respeita a pausa
+    assert _breaker(shared=shared)._gate() > 0
+
+# --- RetryScheduler -------------------------------------------------------
+
+def test_retry_scheduler_submits_by_deadline():
+    submitted = []
+    done = threading.Event()
+
+    def submit(job):
+        submitted.append(job)
+        if len(submitted) == 3:
+            done.set()
+
+    scheduler = RetryScheduler(submit)
+    try:
+        scheduler.schedule(("c",), 0.3)
+        scheduler.schedule(("a",), 0.05)
+        scheduler.schedule(("b",), 0.15)
+        assert scheduler.pending() == 3
+        assert done.wait(5)
+        assert submitted == [("a",), ("b",), ("c",)]
+        assert scheduler.pending() == 0
+    finally:
+        scheduler.close()
+
+def test_retry_scheduler_retry_later_carries_attempt_number():
+    submitted = []
+    scheduler = RetryScheduler(submitted.append)
+    try:
+        delay = scheduler.retry_later(("url", "pasta", "nome", 1), 2, "missing_button")
+        assert delay > 0
+        job = scheduler._heap[0][2]
+        assert job == ("url", "pasta", "nome", 2)
+    finally:
+        scheduler.close()
+
+def test_retry_scheduler_stops_with_stop_event():
+    stop = threading.Event()
+    submitted = []
+    scheduler = RetryScheduler(submitted.append, stop)
+    scheduler.schedule(("x",), 0.2)
+    stop.set()
+    scheduler._thread.join(3)
+    assert not scheduler._thread.is_alive()
+    assert submitted == []
+
+def test_breaker_success_while_open_does_not_close_it():
+    breaker = _breaker(cooldown=30.0)
+    for _ in range(4):
+        breaker.failure("banner")
+    # download que já estava em andamento termina durante a pausa
+    breaker.success()
+    assert breaker._state == "open"
+    assert breaker._gate() > 0
+    assert len(breaker._results) == 1
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+import baixar_drivedepobre
+from baixar_drivedepobre import DiskWriter
+
+def test_one_handle_writes_in_stream_order(tmp_path, monkeypatch):
+    # gravação lenta e com tempo variável: com vários blocos em voo, a ordem de conclusão embaralharia
+    real_pwrite = baixar_drivedepobre._pwrite
+    calls = []
+
+    def slow_pwrite(fd, data, offset):
+        calls.append(offset)
+        time.sleep(0.002 * (len(calls) % 3))
+        real_pwrite(fd, data, offset)
+
+    monkeypatch.setattr(baixar_drivedepobre, "_pwrite", slow_pwrite)
+    writer = DiskWriter(threads=4, fsync="none", preallocate=False)
+    done = []
+    path = str(tmp_path / "a.part")
+    chunks = [bytes([i]) * 1000 for i in range(40)]
+    with writer.open(path, truncate=True) as out:
+        for i, chunk in enumerate(chunks):
+            out.write(i * 1000, chunk, lambda n, i=i: done.append(i))
+    assert done == list(range(40))
+    if writer.positional:
+        assert calls == [i * 1000 for i in range(40)]
+    with open(path, "rb") as f:
+        assert f.read() == b"".join(chunks)
+
+def test_handles_still_write_in_parallel(tmp_path):
+    writer = DiskWriter(threads=2, fsync="none", preallocate=False)
+    paths = [str(tmp_path / f"{n}.part") for n in range(3)]
+    handles = [writer.open(p, truncate=True) for p in paths]
+    for offset in range(0, 8000, 1000):
+        for n, out in enumerate(handles):
+            out.write(offset, bytes([n]) * 1000)
+    for out in handles:
+        out.close()
+    for n, p in enumerate(paths):
+        assert os.path.getsize(p) == 8000
+        with open(p, "rb") as f:
+            assert set(f.read()) == {n}
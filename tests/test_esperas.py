@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from baixar_drivedepobre import download_options, fixed_waits
+
+def test_fixed_mode_keeps_blind_waits_with_host_limit():
+    assert fixed_waits({"throttle": "fixed", "max_per_host": 2}) == ((5, 10), (2, 5))
+
+def test_adaptive_mode_drops_blind_waits():
+    assert fixed_waits({"throttle": "adaptive", "max_per_host": 2}) == ((0, 0), (0, 0))
+
+def test_configured_waits_win():
+    settings = {"throttle": "adaptive", "pre_wait_random": (1, 2), "post_save_random": (3, 4)}
+    assert fixed_waits(settings) == ((1, 2), (3, 4))
+    options = download_options(dict(settings, throttle="fixed"))
+    assert options["pre_wait_random"] == (1, 2)
+    assert options["post_save_random"] == (3, 4)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+from baixar_drivedepobre import GuiLogger
+
+class FakeText:
+    # Só o que o GuiLogger usa do ScrolledText, com índices "linha.coluna" do Tk
+    def __init__(self):
+        self.lines = []
+        self._partial = ""
+
+    def configure(self, **kw):
+        pass
+
+    def insert(self, index, text):
+        parts = (self._partial + text).split("\n")
+        self.lines.extend(parts[:-1])
+        self._partial = parts[-1]
+
+    def delete(self, start, end):
+        if end == "end":
+            self.lines.clear()
+            self._partial = ""
+            return
+        first, last = int(start.split(".")[0]), int(end.split(".")[0])
+        del self.lines[first - 1:last - 1]
+
+    def see(self, index):
+        pass
+
+class FakeTree:
+    def __init__(self):
+        self.rows = {}
+
+    def exists(self, iid):
+        return iid in self.rows
+
+    def set(self, iid, column, value):
+        self.rows[iid] = (self.rows[iid][0], value)
+
+    def insert(self, parent, index, iid, values):
+        self.rows[iid] = tuple(values)
+
+    def delete(self, iid):
+        del self.rows[iid]
+
+    def get_children(self):
+        return list(self.rows)
+
+def _logger(**kw):
+    return GuiLogger(FakeText(), FakeTree(), **kw)
+
+def test_log_widget_keeps_only_the_last_lines():
+    logger = _logger(max_lines=5)
+    for i in range(12):
+        logger.log(f"linha {i}")
+        if i % 4 == 3:
+            logger.poll()
+    logger.poll()
+    lines = logger.text_widget.lines
+    assert len(lines) == 5
+    assert lines[-1].endswith("linha 11")
+    assert lines[0].endswith("linha 7")
+
+def test_multiline_messages_count_as_widget_lines():
+    logger = _logger(max_lines=4)
+    logger.log("erro\ncom\ntrês linhas")
+    logger.log("fim")
+    logger.poll()
+    logger.log("outra")
+    logger.poll()
+    assert len(logger.text_widget.lines) == 4
+    assert logger.text_widget.lines[-1].endswith("outra")
+
+def test_status_table_is_trimmed_but_counts_stay_exact():
+    logger = _logger(max_rows=3)
+    for i in range(5):
+        logger.set_item_status(f"/d/{i}.pdf", "baixando (1)")
+    logger.poll()
+    for i in range(5):
+        logger.set_item_status(f"/d/{i}.pdf", "ok")
+    logger.set_item_status("/d/0.pdf", "erro")
+    logger.poll()
+    assert len(logger.list_widget.rows) == 3
+    assert logger.counts["ok"] == 4
+    assert logger.counts["erro"] == 1
+    assert logger.counts["baixando"] == 0
+    assert logger.summary() == "1 erro, 4 ok"
+
+def test_poll_handles_at_most_max_events_per_tick():
+    logger = _logger(max_events_per_poll=3)
+    for i in range(5):
+        logger.log(str(i))
+    logger.poll()
+    assert len(logger.text_widget.lines) == 3
+    logger.poll()
+    assert len(logger.text_widget.lines) == 5
+
+def test_reset_clears_everything():
+    logger = _logger()
+    logger.log("x")
+    logger.set_item_status("/d/a.pdf", "ok")
+    logger.poll()
+    logger.log("pendente")
+    logger.reset()
+    logger.poll()
+    assert logger.text_widget.lines == []
+    assert logger.list_widget.rows == {}
+    assert logger.summary() == ""
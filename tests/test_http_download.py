@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+
+import pytest
+
+from drive_falso import DriveFalso
+from baixar_drivedepobre import (
+    DiskWriter, HttpPool, RangeChanged, PART_SUFFIX, SEGMENTS_SUFFIX, _fetch_range, http_download, target_name,
+)
+
+FILE_ID = "r-f1"
+VISIBLE = f"Documento {FILE_ID}.pdf"
+SIZE = 64 * 1024
+
+@pytest.fixture
+def drive():
+    with DriveFalso(file_size=SIZE) as server:
+        yield server
+
+@pytest.fixture
+def pool():
+    pool = HttpPool()
+    yield pool
+    pool.close()
+
+@pytest.fixture
+def writer():
+    return DiskWriter(fsync="none", preallocate=False)
+
+def _url(drive):
+    return f"{drive.base_url}/bin/{FILE_ID}"
+
+def _save_path(tmp_path):
+    return os.path.join(str(tmp_path), target_name(VISIBLE, VISIBLE))
+
+def _partial(tmp_path, data, sidecar=None):
+    save_path = _save_path(tmp_path)
+    with open(save_path + PART_SUFFIX, "wb") as f:
+        f.write(data)
+    if sidecar is not None:
+        with open(save_path + SEGMENTS_SUFFIX, "w", encoding="utf-8") as f:
+            json.dump(sidecar, f)
+    return save_path
+
+def _download(drive, pool, writer, tmp_path, **kw):
+    return http_download(pool, _url(drive), str(tmp_path), VISIBLE, writer=writer, **kw)
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def _etag(drive):
+    return f'"{FILE_ID}-{len(drive._content(FILE_ID))}"'
+
+def test_whole_download(drive, pool, writer, tmp_path):
+    save_path = _download(drive, pool, writer, tmp_path)
+    assert save_path == _save_path(tmp_path)
+    assert _read(save_path) == drive._content(FILE_ID)
+    assert not os.path.exists(save_path + PART_SUFFIX)
+    assert not os.path.exists(save_path + SEGMENTS_SUFFIX)
+
+def test_partial_without_sidecar_is_discarded(drive, pool, writer, tmp_path):
+    _partial(tmp_path, b"lixo" * 100)
+    save_path = _download(drive, pool, writer, tmp_path)
+    assert _read(save_path) == drive._content(FILE_ID)
+
+def test_matching_partial_is_resumed(drive, pool, writer, tmp_path):
+    # prefixo marcado: se a retomada usou o parcial, ele continua no arquivo final
+    half = SIZE // 2
+    _partial(tmp_path, b"#" * half, {"total": SIZE, "validator": _etag(drive)})
+    save_path = _download(drive, pool, writer, tmp_path)
+    assert _read(save_path) == b"#" * half + drive._content(FILE_ID)[half:]
+
+def test_partial_of_another_version_is_discarded(drive, pool, writer, tmp_path):
+    _partial(tmp_path, b"#" * (SIZE // 2), {"total": SIZE, "validator": '"versao-antiga"'})
+    save_path = _download(drive, pool, writer, tmp_path)
+    assert _read(save_path) == drive._content(FILE_ID)
+
+def test_partial_longer_than_file_is_discarded(drive, pool, writer, tmp_path):
+    _partial(tmp_path, b"#" * (SIZE + 10), {"total": SIZE, "validator": _etag(drive)})
+    save_path = _download(drive, pool, writer, tmp_path)
+    assert _read(save_path) == drive._content(FILE_ID)
+
+def test_range_with_stale_validator_raises(drive, pool, writer, tmp_path):
+    part_path = _save_path(tmp_path) + PART_SUFFIX
+    with pytest.raises(RangeChanged):
+        _fetch_range(pool, writer, _url(drive), {}, part_path, 10, SIZE - 1, 4096, total=SIZE,
+                     validator='"versao-antiga"')
+
+def test_segmented_download(drive, pool, writer, tmp_path):
+    save_path = _download(drive, pool, writer, tmp_path, segments=4, segment_min_size=1, chunk_size=4096)
+    assert _read(save_path) == drive._content(FILE_ID)
+    assert not os.path.exists(save_path + SEGMENTS_SUFFIX)
+
+def test_segmented_download_resumes_from_sidecar(drive, pool, writer, tmp_path):
+    quarter = SIZE // 4
+    segments = [[a, a + quarter - 1, 0] for a in range(0, SIZE, quarter)]
+    segments[0][2] = quarter  # primeira faixa já completa, marcada
+    save_path = _partial(tmp_path, b"#" * quarter + b"\0" * (SIZE - quarter),
+                         {"total": SIZE, "validator": _etag(drive), "segments": segments})
+    _download(drive, pool, writer, tmp_path, segments=4, segment_min_size=1, chunk_size=4096)
+    assert _read(save_path) == b"#" * quarter + drive._content(FILE_ID)[quarter:]
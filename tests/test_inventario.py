@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import os
+import threading
+
+from baixar_drivedepobre import (
+    MANIFEST_NAME, ConsoleLogger, InventoryDownloader, InventoryWriter, LeaseDir, read_inventory,
+)
+
+def test_inventory_lines_carry_folder_url_and_name(tmp_path):
+    path = str(tmp_path / "inv.jsonl")
+    writer = InventoryWriter(path)
+    writer.header("https://drivedepobre.com/pasta/r")
+    writer.add("A/B", "https://drivedepobre.com/pdf/1", "Documento 1.pdf")
+    writer.close()
+    records = list(read_inventory(path))
+    assert records == [{"folder": "A/B", "url": "https://drivedepobre.com/pdf/1", "name": "Documento 1.pdf"}]
+
+def test_inventory_mode_keeps_no_shared_sqlite(tmp_path):
+    inv = tmp_path / "inv.jsonl"
+    inv.write_text(json.dumps({"folder": "A", "url": "https://drivedepobre.com/pdf/1", "name": "1.pdf"}) + "\n")
+    settings = {"dedup": "id", "listing_cache": True, "shard": "1/4"}
+    job = InventoryDownloader(str(inv), str(tmp_path), settings, ConsoleLogger(stream=io.StringIO()),
+                              threading.Event())
+    job._open_manifest()
+    try:
+        assert job.manifest is None and job.listing_cache is None
+        assert os.path.basename(job.dedup.path).endswith(".1-4.sqlite3")
+        mode = job.dedup._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() != "wal"
+        assert not os.path.exists(tmp_path / MANIFEST_NAME)
+    finally:
+        job.dedup.close()
+
+def test_occurrence_done_on_another_machine_is_not_claimed(tmp_path):
+    occurrence = ("https://drivedepobre.com/pdf/1", "A")
+    other = LeaseDir(str(tmp_path), "maquina-1:1:0/2")
+    here = LeaseDir(str(tmp_path), "maquina-2:1:1/2")
+    try:
+        assert other.claim(occurrence)
+        assert not here.claim(occurrence)
+        other.complete(occurrence)
+        assert not here.claim(occurrence)
+        assert here.claim(("https://drivedepobre.com/pdf/1", "B"))
+    finally:
+        other.close()
+        here.close()
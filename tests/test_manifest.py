@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import sqlite3
+import threading
+
+from baixar_drivedepobre import MANIFEST_NAME, ConsoleLogger, Manifest, _RootPipeline
+
+URL = "https://drivedepobre.com/pdf/abc"
+
+class Pipeline(_RootPipeline):
+    # Só a parte comum aos motores: os jobs ficam numa lista em vez de ir para workers
+    def __init__(self, out_dir, **settings):
+        self._init_root("https://drivedepobre.com/pasta/r", out_dir, settings,
+                        ConsoleLogger(stream=io.StringIO()), threading.Event())
+        self.jobs = []
+
+    def _put_folder(self, item, priority):
+        pass
+
+    def _put_job(self, job):
+        self.jobs.append(job)
+
+def test_same_url_in_two_folders_is_queued_for_each(tmp_path):
+    pipeline = Pipeline(str(tmp_path), resume=True)
+    pipeline._open_manifest()
+    a, b = str(tmp_path / "A"), str(tmp_path / "B")
+    pipeline._handle_links(a, 1, [], [(URL, "abc.pdf")])
+    pipeline._handle_links(b, 1, [], [(URL, "abc.pdf")])
+    # a mesma pasta listando a URL de novo não gera outra cópia
+    pipeline._handle_links(a, 1, [], [(URL, "abc.pdf")])
+    assert pipeline.jobs == [(URL, "abc.pdf", a), (URL, "abc.pdf", b)]
+    assert sorted(pipeline.manifest.pending_files()) == [(URL, "abc.pdf", a), (URL, "abc.pdf", b)]
+    pipeline._finish_run()
+
+def test_manifest_tracks_each_folder_copy(tmp_path):
+    a, b = str(tmp_path / "A"), str(tmp_path / "B")
+    manifest = Manifest(str(tmp_path))
+    manifest.add_files([(URL, "abc.pdf", a), (URL, "abc.pdf", b)])
+    manifest.file_finished(URL, a, os.path.join(a, "abc.pdf"))
+    assert manifest.is_done(URL, a)
+    assert not manifest.is_done(URL, b)
+    assert manifest.pending_files() == [(URL, "abc.pdf", b)]
+    manifest.close()
+    reopened = Manifest(str(tmp_path))
+    assert reopened.is_done(URL, a) and not reopened.is_done(URL, b)
+    assert reopened.saved_path(URL, a) == os.path.join(a, "abc.pdf")
+    reopened.close()
+
+def test_manifest_keyed_by_url_is_migrated(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / MANIFEST_NAME))
+    conn.execute(
+        "CREATE TABLE files (url TEXT PRIMARY KEY, visible_name TEXT, local_path TEXT, save_path TEXT,"
+        " size INTEGER, status TEXT NOT NULL DEFAULT 'pending', updated_at REAL)"
+    )
+    conn.execute("INSERT INTO files (url, visible_name, local_path, status) VALUES (?, 'abc.pdf', 'A', 'done')",
+                 (URL,))
+    conn.commit()
+    conn.close()
+    manifest = Manifest(str(tmp_path))
+    assert manifest.is_done(URL, "A")
+    manifest.add_files([(URL, "abc.pdf", "B")])
+    assert manifest.pending_files() == [(URL, "abc.pdf", "B")]
+    manifest.close()
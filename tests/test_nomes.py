@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import os
+
+from baixar_drivedepobre import NameResolver
+
+def test_reserve_skips_names_on_disk_and_already_reserved(tmp_path):
+    (tmp_path / "a.pdf").write_bytes(b"x")
+    names = NameResolver()
+    first = names.reserve(str(tmp_path), "a.pdf")
+    second = names.reserve(str(tmp_path), "a.pdf")
+    assert os.path.basename(first) == "a (1).pdf"
+    assert os.path.basename(second) == "a (2).pdf"
+    assert os.path.basename(names.reserve(str(tmp_path), "b.pdf")) == "b.pdf"
+
+def test_reserve_sees_files_created_after_the_index(tmp_path):
+    names = NameResolver()
+    assert os.path.basename(names.reserve(str(tmp_path), "a.pdf")) == "a.pdf"
+    # criado por fora do índice (outro processo, usuário)
+    (tmp_path / "a (1).pdf").write_bytes(b"x")
+    assert os.path.basename(names.reserve(str(tmp_path), "a.pdf")) == "a (2).pdf"
+
+def test_release_gives_the_name_back(tmp_path):
+    names = NameResolver()
+    first = names.reserve(str(tmp_path), "a.pdf")
+    second = names.reserve(str(tmp_path), "a.pdf")
+    names.release(second)
+    assert names.reserve(str(tmp_path), "a.pdf") == second
+    names.release(first)
+    assert names.reserve(str(tmp_path), "a.pdf") == first
+
+def test_forget_drops_only_the_root_index(tmp_path):
+    root, other = tmp_path / "raiz", tmp_path / "raiz2"
+    (root / "sub").mkdir(parents=True)
+    other.mkdir()
+    names = NameResolver()
+    names.reserve(str(root), "a.pdf")
+    names.reserve(str(root / "sub"), "a.pdf")
+    kept = names.reserve(str(other), "a.pdf")
+    names.forget(str(root))
+    assert set(names._taken) == {str(other)}
+    assert {key[0] for key in names._next} == {str(other)}
+    assert {key[0] for key in names._origin} == {str(other)}
+    # a raiz volta a usar o disco como referência: nada foi gravado, o nome está livre
+    assert os.path.basename(names.reserve(str(root), "a.pdf")) == "a.pdf"
+    names.release(kept)
+    assert names.reserve(str(other), "a.pdf") == kept
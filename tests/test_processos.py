@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import io
+import threading
+
+from baixar_drivedepobre import ConsoleLogger, ProcessDownloaderThread
+
+URL = "https://drivedepobre.com/pdf/"
+
+def _thread(tmp_path):
+    # nenhum processo é iniciado: só as filas e a contabilidade do motor
+    thread = ProcessDownloaderThread("https://drivedepobre.com/pasta/r", str(tmp_path), {"resume": True},
+                                     ConsoleLogger(stream=io.StringIO()), threading.Event())
+    thread._open_manifest()
+    return thread
+
+def _pump(thread, *events):
+    for event in events:
+        thread.events.put(event)
+    thread._pump_done.set()
+    thread._pump_events()
+
+def test_jobs_without_answer_are_counted_as_failed(tmp_path):
+    thread = _thread(tmp_path)
+    a, b = str(tmp_path / "A"), str(tmp_path / "B")
+    jobs = [(URL + "a", "a.pdf", a), (URL + "b", "b.pdf", b)]
+    thread.manifest.add_files(jobs)
+    for job in jobs:
+        thread._put_job(job)
+    _pump(thread, ("result", 1, URL + "a", a, a + "/a.pdf"))
+    thread._abandon_outstanding()
+    assert thread.stats["done"] == 1
+    assert thread.stats["failed"] == 1
+    assert thread._outstanding == {}
+    # falha fica no manifesto: a próxima execução tenta de novo
+    assert thread.manifest.pending_files() == [(URL + "b", "b.pdf", b)]
+    thread._finish_run()
+
+def test_late_result_of_an_abandoned_job_fixes_the_count(tmp_path):
+    thread = _thread(tmp_path)
+    job = (URL + "a", "a.pdf", str(tmp_path))
+    thread._put_job(job)
+    thread._abandon_outstanding()
+    _pump(thread, ("result", 1, URL + "a", str(tmp_path), str(tmp_path) + "/a.pdf"))
+    assert thread.stats["failed"] == 0
+    assert thread.stats["done"] == 1
+    assert thread.manifest.is_done(URL + "a", str(tmp_path))
+    thread._finish_run()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import time
+import multiprocessing
+
+import pytest
+
+from baixar_drivedepobre import AdaptiveThrottle
+
+URL = "https://drivedepobre.com/arquivo/1"
+
+# --- AdaptiveThrottle -----------------------------------------------------
+
+def test_throttle_success_shortens_interval_down_to_minimum():
+    throttle = AdaptiveThrottle(initial_interval=1.0, min_interval=0.5, step=0.25)
+    throttle.success(URL)
+    assert throttle._state(URL)["interval"] == 0.75
+    for _ in range(5):
+        throttle.success(URL)
+    assert throttle._state(URL)["interval"] == 0.5
+
+def test_throttle_congestion_doubles_interval_and_pauses_host():
+    throttle = AdaptiveThrottle(initial_interval=1.0, max_interval=3.0, backoff_base=1.0)
+    pause = throttle.failure(URL, "banner")
+    st = throttle._state(URL)
+    assert 0.5 <= pause <= 1.5
+    assert st["interval"] == 2.0
+    assert st["failures"] == 1
+    assert st["next"] >= time.monotonic() + pause - 0.1
+    throttle.failure(URL, "http_429")
+    assert throttle._state(URL)["interval"] == 3.0
+    throttle.success(URL)
+    assert throttle._state(URL)["failures"] == 0
+
+def test_throttle_ignores_failures_that_are_not_congestion():
+    throttle = AdaptiveThrottle(initial_interval=1.0)
+    for kind in ("missing_button", None):
+        assert throttle.failure(URL, kind) == 0.0
+    st = throttle._state(URL)
+    assert st["interval"] == 1.0
+    assert st["failures"] == 0
+    assert st["next"] == 0.0
+
+def test_throttle_reserve_spaces_requests_per_host():
+    throttle = AdaptiveThrottle(initial_interval=10.0)
+    assert throttle.reserve(URL) <= 0
+    assert throttle.reserve(URL) == pytest.approx(10.0, abs=0.5)
+    # outro host tem o próprio ritmo
+    assert throttle.reserve("https://outro.example/x") <= 0
+
+def test_throttle_shared_state_is_seen_by_every_instance():
+    shared = AdaptiveThrottle.shared_state(multiprocessing.get_context("spawn"))
+    a = AdaptiveThrottle(initial_interval=1.0, shared=shared)
+    b = AdaptiveThrottle(initial_interval=1.0, shared=shared)
+    a.failure(URL, "nav_timeout")
+    assert b._state(URL)["interval"] == 2.0
+    assert b._state(URL)["failures"] == 1
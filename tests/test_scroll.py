@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import baixar_drivedepobre
+from baixar_drivedepobre import process_folder, scroll_options
+
+class FakePage:
+    url = "https://drivedepobre.com/pasta/r"
+
+    def goto(self, url, **kw):
+        pass
+
+    def evaluate(self, script, arg=None):
+        return [[], []]
+
+def test_events_mode_options():
+    settings = {"scroll_mode": "events", "scroll_max_wait": 2.5, "step_delay": 0.3, "scroll_quiet_ms": 400,
+                "listing_endpoint": False}
+    assert scroll_options(settings) == {"max_wait": 2.5, "quiet_ms": 400, "use_listing_endpoint": False}
+
+def test_poll_mode_options_and_defaults():
+    assert scroll_options({"scroll_mode": "poll", "scroll_max_wait": 3, "step_delay": 0.5}) == {
+        "max_wait": 3, "step_delay": 0.5}
+    assert scroll_options({"scroll_mode": "events"}) == {}
+
+def test_process_folder_passes_scroll_settings(monkeypatch):
+    seen = {}
+    monkeypatch.setattr(baixar_drivedepobre, "scroll_until_idle", lambda page, **kw: seen.update(kw))
+    settings = {"scroll_mode": "events", "scroll_max_wait": 2.5, "scroll_quiet_ms": 400}
+    process_folder(FakePage(), FakePage.url, scroll_mode="events", scroll_args=scroll_options(settings))
+    assert seen["max_wait"] == 2.5
+    assert seen["quiet_ms"] == 400
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import io
+import threading
+from queue import Queue
+
+import baixar_drivedepobre
+from baixar_drivedepobre import ConsoleLogger, DownloadWorker, HostLimiter, Manifest
+
+URL = "https://drivedepobre.com/pdf/abc"
+
+def _worker(tmp_path, results, manifest=None, limiter=None):
+    return DownloadWorker(1, Queue(), {}, ConsoleLogger(stream=io.StringIO()), threading.Event(),
+                          limiter or HostLimiter(1), manifest=manifest,
+                          on_result=lambda *args: results.append(args))
+
+def test_worker_reports_result_and_frees_the_host_slot(tmp_path, monkeypatch):
+    monkeypatch.setattr(baixar_drivedepobre, "download_file", lambda ctx, url, name, path, **kw: f"{path}/{name}")
+    results = []
+    limiter = HostLimiter(1)
+    worker = _worker(tmp_path, results, limiter=limiter)
+    assert worker._handle(None, None, (URL, "abc.pdf", "A"))
+    assert worker._handle(None, None, (URL, "abc.pdf", "B"))
+    assert results == [(URL, "A", "A/abc.pdf"), (URL, "B", "B/abc.pdf")]
+    assert limiter.acquire(URL)
+
+def test_worker_survives_unexpected_errors(tmp_path, monkeypatch):
+    def boom(*args, **kw):
+        raise RuntimeError("quebrou")
+
+    monkeypatch.setattr(baixar_drivedepobre, "download_file", boom)
+    results = []
+    limiter = HostLimiter(1)
+    worker = _worker(tmp_path, results, limiter=limiter)
+    assert worker._handle(None, None, (URL, "abc.pdf", "A"))
+    assert results == []
+    assert limiter.acquire(URL)
+
+def test_worker_skips_copies_already_in_the_manifest(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(baixar_drivedepobre, "download_file", lambda *args, **kw: calls.append(args[1]) or "x")
+    manifest = Manifest(str(tmp_path))
+    manifest.add_files([(URL, "abc.pdf", "A")])
+    manifest.file_finished(URL, "A")
+    worker = _worker(tmp_path, [], manifest=manifest)
+    worker._handle(None, None, (URL, "abc.pdf", "A"))
+    worker._handle(None, None, (URL, "abc.pdf", "B"))
+    assert calls == [URL]
+    manifest.close()
+
+def test_worker_stops_waiting_for_a_host_slot_on_stop(tmp_path):
+    limiter = HostLimiter(1)
+    assert limiter.acquire(URL)
+    worker = _worker(tmp_path, [], limiter=limiter)
+    worker.stop_event.set()
+    assert worker._handle(None, None, (URL, "abc.pdf", "A")) is False